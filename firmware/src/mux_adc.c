@@ -13,6 +13,10 @@ static const struct device *adc_dev = DEVICE_DT_GET(DT_NODELABEL(adc));
 #define ADC_RESOLUTION 12
 #define ADC_CHANNEL_COUNT 8
 
+/* Settling time after a mux address change. Worst case per address comes
+ * from hardware/nRF54LM20_TMR2615/analog_rc.py (routed trace RC). */
+#define MUX_SETTLE_US 10
+
 // Buffer to store one full "sweep" of 8 sensors across 8 ADC pins
 static int16_t sample_buffer[ADC_CHANNEL_COUNT];
 
@@ -21,7 +25,7 @@ void set_mux_address(uint8_t addr) {
     gpio_pin_set_dt(&mux_b1, (addr >> 1) & 1);
     gpio_pin_set_dt(&mux_b2, (addr >> 2) & 1);
     // TMR sensors are fast, but MUXes need a tiny bit of time to settle
-    k_busy_wait(10); 
+    k_busy_wait(MUX_SETTLE_US);
 }
 
 void read_all_tmr_sensors() {
@@ -0,0 +1,359 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# KiCad Python script to save and restore component positions/orientations.
+#
+# Uses the KiCad IPC API (kicad-python). Enable the API server in
+# Preferences > Plugins, open the board in PCB Editor, then run from a
+# terminal or from the python console:
+#    exec(open("path-to-script-file").read())
+#
+# One copy serves every variant in archive/: the files are written next to
+# whichever board is open, and each variant's dumploc.py only loads this one.
+#
+# Using CSV file instead of ascii/binary pickle file, for readability.
+# Rows are: Ref, PosX (IU), PosY (IU), Angle (degrees), Layer. Files written
+# before the Layer column was added are still read; their footprints are not
+# flipped on restore. The IPC API cannot flip a footprint: a restore selects
+# the ones on the wrong side for a manual flip and leaves their pose to the
+# next restore, since flipping mirrors the angle.
+
+import csv
+import hashlib
+import io
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from kipy import KiCad
+from kipy.geometry import Angle, Vector2
+from kipy.util.board_layer import canonical_name, layer_from_canonical_name
+
+# KiCad uses nanometers (nm) as its internal unit (IU)
+# 1 mm = 1,000,000 nm
+IU_PER_MM = 1_000_000
+
+# --- Configuration ---
+# File name for saving/loading footprint data
+FOOTPRINT_FILE = "footprint_locations.csv"
+# The list of reference prefixes to search for (R1, C1, J1, U1, etc.)
+DEFAULT_PREFIXES = ["ADC", "R", "C", "D", "J", "U", "S", "H", "Hs", "LD", "USB"]
+# Snapshot history, next to FOOTPRINT_FILE. Each distinct placement is stored
+# once as <sha256>.csv; SNAPSHOT_LOG lists every save in order.
+SNAPSHOT_DIR = "footprint_snapshots"
+SNAPSHOT_LOG = "log.csv"
+
+# Ref -> (PosX, PosY, Angle, Layer); Layer is None for old files
+Pose = Tuple[int, int, float, Optional[str]]
+
+kicad = KiCad()
+board = kicad.get_board()
+
+
+def get_file_path() -> str:
+    """
+    Constructs the absolute path to the CSV file, typically in the project directory.
+    """
+    project_dir = board.get_project().path or os.getenv("KIPRJMOD", ".")
+    return os.path.join(project_dir, FOOTPRINT_FILE)
+
+
+def footprints_by_reference() -> Dict[str, object]:
+    """Fetch all footprints from KiCad once, keyed by reference."""
+    return {fp.reference_field.text.value: fp for fp in board.get_footprints()}
+
+
+def pose(fp) -> Pose:
+    return (fp.position.x, fp.position.y, round(fp.orientation.degrees, 6),
+            canonical_name(fp.layer))
+
+
+def save_positions(prefixes: List[str] = DEFAULT_PREFIXES):
+    """
+    Saves the position (IU), orientation (degrees) and side of all specified
+    footprints to a CSV file.
+    """
+    print("--- Saving Footprint Positions ---")
+
+    positions: Dict[str, Pose] = {
+        ref: pose(fp)
+        for ref, fp in footprints_by_reference().items()
+        if any(ref.startswith(p) for p in prefixes)
+    }
+
+    file_path = get_file_path()
+
+    try:
+        with open(file_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            for ref, (x, y, angle, layer) in positions.items():
+                writer.writerow([ref, x, y, angle, layer])
+        print(f"✅ Successfully saved {len(positions)} footprints to:\n{file_path}")
+    except IOError as e:
+        print(f"❌ Error saving file at {file_path}: {e}")
+
+
+def load_positions(file_path: Optional[str] = None) -> Dict[str, Pose]:
+    """
+    Reads the CSV once into a dict keyed by reference. Later rows for the same
+    reference win, matching what repeated restores used to do.
+    """
+    positions: Dict[str, Pose] = {}
+    with open(file_path or get_file_path(), "r") as f:
+        for row in csv.reader(f):
+            if not row or len(row) < 4:
+                continue
+            try:
+                layer = row[4] if len(row) > 4 and row[4] else None
+                positions[row[0]] = (int(row[1]), int(row[2]), float(row[3]), layer)
+            except ValueError:
+                print(f"Skipping {row[0]}: Bad data format in CSV.")
+    return positions
+
+
+def restore_positions(refs: Optional[Iterable[str]] = None,
+                      positions: Optional[Dict[str, Pose]] = None) -> int:
+    """
+    Restores the saved pose of refs (all saved footprints if None) as a single
+    undoable edit. Footprints already at their saved pose are not sent.
+    Returns the number of footprints updated.
+    """
+    if positions is None:
+        try:
+            positions = load_positions()
+        except FileNotFoundError:
+            print(f"❌ Error: CSV file not found at {get_file_path()}. Run 'save_positions()' first.")
+            return 0
+
+    footprints = footprints_by_reference()
+    changed = []
+    to_flip = []
+    for ref in positions if refs is None else refs:
+        saved = positions.get(ref)
+        fp = footprints.get(ref)
+        if saved is None:
+            print(f"Footprint '{ref}' not found in the CSV file.")
+            continue
+        if fp is None:
+            print(f"Footprint '{ref}' not found on the board.")
+            continue
+
+        x, y, angle, layer = saved
+        # A flip mirrors the orientation, so a footprint on the wrong side
+        # gets its pose only once it has been flipped.
+        if layer is not None and layer_from_canonical_name(layer) != fp.layer:
+            to_flip.append(fp)
+            continue
+        current = pose(fp)
+        if current[:2] != (x, y) or abs((current[2] - angle + 180) % 360 - 180) > 1e-6:
+            fp.position = Vector2.from_xy(x, y)
+            fp.orientation = Angle.from_degrees(angle)
+            changed.append(fp)
+
+    if changed:
+        commit = board.begin_commit()
+        try:
+            board.update_items(changed)
+            board.push_commit(commit, "Restore footprint positions")
+        except Exception:
+            board.drop_commit(commit)
+            raise
+        print(f"--- Restored Footprint Positions ---")
+        print(f"✅ Successfully restored positions for {len(changed)} footprints.")
+    elif not to_flip:
+        print("All footprints are already at their saved positions.")
+
+    # KiCad 10's IPC API has no footprint-flip operation; see placefp.py.
+    if to_flip:
+        board.clear_selection()
+        board.add_to_selection(to_flip)
+        refs = ", ".join(sorted(fp.reference_field.text.value for fp in to_flip))
+        print(f"Footprints on the wrong side are selected: {refs}\n"
+              "Press F once in PCB Editor to flip them, then run the restore again "
+              "to set their position and angle.")
+    return len(changed)
+
+
+def restore_position(ref_designator: str):
+    """
+    Restores the position and orientation of a single footprint.
+    """
+    try:
+        positions = load_positions()
+    except FileNotFoundError:
+        print(f"❌ Error: CSV file not found at {get_file_path()}. Run 'save_positions()' first.")
+        return
+    if restore_positions([ref_designator], positions) and ref_designator in positions:
+        pos_x, pos_y, angle, _ = positions[ref_designator]
+        print(f"✅ Restored {ref_designator}: Pos=({pos_x/IU_PER_MM:.2f}mm, {pos_y/IU_PER_MM:.2f}mm), Angle={angle:.2f}°")
+
+
+def restore_all_positions():
+    """
+    Restores the position and orientation of all stored footprints.
+    """
+    restore_positions()
+
+
+# --- Snapshot history ---
+
+def get_snapshot_dir() -> str:
+    return os.path.join(os.path.dirname(get_file_path()), SNAPSHOT_DIR)
+
+
+def encode_snapshot(positions: Dict[str, Pose]) -> bytes:
+    """CSV bytes sorted by reference, so equal placements hash equally."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for ref in sorted(positions):
+        x, y, angle, layer = positions[ref]
+        writer.writerow([ref, x, y, angle, layer])
+    return buffer.getvalue().encode()
+
+
+def save_snapshot(label: str = "", prefixes: List[str] = DEFAULT_PREFIXES) -> str:
+    """
+    Stores the current placement under its content hash and logs the save.
+    An unchanged placement reuses the existing file. Returns the hash.
+    """
+    positions = {
+        ref: pose(fp)
+        for ref, fp in footprints_by_reference().items()
+        if any(ref.startswith(p) for p in prefixes)
+    }
+    data = encode_snapshot(positions)
+    digest = hashlib.sha256(data).hexdigest()
+
+    snapshot_dir = get_snapshot_dir()
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, f"{digest}.csv")
+    is_new = not os.path.exists(path)
+    if is_new:
+        with open(path, "wb") as f:
+            f.write(data)
+    with open(os.path.join(snapshot_dir, SNAPSHOT_LOG), "a", newline="") as f:
+        csv.writer(f).writerow([time.strftime("%Y-%m-%d %H:%M:%S"), digest, label])
+
+    state = "new" if is_new else "unchanged, deduplicated"
+    print(f"✅ Snapshot {digest[:12]} ({len(positions)} footprints, {state}) {label}")
+    return digest
+
+
+def list_snapshots() -> List[Tuple[str, str, str]]:
+    """Returns (time, hash, label) for every save, oldest first."""
+    try:
+        with open(os.path.join(get_snapshot_dir(), SNAPSHOT_LOG), "r") as f:
+            return [tuple(row) for row in csv.reader(f) if len(row) == 3]
+    except FileNotFoundError:
+        return []
+
+
+def resolve_snapshot(key) -> Optional[str]:
+    """
+    Returns the full hash for key: a log index (-1 is the latest save) or a
+    unique hash prefix. Prints why and returns None if there is no such
+    snapshot.
+    """
+    if isinstance(key, int):
+        snapshots = list_snapshots()
+        if not -len(snapshots) <= key < len(snapshots):
+            print(f"❌ No snapshot {key}: {len(snapshots)} saved. Run 'save_snapshot()' first.")
+            return None
+        return snapshots[key][1]
+    try:
+        names = os.listdir(get_snapshot_dir())
+    except FileNotFoundError:
+        print(f"❌ No snapshots at {get_snapshot_dir()}. Run 'save_snapshot()' first.")
+        return None
+    matches = [name[:-4] for name in names
+               if name.startswith(key) and name.endswith(".csv") and name != SNAPSHOT_LOG]
+    if len(matches) != 1:
+        print(f"❌ Snapshot {key!r} matches {len(matches)} snapshots.")
+        return None
+    return matches[0]
+
+
+def load_snapshot(key=-1) -> Optional[Dict[str, Pose]]:
+    digest = resolve_snapshot(key)
+    if digest is None:
+        return None
+    return load_positions(os.path.join(get_snapshot_dir(), f"{digest}.csv"))
+
+
+def diff_positions(old: Dict[str, Pose], new: Dict[str, Pose]) -> Dict[str, List[str]]:
+    """
+    Compares two placements in one pass over their references. A footprint
+    can be both moved and rotated.
+    """
+    diff: Dict[str, List[str]] = {
+        "moved": [], "rotated": [], "flipped": [], "added": [], "removed": []}
+    for ref, (x, y, angle, layer) in new.items():
+        before = old.get(ref)
+        if before is None:
+            diff["added"].append(ref)
+            continue
+        if before[:2] != (x, y):
+            diff["moved"].append(ref)
+        if abs((before[2] - angle + 180) % 360 - 180) > 1e-6:
+            diff["rotated"].append(ref)
+        if before[3] is not None and layer is not None and before[3] != layer:
+            diff["flipped"].append(ref)
+    diff["removed"] = [ref for ref in old if ref not in new]
+    return diff
+
+
+def diff_snapshots(old=-2, new=-1) -> Optional[Dict[str, List[str]]]:
+    """
+    Prints and returns what changed between two snapshots (by default the
+    last two saves), or None if either does not exist. Identical hashes
+    short-circuit without reading files.
+    """
+    old_hash, new_hash = resolve_snapshot(old), resolve_snapshot(new)
+    if old_hash is None or new_hash is None:
+        return None
+    if old_hash == new_hash:
+        diff = {"moved": [], "rotated": [], "flipped": [], "added": [], "removed": []}
+    else:
+        diff = diff_positions(load_snapshot(old_hash), load_snapshot(new_hash))
+
+    print(f"--- {old_hash[:12]} -> {new_hash[:12]} ---")
+    for kind, refs in diff.items():
+        if refs:
+            print(f"{kind:>8}: {len(refs):>3}  {', '.join(sorted(refs))}")
+    if not any(diff.values()):
+        print("No changes.")
+    return diff
+
+
+def restore_snapshot(key=-1, refs: Optional[Iterable[str]] = None) -> int:
+    """Restores refs (all if None) from a stored snapshot in one edit."""
+    positions = load_snapshot(key)
+    if positions is None:
+        return 0
+    return restore_positions(refs, positions)
+
+
+# --- Example ---
+
+# 1. Save all current positions
+save_positions()
+
+# 2. Restore a specific position (e.g., after moving it accidentally)
+# restore_position("J1")
+
+# 3. Restore several positions in one edit, reading the CSV once
+# saved = load_positions()
+# restore_positions([f"S{i}" for i in range(1, 16)], saved)
+
+# 4. Restore all positions
+# restore_all_positions()
+
+# 5. Keep a history of placements and review what changed between saves
+# save_snapshot("moved thumb cluster")
+# list_snapshots()
+# diff_snapshots()            # last two saves
+# diff_snapshots("3fa2", -1)  # hash prefix or log index
+# restore_snapshot("3fa2", ["S62", "S63"])
+
+print("\nScript loaded. Use save_positions(), restore_position('REF'), restore_positions([...]), "
+      "restore_all_positions(), save_snapshot(), diff_snapshots() or restore_snapshot().")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+"""Build the whole keyboard stack in 3D and check how the parts fit.
+
+    ./assemble.py --set pcb.thickness=1.6 --set pcb.gap=1.0   # build, check, write assembly.step
+    ./assemble.py --set ... --jobs 4 --clearance 0.3
+
+Every part in STACK is the outline on some layers of a board, extruded by
+its thickness and raised to its Z offset. A cut part's thickness is its
+board's; the case layers rest on each other, so their offsets follow from
+the thicknesses below. The pcb's thickness and its height above the bottom
+cover are in no file here and must be given with --set; until then the
+script stops without building anything. Outlines come from the boards
+through edgecuts.py and wires.py; the pcb outline, which has no board in
+this directory, comes from the border golden in tools/golden/. Parts build
+in parallel processes and are handed back as BREP files.
+
+Each pair of parts from different boards is then checked, also in
+parallel: a common volume is interference, a gap below --clearance is too
+tight, a zero gap is contact (layers resting on each other). Helper outlines,
+the User.6 side wall and cavity offsets, are built and written to the STEP
+file for reference but not checked, since they overlap the parts they were
+drawn around; their open outlines are skipped. The botcover's User.5
+hexagons are holes of the botcover itself. User.4 holds only the open
+construction curves of the border (12 on swplate, 8 on wristrest) and
+User.7 nothing, so neither is built.
+
+Run in a virtual env where build123d is installed.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+
+from build123d import *
+
+from rebuild_board import make_wire
+
+HERE = Path(__file__).resolve().parent
+TOOLS = HERE.parents[1] / "tools"
+sys.path.insert(0, str(TOOLS))
+import boardq
+import edgecuts
+import pcbfile
+import wires
+
+VARIANT = "nRF54L15_TMR2615_sm_kailh"
+BUILD_DIR = TOOLS / "build" / "assembly" / VARIANT
+
+# Bottom to top. A part cut from a board is as thick as that board says
+# (general thickness in its .kicad_pcb). It rests on the part named by "on",
+# "gap" mm above its top, or on the table (z 0). Helpers span the parts
+# they belong to. None is a value no file here holds: give it with --set,
+# e.g. --set pcb.thickness=1.6 --set pcb.gap=2.0; nothing is built without.
+STACK = [
+    {"name": "botcover", "board": "botcover/botcover.kicad_pcb",
+     "layers": ["Edge.Cuts", "User.5"], "on": None, "gap": 0.0},
+    {"name": "botcase", "board": "botcase/botcase.kicad_pcb",
+     "layers": ["Edge.Cuts"], "on": "botcover", "gap": 0.0},
+    # The pcb stands in the botcase cavity; its board is not in this directory.
+    {"name": "pcb", "golden": "pcb", "layers": ["Edge.Cuts"], "thickness": None,
+     "on": "botcover", "gap": None},
+    {"name": "swplate", "board": "swplate/swplate.kicad_pcb",
+     "layers": ["Edge.Cuts"], "on": "botcase", "gap": 0.0},
+    {"name": "topcase", "board": "topcase/topcase.kicad_pcb",
+     "layers": ["Edge.Cuts"], "on": "swplate", "gap": 0.0},
+    {"name": "wristrest", "board": "wristrest/wristrest.kicad_pcb",
+     "layers": ["Edge.Cuts"], "on": None, "gap": 0.0},
+    # Helper outlines, spanning the case they belong to.
+    {"name": "swplate-wall", "board": "swplate/swplate.kicad_pcb",
+     "layers": ["User.6"], "span": ("botcase", "topcase"), "helper": True},
+    {"name": "topcase-wall", "board": "topcase/topcase.kicad_pcb",
+     "layers": ["User.6"], "span": ("topcase", "topcase"), "helper": True},
+    {"name": "botcase-wall", "board": "botcase/botcase.kicad_pcb",
+     "layers": ["User.6"], "span": ("botcase", "botcase"), "helper": True},
+    {"name": "wristrest-cavity", "board": "wristrest/wristrest.kicad_pcb",
+     "layers": ["User.6"], "span": ("wristrest", "wristrest"), "helper": True},
+]
+
+
+def resolve(stack, settings=None):
+    """Return copies of stack with z and thickness in mm, or raise ValueError.
+
+    settings maps "part.key" to a value and overrides the entry's own. A
+    thickness missing from both comes from the part's board; anything
+    still unknown is listed in the error.
+    """
+    settings = settings or {}
+    parts, missing = {}, []
+    for entry in stack:
+        part = dict(entry)
+        for key in ("thickness", "gap"):
+            if f"{part['name']}.{key}" in settings:
+                part[key] = settings[f"{part['name']}.{key}"]
+        if "span" not in part:
+            if part.get("thickness") is None and "board" in part:
+                part["thickness"] = boardq.index(HERE / part["board"])["thickness"]
+            for key in ("thickness", "gap"):
+                if part.get(key) is None:
+                    missing.append(f"{part['name']}.{key}")
+        parts[part["name"]] = part
+    unknown = set(settings) - {f"{name}.{key}" for name in parts for key in ("thickness", "gap")}
+    if unknown:
+        raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+    if missing:
+        raise ValueError(f"no value for {', '.join(missing)}; give it with --set")
+
+    def z(name):
+        part = parts[name]
+        if "z" not in part:
+            below = parts[part["on"]] if part["on"] else None
+            part["z"] = z(below["name"]) + below["thickness"] + part["gap"] if below else part["gap"]
+        return part["z"]
+
+    for part in parts.values():
+        if "span" in part:
+            low, high = (parts[name] for name in part["span"])
+            part["z"] = z(low["name"])
+            part["thickness"] = z(high["name"]) + high["thickness"] - part["z"]
+        else:
+            z(part["name"])
+    return list(parts.values())
+
+
+def _setting(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PART.KEY=MM, got {text!r}")
+
+
+def outline(part):
+    """edgecuts.py records for part."""
+    if "golden" in part:
+        with open(TOOLS / "golden" / VARIANT / f"{part['golden']}.json") as f:
+            shapes = json.load(f)["shapes"]
+        layers = set(part["layers"])
+        return [edgecuts.record(pcbfile.Shape(s["kind"], s["layer"], s["points"], s["width"], ""))
+                for s in shapes if s["layer"] in layers]
+    return edgecuts.export(HERE / part["board"], part["layers"])
+
+
+def build_part(part):
+    """Extrude part into BUILD_DIR/<name>.brep; return a summary dict."""
+    started = time.perf_counter()
+    loops, open_chains = wires.chain(outline(part))
+    if open_chains and not part.get("helper"):
+        return {"name": part["name"], "error": f"{len(open_chains)} open outlines"}
+    faces = [Face(make_wire(o), [make_wire(h) for h in holes]) for o, holes in wires.nest(loops)]
+    if not faces:
+        return {"name": part["name"], "error": "no closed outline"}
+    with BuildSketch() as sketch:
+        add(faces)
+    solid = Pos(0, 0, part["z"]) * extrude(sketch.sketch, amount=part["thickness"])
+    path = BUILD_DIR / f"{part['name']}.brep"
+    export_brep(solid, str(path))
+    box = solid.bounding_box()
+    return {"name": part["name"], "path": str(path), "faces": len(faces), "open": len(open_chains),
+            "volume": solid.volume, "box": [box.min.X, box.min.Y, box.min.Z, box.max.X, box.max.Y, box.max.Z],
+            "seconds": time.perf_counter() - started}
+
+
+def _apart(a, b, margin):
+    return any(a[i] > b[i + 3] + margin or b[i] > a[i + 3] + margin for i in range(3))
+
+
+def _volume(shape):
+    """Volume of an intersect() result: None, a shape or (build123d >= 0.10) a ShapeList."""
+    if shape is None:
+        return 0.0
+    if isinstance(shape, ShapeList):
+        return sum(s.volume for s in shape)
+    return shape.volume
+
+
+def check_pair(job):
+    a, b, clearance = job
+    if _apart(a["box"], b["box"], clearance):
+        return None
+    first, second = import_brep(a["path"]), import_brep(b["path"])
+    volume = _volume(first.intersect(second))
+    if volume > 1e-3:
+        return (a["name"], b["name"], "interference", volume)
+    gap = first.distance_to(second)
+    if gap < 1e-6:
+        return (a["name"], b["name"], "contact", 0.0)
+    if gap < clearance:
+        return (a["name"], b["name"], "tight", gap)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel processes")
+    parser.add_argument("--clearance", type=float, default=0.2, help="minimum gap in mm")
+    parser.add_argument("--set", type=_setting, action="append", default=[], metavar="PART.KEY=MM",
+                        help="thickness or gap of a part, e.g. pcb.gap=2.0 (repeatable)")
+    parser.add_argument("-o", "--output", default="assembly.step")
+    args = parser.parse_args()
+    try:
+        stack = resolve(STACK, dict(args.set))
+    except ValueError as e:
+        print(f"assemble.py: {e}", file=sys.stderr)
+        return 2
+
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.jobs) as pool:
+        parts = list(pool.map(build_part, stack))
+        failed = [p for p in parts if "error" in p]
+        for p in failed:
+            print(f"{p['name']:<18} ERROR {p['error']}")
+        built = {p["name"]: p for p in parts if "error" not in p}
+        for p in built.values():
+            skipped = f"  ({p['open']} open outlines skipped)" if p["open"] else ""
+            print(f"{p['name']:<18} {p['faces']:>3} faces {p['volume']:>12.1f} mm3 {p['seconds']:>6.2f}s{skipped}")
+
+        board_of = {part["name"]: part.get("board", part.get("golden")) for part in stack}
+        checked = [part["name"] for part in stack if not part.get("helper") and part["name"] in built]
+        pairs = [(built[a], built[b], args.clearance) for a, b in combinations(checked, 2)
+                 if board_of[a] != board_of[b]]
+        findings = [r for r in pool.map(check_pair, pairs) if r]
+
+    for a, b, kind, value in findings:
+        detail = f"{value:.3f} mm3" if kind == "interference" else f"{value:.3f} mm" if kind == "tight" else ""
+        print(f"{kind:<12} {a} / {b} {detail}")
+    print(f"{len(pairs)} pairs checked")
+
+    export_step(Compound([import_brep(p["path"]) for p in built.values()]), args.output)
+    print(f"{args.output}: {len(built)} parts in {time.perf_counter() - started:.1f}s")
+    return 1 if failed or any(kind in ("interference", "tight") for _, _, kind, _ in findings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
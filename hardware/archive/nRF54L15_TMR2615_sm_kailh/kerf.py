@@ -1,33 +1,133 @@
+#!/usr/bin/env python3
+
 # in laser cutting kerf is the thickness of the material the laser vaporizes. A
 # laser beam usually has a width of about 0.1mm to 0.2mm. To make a part larger
 # (so it fits tightly in a slot), you offset it outwards by half the kerf. To
 # make a hole smaller, you offset it inwards.
 
+"""Write a kerf-compensated DXF for every laser-cut part.
+
+    ./kerf.py                        # kerf 0.2 mm, every part, into kerf/
+    ./kerf.py --kerf 0.15 botcover swplate
+
+The parts are the non-helper STACK entries of assemble.py, minus the pcb
+(fabricated, not cut). Each part's faces, outlines with their holes, are
+offset by half the kerf with rounded corners: growing a face moves its
+outer profile outward and its holes (hexagon mesh, rivet and screw holes)
+inward, as the beam path must. Holes include the non-plated drills
+(rivets, screws, dowels) that edgecuts.py exports. Like cutorder.py and
+sheetnest.py, the DXF has Y up, the board mirrored about the X axis.
+
+Parts run in a process pool. Every DXF is cached under .cache/kerf/ by the
+hash of the part's outline and the kerf, so an unchanged part is copied,
+not recomputed.
+
+Run in a virtual env where build123d is installed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 from build123d import *
-from ocp_vscode import show
-
-kerf = 0.2
-offset_amount = kerf / 2
-
-with BuildSketch() as laser_part:
-    # Create geometry with the Bezier
-    with BuildLine() as outline:
-        l1 = Line((0, 0), (0, 10))
-        # Your Cubic Bezier (2 points, 2 control points)
-        l2 = Bezier(l1.end, (5, 15), (15, 5), (20, 10))
-        l3 = Line(l2.end, (20, 0))
-        l4 = Line(l3.end, l1.start)
-    make_face()
-
-    # APPLY THE OFFSET
-    # amount > 0 grows the part (External parts)
-    # amount < 0 shrinks the part (Internal holes)
-    offset(amount=offset_amount, kind=Kind.TANGENT)
-    # kind=Kind.TANGENT ensures the offset follows the Bezier path smoothly.
-    # Kind.ARC is also a good option if you want rounded corners on sharp
-    # joints.
-
-# Export the offset version for the laser
-laser_part.sketch.export_dxf("precise_part.dxf")
-
-show(laser_part)
+
+from assemble import STACK, TOOLS, outline
+from rebuild_board import make_wire
+import wires
+
+CACHE_DIR = TOOLS / ".cache" / "kerf"
+KERF_VERSION = 2
+
+PARTS = [part for part in STACK if not part.get("helper") and part["name"] != "pcb"]
+
+
+_POINT_KEYS = ("start", "mid", "end", "center", "p0", "p1", "p2", "p3")
+
+
+def flip_y(records):
+    """records with Y negated: KiCad's Y down to the DXF's Y up."""
+    flipped = []
+    for record in records:
+        record = dict(record)
+        for key in _POINT_KEYS:
+            if key in record:
+                record[key] = [record[key][0], -record[key][1]]
+        if "outlines" in record:
+            record["outlines"] = [[[x, -y] for x, y in points] for points in record["outlines"]]
+        flipped.append(record)
+    return flipped
+
+
+def outline_key(records, kerf):
+    h = hashlib.sha256(f"{KERF_VERSION}\n{kerf!r}\n".encode())
+    h.update(json.dumps(records, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def compensate(records, kerf):
+    """Return the kerf-offset wires of the closed outlines in records."""
+    loops, open_chains = wires.chain(records)
+    if open_chains:
+        raise ValueError(f"{len(open_chains)} open outlines")
+    result = []
+    for outer, holes in wires.nest(loops):
+        face = Face(make_wire(outer), [make_wire(h) for h in holes])
+        result += offset(face, amount=kerf / 2, kind=Kind.ARC).wires()
+    return result
+
+
+def kerf_part(job):
+    part, kerf, output = job
+    started = time.perf_counter()
+    records = flip_y(outline(part))
+    cached = CACHE_DIR / f"{outline_key(records, kerf)}.dxf"
+    hit = cached.exists()
+    try:
+        if not hit:
+            exporter = ExportDXF(unit=Unit.MM)
+            exporter.add_layer("Cut")
+            exporter.add_shape(compensate(records, kerf), layer="Cut")
+            tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+            exporter.write(str(tmp))
+            os.replace(tmp, cached)
+        shutil.copyfile(cached, output)
+    except Exception as e:
+        return part["name"], f"ERROR {type(e).__name__}: {e}"
+    return part["name"], f"{output} {time.perf_counter() - started:6.2f}s{' cached' if hit else ''}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", help="part names (default: all)")
+    parser.add_argument("--kerf", type=float, default=0.2, help="beam width in mm")
+    parser.add_argument("-o", "--output", type=Path, default=Path("kerf"), help="output directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel processes")
+    args = parser.parse_args()
+
+    parts = [p for p in PARTS if not args.parts or p["name"] in args.parts]
+    unknown = set(args.parts) - {p["name"] for p in parts}
+    if unknown:
+        parser.error(f"unknown parts: {', '.join(sorted(unknown))}")
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    args.output.mkdir(parents=True, exist_ok=True)
+    jobs = [(p, args.kerf, args.output / f"{p['name']}_kerf{args.kerf:g}.dxf") for p in parts]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.jobs) as pool:
+        results = list(pool.map(kerf_part, jobs))
+    for name, message in results:
+        print(f"{name:<12} {message}")
+    print(f"{len(results)} parts in {time.perf_counter() - started:.1f}s")
+    return 1 if any(message.startswith("ERROR") for _, message in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
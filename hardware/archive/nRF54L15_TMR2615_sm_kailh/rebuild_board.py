@@ -2,18 +2,50 @@
 
 import sys
 import json
+from pathlib import Path
 from build123d import *
 from math import atan2, degrees
 
+# Endpoint chaining and loop nesting live with the other offline board tools.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
+import wires
+
 
 def arc_from_3pts(p1, p2, p3):
-    return ThreePointArc(
+    return Edge.make_three_point_arc(
         Vector(*p1),
         Vector(*p2),
         Vector(*p3)
     )
 
 
+def make_edge(s):
+    if s["type"] == "line":
+        return Edge.make_line(Vector(*s["start"]), Vector(*s["end"]))
+    if s["type"] == "arc":
+        return arc_from_3pts(s["start"], s["mid"], s["end"])
+    return Edge.make_bezier(
+        Vector(*s["p0"]),
+        Vector(*s["p1"]),
+        Vector(*s["p2"]),
+        Vector(*s["p3"])
+    )
+
+
+def make_wire(loop):
+    """One closed wire from a wires.chain() loop."""
+    s = loop[0]
+    if s["type"] == "circle":
+        return Pos(*s["center"]) * Wire.make_circle(s["radius"])
+    if s["type"] == "rectangle":
+        (x1, y1), (x2, y2) = s["start"], s["end"]
+        return Wire.make_polygon(
+            [Vector(x1, y1), Vector(x2, y1), Vector(x2, y2), Vector(x1, y2)], close=True)
+    if s["type"] == "polygon":
+        return Wire.make_polygon([Vector(*p) for p in s["outlines"][0]], close=True)
+    return Wire([make_edge(e) for e in loop])
+
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: rebuild_board.py <edge_cuts.json>")
@@ -24,53 +56,21 @@ def main():
     with open(json_path) as f:
         shapes = json.load(f)
 
-    with BuildSketch() as sketch:
+    # Loose edges do not reliably close into faces inside BuildSketch, so
+    # chain them into loops first and build every face with its holes.
+    loops, open_chains = wires.chain(shapes)
+    if open_chains:
+        for chain in open_chains:
+            print(f"Open outline of {len(chain)} edges starting at {chain[0]}")
+        sys.exit(1)
 
-        for s in shapes:
-
-            if s["type"] == "line":
-                Line(
-                    Vector(*s["start"]),
-                    Vector(*s["end"])
-                )
-
-            elif s["type"] == "arc":
-                arc_from_3pts(
-                    s["start"],
-                    s["mid"],
-                    s["end"]
-                )
-
-            elif s["type"] == "circle":
-                Circle(
-                    radius=s["radius"],
-                    mode=Mode.ADD
-                ).locate(Location(Vector(*s["center"])))
-
-            elif s["type"] == "rectangle":
-                x1, y1 = s["start"]
-                x2, y2 = s["end"]
-                Rectangle(
-                    abs(x2 - x1),
-                    abs(y2 - y1)
-                ).locate(
-                    Location(
-                        Vector((x1 + x2)/2, (y1 + y2)/2)
-                    )
-                )
-
-            elif s["type"] == "bezier":
-                Bezier(
-                    Vector(*s["p0"]),
-                    Vector(*s["p1"]),
-                    Vector(*s["p2"]),
-                    Vector(*s["p3"])
-                )
-
-            elif s["type"] == "polygon":
-                for outline in s["outlines"]:
-                    pts = [Vector(*p) for p in outline]
-                    Polygon(*pts)
+    faces = [
+        Face(make_wire(outline), [make_wire(hole) for hole in holes])
+        for outline, holes in wires.nest(loops)
+    ]
+
+    with BuildSketch() as sketch:
+        add(faces)
 
     # Extrude board 1.6mm (standard PCB thickness)
     board = extrude(sketch.sketch, amount=1.6)
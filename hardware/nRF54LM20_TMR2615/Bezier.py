@@ -1,26 +1,43 @@
 # Fusion 360 Python script
-# Imports cubic Bezier control points exported from KiCad.
+# Imports the lines, arcs and cubic Beziers exported from KiCad by border.py.
 #
-# CSV format: one cubic Bezier per line:
-#   x0,y0,x1,y1,x2,y2,x3,y3
+# Curve file (.kcrv) format, little-endian, see layout_tools/curvefile.py:
+#   80-byte header: b"KCRV", version, header size, line/arc/Bezier counts,
+#                   units, layer, project
+#   int64 arrays:   lines   x0,y0,x1,y1
+#                   arcs    x0,y0,x1,y1,x2,y2         (start, mid, end)
+#                   beziers x0,y0,x1,y1,x2,y2,x3,y3
 #
-# KiCad board internal coordinates are nanometers.
-# Fusion 360 API geometry uses centimeters, so:
+# The arrays are mapped with numpy.memmap when numpy is importable, else read
+# with the array module. Coordinates are in the header's units (KiCad's
+# nanometers). Fusion 360 API geometry uses centimeters, so:
 #   cm = nm / 10,000,000
 #
-# Each CSV row is created as its own degree-3 control-point spline.
-# The four imported control points are fixed by default. This preserves the
+# Chains of tangent-continuous Beziers become one fixed NURBS spline each
+# (MERGE_C1_CHAINS). Any other Bezier is created as its own degree-3
+# control-point spline. The four imported control points are fixed by default. This preserves the
 # exact imported Bezier geometry while allowing new lines to be constrained
 # coincident to the spline endpoints to close profiles.
+#
+# With BATCH_IMPORT the sketch is not recomputed until the last curve is in,
+# and curves that meet share one SketchPoint. ../tools/fakeadsk.py runs this
+# script offline and counts the API calls.
 
 import adsk.core
 import adsk.fusion
+import os
+import struct
+import sys
 import traceback
-import csv
+from array import array
 
 
 KICAD_NM_TO_FUSION_CM = 1.0 / 10_000_000.0
 
+CURVE_MAGIC = b'KCRV'
+CURVE_VERSION = 1
+CURVE_HEADER = struct.Struct('<4sHHIII8s16s32s4x')
+
 # Change to True only if you specifically want KiCad Y mirrored in Fusion.
 INVERT_Y = True
 
@@ -32,6 +49,21 @@ SKETCH_NAME = 'KiCad Bezier Import'
 # endpoint).
 FIX_CONTROL_POINTS = True
 
+# Batch import: defer sketch computation until every curve is added, and give
+# curves meeting at the same KiCad coordinate one shared SketchPoint, so
+# consecutive curves are coincident and each point is created and fixed once.
+# False creates every curve on its own points, recomputing after each call.
+BATCH_IMPORT = True
+
+# Import each chain of Beziers that meet end to start with the same tangent
+# direction (C1, as draw_border_bezier joins them) as one fixed NURBS spline
+# with a knot of multiplicity 3 at every join: one exact sketch entity per
+# chain, with nothing for the solver to constrain. Single Beziers stay
+# control-point splines. TANGENT_TOLERANCE is the sine of the largest angle
+# between tangents still treated as continuous.
+MERGE_C1_CHAINS = True
+TANGENT_TOLERANCE = 1e-6
+
 
 def nm_to_cm(value):
     return float(value) * KICAD_NM_TO_FUSION_CM
@@ -45,70 +77,212 @@ def make_point(x_nm, y_nm):
     return adsk.core.Point3D.create(x, y, 0.0)
 
 
-def run(context):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
+def read_curves(path):
+    """Return (layer, project, lines, arcs, beziers) from a .kcrv file.
+
+    Rows are sequences of 4, 6 and 8 integer coordinates in nanometers.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(CURVE_HEADER.size)
+    if len(head) < CURVE_HEADER.size:
+        raise ValueError('File too short for a curve header.')
+    magic, version, size, n_lines, n_arcs, n_beziers, units, layer, project = \
+        CURVE_HEADER.unpack(head)
+    if magic != CURVE_MAGIC:
+        raise ValueError('Not a KiCad curve file (.kcrv).')
+    if version != CURVE_VERSION:
+        raise ValueError(f'Unsupported curve file version {version}.')
+    units = units.rstrip(b'\0').decode('ascii')
+    if units != 'nm':
+        raise ValueError(f'Unsupported units {units!r}.')
+    counts = ((n_lines, 4), (n_arcs, 6), (n_beziers, 8))
+    total = sum(n * width for n, width in counts)
+    if os.path.getsize(path) != size + 8 * total:
+        raise ValueError('Curve file size does not match its header.')
 
     try:
-        design = adsk.fusion.Design.cast(app.activeProduct)
-        if not design:
-            ui.messageBox('Open a Fusion Design before running this script.')
-            return
-
-        dlg = ui.createFileDialog()
-        dlg.title = 'Select KiCad cubic Bezier CSV'
-        dlg.filter = 'CSV files (*.csv);;All files (*.*)'
-
-        if dlg.showOpen() != adsk.core.DialogResults.DialogOK:
-            return
-
-        csv_path = dlg.filename
-        bezier_rows = []
-
-        with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-
-            for line_num, row in enumerate(reader, start=1):
-                if not row or all(not cell.strip() for cell in row):
-                    continue
-
-                if len(row) != 8:
-                    raise ValueError(
-                        f'Line {line_num}: expected 8 values '
-                        f'(x0,y0,x1,y1,x2,y2,x3,y3), got {len(row)}.'
-                    )
-
-                try:
-                    values = [float(cell.strip()) for cell in row]
-                except ValueError:
-                    raise ValueError(
-                        f'Line {line_num}: all 8 fields must be numeric.'
-                    )
-
-                bezier_rows.append(values)
-
-        if not bezier_rows:
-            ui.messageBox('The selected CSV contains no Bezier rows.')
-            return
-
-        root = design.rootComponent
-        sketch = root.sketches.add(root.xYConstructionPlane)
-        sketch.name = SKETCH_NAME
-
-        splines = sketch.sketchCurves.sketchControlPointSplines
-        degree3 = adsk.fusion.SplineDegrees.SplineDegreeThree
-
+        import numpy
+        values = (numpy.memmap(path, dtype='<i8', mode='r', offset=size)
+                  if total else numpy.zeros(0, dtype='<i8'))
+    except ImportError:
+        values = array('q')
+        with open(path, 'rb') as f:
+            f.seek(size)
+            values.frombytes(f.read())
+        if sys.byteorder != 'little':
+            values.byteswap()
+
+    tables = []
+    start = 0
+    for n, width in counts:
+        tables.append([values[start + i * width:start + (i + 1) * width] for i in range(n)])
+        start += n * width
+    return (layer.rstrip(b'\0').decode('utf-8'), project.rstrip(b'\0').decode('utf-8'),
+            *tables)
+
+
+class SharedPoints:
+    """One SketchPoint per imported KiCad coordinate, created on first use."""
+
+    def __init__(self, sketch, share=True):
+        self.sketch = sketch
+        self.share = share
+        self.points = {}
+
+    def get(self, x_nm, y_nm):
+        """Return the shared SketchPoint at (x_nm, y_nm), or a new Point3D."""
+        point = self.points.get((int(x_nm), int(y_nm))) if self.share else None
+        return point if point is not None else make_point(x_nm, y_nm)
+
+    def add(self, x_nm, y_nm):
+        """Return a SketchPoint at (x_nm, y_nm), shared if one exists."""
+        key = (int(x_nm), int(y_nm))
+        point = self.points.get(key) if self.share else None
+        if point is None:
+            point = self.sketch.sketchPoints.add(make_point(x_nm, y_nm))
+            if self.share:
+                self.points[key] = point
+        return point
+
+    def keep(self, x_nm, y_nm, sketch_point):
+        """Remember the SketchPoint a curve ended up with at (x_nm, y_nm).
+
+        Return the point already shared there, if it is a different one.
+        """
+        if self.share:
+            shared = self.points.setdefault((int(x_nm), int(y_nm)), sketch_point)
+            if shared is not sketch_point:
+                return shared
+        return None
+
+
+def c1_successors(beziers):
+    """Return next, where next[i] is the Bezier continuing i C1, or -1.
+
+    A join needs exactly one Bezier ending and one starting at the same
+    point, with tangents in the same direction. The tangent test runs on
+    all candidate joins at once with numpy when it is importable.
+    """
+    starts, ends = {}, {}
+    for i, row in enumerate(beziers):
+        starts.setdefault((int(row[0]), int(row[1])), []).append(i)
+        ends.setdefault((int(row[6]), int(row[7])), []).append(i)
+    pairs = [(i[0], starts[key][0]) for key, i in ends.items()
+             if len(i) == 1 and len(starts.get(key, ())) == 1 and starts[key][0] != i[0]]
+
+    successors = [-1] * len(beziers)
+    if not pairs:
+        return successors
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        rows = numpy.asarray(beziers, dtype=float).reshape(-1, 8)
+        index = numpy.asarray(pairs)
+        a, b = rows[index[:, 0]], rows[index[:, 1]]
+        t1 = a[:, 6:8] - a[:, 4:6]  # end tangent of the first
+        t2 = b[:, 2:4] - b[:, 0:2]  # start tangent of the second
+        cross = t1[:, 0] * t2[:, 1] - t1[:, 1] * t2[:, 0]
+        dot = (t1 * t2).sum(axis=1)
+        norms = numpy.hypot(t1[:, 0], t1[:, 1]) * numpy.hypot(t2[:, 0], t2[:, 1])
+        smooth = (norms > 0) & (numpy.abs(cross) <= TANGENT_TOLERANCE * norms) & (dot > 0)
+        for (i, j), ok in zip(pairs, smooth.tolist()):
+            if ok:
+                successors[i] = j
+        return successors
+    for i, j in pairs:
+        a, b = beziers[i], beziers[j]
+        t1 = (a[6] - a[4], a[7] - a[5])
+        t2 = (b[2] - b[0], b[3] - b[1])
+        cross = t1[0] * t2[1] - t1[1] * t2[0]
+        dot = t1[0] * t2[0] + t1[1] * t2[1]
+        norms = (t1[0] ** 2 + t1[1] ** 2) ** 0.5 * (t2[0] ** 2 + t2[1] ** 2) ** 0.5
+        if norms > 0 and abs(cross) <= TANGENT_TOLERANCE * norms and dot > 0:
+            successors[i] = j
+    return successors
+
+
+def c1_chains(beziers):
+    """Group Bezier indices into C1 chains, in order along each chain."""
+    successors = c1_successors(beziers)
+    has_predecessor = set(j for j in successors if j >= 0)
+    seen = set()
+    chains = []
+    # Open chains start where nothing leads in; what is left are closed loops.
+    for first in [i for i in range(len(beziers)) if i not in has_predecessor] + list(range(len(beziers))):
+        if first in seen:
+            continue
+        chain = []
+        i = first
+        while i >= 0 and i not in seen:
+            seen.add(i)
+            chain.append(i)
+            i = successors[i]
+        chains.append(chain)
+    chains.sort(key=lambda chain: min(chain))
+    return chains
+
+
+def chain_nurbs(beziers, chain):
+    """A non-rational cubic NURBS curve through the Beziers of chain, exactly."""
+    values = [beziers[chain[0]][0:2]]
+    for i in chain:
+        row = beziers[i]
+        values += [row[2:4], row[4:6], row[6:8]]
+    control_points = [make_point(x, y) for x, y in values]
+    spans = len(chain)
+    knots = [0.0] * 4 + [float(k) for k in range(1, spans) for _ in range(3)] + [float(spans)] * 4
+    return adsk.core.NurbsCurve3D.createNonRational(control_points, 3, knots, False)
+
+
+def fix(point, fixed):
+    """Fix point unless this import already did; count it in fixed."""
+    if FIX_CONTROL_POINTS and not point.isFixed:
+        point.isFixed = True
+        fixed[0] += 1
+
+
+def import_curves(sketch, lines, arcs, beziers, batch=BATCH_IMPORT, merge=MERGE_C1_CHAINS):
+    """Add the curves to sketch; return (Bezier count, spline count, fixed point count)."""
+    points = SharedPoints(sketch, share=batch)
+    fixed = [0]
+    lines_api = sketch.sketchCurves.sketchLines
+    arcs_api = sketch.sketchCurves.sketchArcs
+    splines = sketch.sketchCurves.sketchControlPointSplines
+    fixed_splines = sketch.sketchCurves.sketchFixedSplines
+    degree3 = adsk.fusion.SplineDegrees.SplineDegreeThree
+
+    if batch:
+        sketch.isComputeDeferred = True
+    try:
+        # Merged chains go first: a fixed spline comes with its own end
+        # points, which everything drawn later then shares. Where two chains
+        # meet, their ends are joined by a coincident constraint.
+        chains = c1_chains(beziers) if merge else [[i] for i in range(len(beziers))]
         created = 0
-        fixed_points = 0
+        for chain in [chain for chain in chains if len(chain) > 1]:
+            first, last = beziers[chain[0]], beziers[chain[-1]]
+            spline = fixed_splines.addByNurbsCurve(chain_nurbs(beziers, chain))
+            if not spline:
+                raise RuntimeError(
+                    f'Fusion failed to create the spline of Bezier chain {created + 1}.'
+                )
+            for x, y, point in ((first[0], first[1], spline.startSketchPoint),
+                                (last[6], last[7], spline.endSketchPoint)):
+                shared = points.keep(x, y, point)
+                if shared is not None:
+                    sketch.geometricConstraints.addCoincident(point, shared)
+            created += len(chain)
 
-        for values in bezier_rows:
-            x0, y0, x1, y1, x2, y2, x3, y3 = values
+        for chain in [chain for chain in chains if len(chain) == 1]:
+            x0, y0, x1, y1, x2, y2, x3, y3 = beziers[chain[0]]
 
             control_points = [
-                sketch.sketchPoints.add(make_point(x0, y0)),
+                points.add(x0, y0),
                 sketch.sketchPoints.add(make_point(x1, y1)),
                 sketch.sketchPoints.add(make_point(x2, y2)),
-                sketch.sketchPoints.add(make_point(x3, y3)),
+                points.add(x3, y3),
             ]
 
             # SketchControlPointSplines.add expects a normal Python list of
@@ -120,27 +294,81 @@ def run(context):
                     f'Fusion failed to create Bezier segment {created + 1}.'
                 )
 
+            # Use the spline-owned control points after creation. These are
+            # the authoritative points that drive the control frame.
+            owned = spline.controlPoints
+            points.keep(x0, y0, owned[0])
+            points.keep(x3, y3, owned[-1])
             if FIX_CONTROL_POINTS:
-                # Use the spline-owned control points after creation. These are
-                # the authoritative points that drive the control frame.
                 spline.isControlFrameDisplayed = True
-                for point in spline.controlPoints:
-                    point.isFixed = True
-                    fixed_points += 1
+                for point in owned:
+                    fix(point, fixed)
 
             created += 1
 
+        for x0, y0, x1, y1 in lines:
+            line = lines_api.addByTwoPoints(points.get(x0, y0), points.get(x1, y1))
+            for x, y, point in ((x0, y0, line.startSketchPoint), (x1, y1, line.endSketchPoint)):
+                points.keep(x, y, point)
+                fix(point, fixed)
+
+        for x0, y0, x1, y1, x2, y2 in arcs:
+            arc = arcs_api.addByThreePoints(
+                points.get(x0, y0), make_point(x1, y1), points.get(x2, y2))
+            for x, y, point in ((x0, y0, arc.startSketchPoint), (x2, y2, arc.endSketchPoint)):
+                points.keep(x, y, point)
+                fix(point, fixed)
+    finally:
+        if batch:
+            sketch.isComputeDeferred = False
+    return created, len(chains), fixed[0]
+
+
+def run(context):
+    app = adsk.core.Application.get()
+    ui = app.userInterface
+
+    try:
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        if not design:
+            ui.messageBox('Open a Fusion Design before running this script.')
+            return
+
+        dlg = ui.createFileDialog()
+        dlg.title = 'Select KiCad curve file'
+        dlg.filter = 'KiCad curves (*.kcrv);;All files (*.*)'
+
+        if dlg.showOpen() != adsk.core.DialogResults.DialogOK:
+            return
+
+        layer, project, lines, arcs, beziers = read_curves(dlg.filename)
+
+        if not (lines or arcs or beziers):
+            ui.messageBox('The selected file contains no curves.')
+            return
+
+        root = design.rootComponent
+        sketch = root.sketches.add(root.xYConstructionPlane)
+        sketch.name = f'{SKETCH_NAME} {project} {layer}'
+
+        created, spline_count, fixed_points = import_curves(
+            sketch, lines, arcs, beziers, BATCH_IMPORT, MERGE_C1_CHAINS)
+
         constraint_note = (
-            f' Fixed {fixed_points} control points at their imported coordinates.'
+            f' Fixed {fixed_points} points at their imported coordinates.'
             if FIX_CONTROL_POINTS else
             ' Control points were left unconstrained.'
         )
 
         ui.messageBox(
-            f'Imported {created} cubic Bezier segments into sketch '
-            f'"{SKETCH_NAME}".{constraint_note}\n\n'
-            'You can close profiles with sketch lines and apply Coincident '
-            'constraints between each line endpoint and spline endpoint.'
+            f'Imported {len(lines)} lines, {len(arcs)} arcs and {created} '
+            f'cubic Bezier segments as {spline_count} splines into sketch '
+            f'"{sketch.name}".'
+            f'{constraint_note}\n\n' + (
+                'Curves meeting at the same point share one sketch point.'
+                if BATCH_IMPORT else
+                'Apply Coincident constraints between curve endpoints to '
+                'close profiles.')
         )
 
     except Exception:
@@ -0,0 +1,189 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# KiCad Python script to report trace RC and ADC settling time per mux channel
+#
+# To run as script in python console,
+#   place or symplink this script to ~/Documents/KiCad/6.0/scripting/plugins
+#   Run from python console using 'import filename'
+#   To reapply:
+#     import importlib
+#     importlib.reload(filename)
+#  OR
+#    exec(open("path-to-script-file").read())
+
+# firmware/src/mux_adc.c waits MUX_SETTLE_US after every set_mux_address()
+# before sampling. This script walks the routed tracks of every TMR{i} ->
+# MUXB{k} sensor net and of each mux common (D) net to the MCU, estimates
+# their resistance and capacitance, and reports the worst settling time for
+# each mux address so the firmware delay can be set from the layout.
+#
+# Lumped model per channel:
+#   tau = (R_sensor + R_trace + R_on + R_common) *
+#         (C_trace + C_vias + C_mux_s + C_mux_d + C_common + C_adc)
+#   settle = tau * ln(2^(ADC_RESOLUTION + 1))   (to 1/2 LSB)
+# Cvout at the sensor output is ignored, which keeps the estimate pessimistic.
+
+import pcbnew
+import csv
+import math
+import os
+import re
+
+SWITCH_COUNT = 72
+MUX_COUNT = 8
+REPORT_FILE = "analog_rc.csv"
+
+ADC_RESOLUTION = 12
+
+# Copper and stackup
+COPPER_RESISTIVITY = 1.72e-8  # ohm * m at 20 C
+COPPER_THICKNESS_MM = 0.035   # 1 oz
+DIELECTRIC_CONSTANT = 4.5     # FR-4
+VIA_CAPACITANCE_PF = 0.5
+
+# Component estimates; see hardware/resources and the mux datasheet.
+SENSOR_OUTPUT_OHM = 1000.0    # TMR2615 output, not specified in its datasheet
+MUX_ON_RESISTANCE_OHM = 200.0  # worst case at the low end of the supply range
+MUX_SOURCE_PF = 5.0
+MUX_DRAIN_PF = 25.0
+ADC_INPUT_PF = 2.5            # SAADC sample and hold capacitor
+MUX_TRANSITION_US = 0.5       # address change to switch closed
+
+# TMUX1208RSV (UQFN-16) pinout: pad number -> channel (S1..S8 are addresses
+# 0..7) and the common drain D. Used when a pad has no pin function.
+PIN_CHANNEL = {"2": 0, "3": 1, "4": 2, "5": 3, "10": 4, "9": 5, "8": 6, "7": 7}
+PIN_COMMON = "6"
+COMMON_FUNCTION = "D"
+
+board = pcbnew.GetBoard()
+
+
+def get_file_path():
+    board_path = board.GetFileName()
+    if board_path:
+        project_dir = os.path.dirname(board_path)
+    else:
+        project_dir = os.getenv("KIPRJMOD", ".")
+    return os.path.join(project_dir, REPORT_FILE)
+
+
+def mux_channel(pad):
+    """Return the mux address (0-7) selecting pad, or None for non-channel pads."""
+    function = pad.GetPinFunction()
+    if not function:
+        return PIN_CHANNEL.get(pad.GetNumber())
+    match = re.fullmatch(r"([SYXsyx])(\d)", function)
+    if not match:
+        return None
+    # The TMUX1208 numbers its inputs S1..S8; 4051-style parts X0..X7, Y0..Y7.
+    address = int(match.group(2)) - (match.group(1) in "Ss")
+    return address if 0 <= address < 8 else None
+
+
+def is_common(pad):
+    """True for the mux drain D, the pad every selected input connects to."""
+    function = pad.GetPinFunction()
+    if not function:
+        return pad.GetNumber() == PIN_COMMON
+    return function.upper() == COMMON_FUNCTION
+
+
+def capacitance_per_mm_pf(width_mm, height_mm):
+    """Microstrip capacitance per unit length (IPC-2141)."""
+    per_inch = 0.67 * (DIELECTRIC_CONSTANT + 1.41) / \
+        math.log(5.98 * height_mm / (0.8 * width_mm + COPPER_THICKNESS_MM))
+    return per_inch / 25.4
+
+
+def tracks_by_net():
+    """Group all tracks and vias by net name in a single pass over the board."""
+    nets = {}
+    for item in board.GetTracks():
+        nets.setdefault(item.GetNetname(), []).append(item)
+    return nets
+
+
+def net_rc(items, height_mm):
+    """Return (length_mm, resistance_ohm, capacitance_pf, via_count) of a net."""
+    length = resistance = capacitance = 0.0
+    vias = 0
+    for item in items:
+        if isinstance(item, pcbnew.PCB_VIA):
+            vias += 1
+            continue
+        length_mm = pcbnew.ToMM(item.GetLength())
+        width_mm = pcbnew.ToMM(item.GetWidth())
+        length += length_mm
+        resistance += COPPER_RESISTIVITY * (length_mm * 1e-3) / \
+            (width_mm * 1e-3 * COPPER_THICKNESS_MM * 1e-3)
+        capacitance += length_mm * capacitance_per_mm_pf(width_mm, height_mm)
+    capacitance += vias * VIA_CAPACITANCE_PF
+    return length, resistance, capacitance, vias
+
+
+def sensor_channels():
+    """Yield (tmr_ref, mux_ref, address, sensor_net, common_net)."""
+    tmr_by_net = {}
+    for i in range(1, SWITCH_COUNT + 1):
+        tmr = board.FindFootprintByReference(f"TMR{i}")
+        if tmr:
+            for pad in tmr.Pads():
+                tmr_by_net.setdefault(pad.GetNetname(), []).append(f"TMR{i}")
+
+    for k in range(1, MUX_COUNT + 1):
+        mux = board.FindFootprintByReference(f"MUXB{k}")
+        if not mux:
+            continue
+        pads = list(mux.Pads())
+        common = next((p.GetNetname() for p in pads if is_common(p)), "")
+        for pad in pads:
+            address = mux_channel(pad)
+            sensors = tmr_by_net.get(pad.GetNetname(), [])
+            # Power nets reach every sensor; a sensor output reaches exactly one.
+            if address is not None and len(sensors) == 1:
+                yield sensors[0], f"MUXB{k}", address, pad.GetNetname(), common
+
+
+def report():
+    height_mm = pcbnew.ToMM(board.GetDesignSettings().GetBoardThickness())
+    nets = tracks_by_net()
+    rows = []
+    for tmr, mux, address, net, common in sensor_channels():
+        length, r_trace, c_trace, vias = net_rc(nets.get(net, []), height_mm)
+        _, r_common, c_common, _ = net_rc(nets.get(common, []), height_mm)
+        resistance = SENSOR_OUTPUT_OHM + r_trace + MUX_ON_RESISTANCE_OHM + r_common
+        capacitance = c_trace + MUX_SOURCE_PF + MUX_DRAIN_PF + c_common + ADC_INPUT_PF
+        tau_us = resistance * capacitance * 1e-6
+        settle_us = MUX_TRANSITION_US + tau_us * math.log(2 ** (ADC_RESOLUTION + 1))
+        rows.append([tmr, mux, address, net, round(length, 2), vias,
+                     round(r_trace, 3), round(c_trace, 2), round(tau_us, 4), round(settle_us, 3)])
+
+    if not rows:
+        print("No TMR -> MUXB sensor nets found.")
+        return
+
+    file_path = get_file_path()
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sensor", "mux", "address", "net", "length_mm", "vias",
+                         "r_trace_ohm", "c_trace_pf", "tau_us", "settle_us"])
+        writer.writerows(sorted(rows, key=lambda r: (r[2], r[1])))
+
+    print(f"Routed length, RC and settling time for {len(rows)} sensors saved to {file_path}")
+    print(f"{'addr':>4}  {'worst sensor':<12} {'length mm':>9} {'C pF':>6} {'settle us':>9}")
+    worst_overall = 0.0
+    for address in range(8):
+        channel = [r for r in rows if r[2] == address]
+        if not channel:
+            continue
+        worst = max(channel, key=lambda r: r[9])
+        worst_overall = max(worst_overall, worst[9])
+        unrouted = sum(1 for r in channel if r[4] == 0)
+        note = f"  ({unrouted} unrouted)" if unrouted else ""
+        print(f"{address:>4}  {worst[0]:<12} {worst[4]:>9.1f} {worst[7]:>6.1f} {worst[9]:>9.2f}{note}")
+
+    print(f"Suggested MUX_SETTLE_US in firmware/src/mux_adc.c: {math.ceil(worst_overall)}")
+
+
+report()
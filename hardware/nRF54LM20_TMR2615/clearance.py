@@ -0,0 +1,65 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Clearance check for script-generated tracks and vias
+
+"""Check pending tracks and vias against board copper before committing them.
+
+tracks.py queues tracks and vias and adds them to the board in one pass. This
+module checks that batch first: every pending segment or via against pads,
+holes, tracks and vias already on the board, and against the other pending
+items. Candidates come from a spatial hash (spatial.GridIndex) so only nearby
+copper is measured. Items of the same net never violate. Pads are measured
+by their own shape (circle, oval, rotated or rounded rectangle) and arc
+tracks as sampled chords; see spatial.py.
+
+Plain Python, no pcbnew import; items are spatial.Copper tuples in nanometers.
+"""
+
+from typing import NamedTuple
+
+from spatial import Copper, GridIndex, bbox, distance_to_point, distance_to_segment
+
+
+class Violation(NamedTuple):
+    item: Copper   # pending item
+    other: Copper  # board item or another pending item
+    gap: float     # edge-to-edge distance, negative when overlapping
+
+
+def gap(item, other):
+    """Edge-to-edge distance between a pending segment or via and any copper item."""
+    if item.kind == "segment":
+        return distance_to_segment(other, item.points) - item.radius
+    if item.kind == "circle":
+        return distance_to_point(other, item.points[0], item.points[1]) - item.radius
+    raise ValueError(f"Cannot check clearance of {item.kind!r} items")
+
+
+def check(pending, copper, clearance, cell_size=1_000_000):
+    """Return Violations of pending items closer than clearance to other copper."""
+    index = GridIndex(cell_size)
+    for item in copper:
+        index.insert(item)
+    pending_ids = [index.insert(item) for item in pending]
+
+    violations = []
+    for k in pending_ids:
+        item = index.items[k]
+        x_min, y_min, x_max, y_max = bbox(item)
+        for j in index.query_ids(x_min - clearance, y_min - clearance,
+                                 x_max + clearance, y_max + clearance):
+            # Board items come first, so j > k is a later pending item and
+            # that pair is measured from its side.
+            if j >= k:
+                continue
+            other = index.items[j]
+            if other.net and other.net == item.net:
+                continue
+            if not set(item.layers) & set(other.layers):
+                continue
+            d = gap(item, other)
+            if d < clearance:
+                violations.append(Violation(item, other, d))
+    violations.sort(key=lambda v: v.gap)
+    return violations
@@ -5,7 +5,6 @@
 
 from __future__ import annotations
 
-import csv
 import math
 import os
 from pathlib import Path
@@ -18,6 +17,10 @@ from kipy.board_types import (
     BoardSegment,
 )
 from kipy.geometry import Vector2
+from kipy.util.board_layer import canonical_name
+
+import curvefile
+from export import export_shapes
 
 
 # =============================================================================
@@ -36,7 +39,19 @@ FILLET_RADIUS_MACBOOK_MM = 12.0
 FILLET_RADIUS_LAPTOP_MM = 10.0
 FILLET_RADIUS_RIGHT_BOTTOM_MM = 4.0
 
-CURVES_FILE = "bezier_curves.csv"
+# Bezier handle lengths of draw_border_bezier, in millimeters. Left and right
+# sides share C5/C6 and C7/C8; Cn/Cm shape the wavy top edge. Candidates can be
+# searched offline with tools/handles.py.
+BORDER_HANDLES_MM = {
+    "C4": 35, "C4a": 17,    # left wrist rest to main body
+    "C5": 52, "C6": 24,     # wrist rest to switch 62 (and 68)
+    "C7": 30, "C8": 12,     # switch 62 to the middle key (and 68 to 66)
+    "Cr1": 38, "Cr2": 29,   # right wrist rest to main body
+    "Cn": 6, "Cm": 30,      # top edge waves
+}
+
+CURVES_FILE = "border_curves.kcrv"  # binary, see curvefile.py
+EXPORT_DIR = "export"  # per-layer DXF/SVG of the generated shapes
 
 # Keep application-facing dimensions in millimeters.
 # Conversion to KiCad nanometer coordinates happens only at geometry boundaries.
@@ -143,7 +158,6 @@ LAYER = BoardLayer.BL_Edge_Cuts
 LINE_WIDTH = nm(0.1)
 
 PENDING_SHAPES = []
-Bezier_Curves = []
 
 # Create directed line segment from vector X, in one of 4 directions.
 # 'left' is vector (-delta, 0), etc. 'X' is a directed line segment represented
@@ -463,8 +477,6 @@ def draw_bezier(start_pt, control1, end_pt, control2):
     shape.control2 = control2
     shape.end = end_pt
     _style_shape(shape)
-
-    Bezier_Curves.append((start_pt, control1, control2, end_pt))
     return end_pt
 
 
@@ -582,7 +594,7 @@ def draw_border_bezier(proj="", reveal=0, usb_cutout=True, wire_cutout=False):
     # Segment connecting left wrist rest to main body
     S = P1
     A = switches[65].position + vec_nm(0, half)
-    C4, C4a = 35, 17
+    C4, C4a = BORDER_HANDLES_MM["C4"], BORDER_HANDLES_MM["C4a"]
     E = vec_nm(S.x - nm(7), A.y + offset - reveal)
     S = draw_bezier(*right(S, nm(C4)), *right(E, nm(C4a)))
 
@@ -609,7 +621,7 @@ def draw_border_bezier(proj="", reveal=0, usb_cutout=True, wire_cutout=False):
         E = S + vec_nm(usb_start + width_usb, 0)
         S = draw_line(S, E)
 
-    Cn, Cm = nm(6), nm(30)
+    Cn, Cm = nm(BORDER_HANDLES_MM["Cn"]), nm(BORDER_HANDLES_MM["Cm"])
 
     top_max_thickness = offset + nm(3.6) - reveal
     top_min_thickness = offset + nm(2) - reveal
@@ -664,13 +676,13 @@ def draw_border_bezier(proj="", reveal=0, usb_cutout=True, wire_cutout=False):
 
     # Segment connecting wrist rest (right edge of left side)
     S = Q1
-    C5, C6 = 52, 24
+    C5, C6 = BORDER_HANDLES_MM["C5"], BORDER_HANDLES_MM["C6"]
     angle = -switches[62].orientation.degrees
     E = switches[62].position + rotate(vec_nm(-reveal, half + offset - reveal), angle)
     S = draw_bezier(*left(S, nm(C5), angleQ), *left(E, nm(C6), angle))
 
     # Draw curves to the middle key
-    C7, C8 = 30, 12
+    C7, C8 = BORDER_HANDLES_MM["C7"], BORDER_HANDLES_MM["C8"]
     angle2 = -switches[64].orientation.degrees
     E = switches[64].position + rotate(vec_nm(-int(2*half) - offset + reveal, -half), angle2)
     S = draw_bezier(*right(S, nm(C7), angle), *up(E, nm(C8), angle2))
@@ -704,7 +716,7 @@ def draw_border_bezier(proj="", reveal=0, usb_cutout=True, wire_cutout=False):
 
     # Segment connecting right wrist rest to main body
     S = P2
-    Cr1, Cr2 = 38, 29
+    Cr1, Cr2 = BORDER_HANDLES_MM["Cr1"], BORDER_HANDLES_MM["Cr2"]
     E = switches[72].position + vec_nm(0, half+offset - reveal)
     S = draw_bezier(*left(S, nm(Cr1)), *left(E, nm(Cr2)))
 
@@ -1064,30 +1076,39 @@ def projname() -> str:
     return Path(board.name).stem
 
 
-def get_file_path() -> Path:
-    """Return the Bezier CSV path next to the board when possible."""
+def get_project_dir() -> Path:
+    """Return the board's directory when known, else the KiCad project's."""
     board_path = Path(board.name)
     if board_path.is_absolute():
-        project_dir = board_path.parent
-    else:
-        project_dir = Path(os.getenv("KIPRJMOD", "."))
-    return project_dir / CURVES_FILE
+        return board_path.parent
+    return Path(os.getenv("KIPRJMOD", "."))
+
+
+def get_file_path() -> Path:
+    """Return the curve file path next to the board when possible."""
+    return get_project_dir() / CURVES_FILE
 
 
-def save_bezier_curves():
+def save_curves(project: str):
+    """Write the pending lines, arcs and Beziers on LAYER to the curve file."""
+    lines, arcs, beziers = [], [], []
+    for shape in PENDING_SHAPES:
+        if shape.layer != LAYER:
+            continue
+        if isinstance(shape, BoardSegment):
+            points, rows = (shape.start, shape.end), lines
+        elif isinstance(shape, BoardArc):
+            points, rows = (shape.start, shape.mid, shape.end), arcs
+        else:
+            points, rows = (shape.start, shape.control1, shape.control2, shape.end), beziers
+        rows.append([c for v in points for c in (v.x, v.y)])
+
     file_path = get_file_path()
     try:
-        with file_path.open("w", newline="") as f:
-            writer = csv.writer(f)
-            for start, c1, c2, end in Bezier_Curves:
-                writer.writerow([
-                    start.x, start.y,
-                    c1.x, c1.y,
-                    c2.x, c2.y,
-                    end.x, end.y,
-                ])
-        print(f"Saved {len(Bezier_Curves)} curves to {file_path}")
-    except OSError as exc:
+        curvefile.write(file_path, canonical_name(LAYER), project, lines, arcs, beziers)
+        print(f"Saved {len(lines)} lines, {len(arcs)} arcs, {len(beziers)} curves to {file_path}")
+    except (OSError, ValueError) as exc:
+        # ValueError: a project or layer name too long for the header
         print(f"Error saving {file_path}: {exc}")
 
 
@@ -1109,10 +1130,9 @@ def build_project_border(project: str):
         draw_wrist()
 
         LAYER = BoardLayer.BL_User_5
-        Bezier_Curves.clear()
         draw_border_bezier(project, reveal=0, usb_cutout=False, wire_cutout=True)
         draw_wrist_cavity()
-        save_bezier_curves()
+        save_curves(project)
 
         LAYER = BoardLayer.BL_User_6
         draw_border(project, offset=GAP)
@@ -1165,7 +1185,6 @@ def main():
 
     # Generate everything locally first.  No IPC writes happen during geometry construction.
     PENDING_SHAPES.clear()
-    Bezier_Curves.clear()
     build_project_border(project)
 
     # Apply deletion + creation as one KiCad undo transaction.
@@ -1181,6 +1200,12 @@ def main():
 
     print(f"Created {len(PENDING_SHAPES)} border shapes for {project}.")
 
+    try:
+        written = export_shapes(PENDING_SHAPES, get_project_dir() / EXPORT_DIR, project)
+        print(f"Exported {len(written)} DXF/SVG files to {get_project_dir() / EXPORT_DIR}")
+    except OSError as exc:
+        print(f"Error exporting shapes: {exc}")
+
 
 if __name__ == "__main__":
     main()
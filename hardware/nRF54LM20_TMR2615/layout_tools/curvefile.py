@@ -0,0 +1,127 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Binary curve file (.kcrv) read by the Fusion 360 import script (Bezier.py)
+
+"""Lines, arcs and cubic Beziers of one layer as packed int64 arrays.
+
+Layout, little-endian:
+
+    offset  size  field
+    0       4     magic b"KCRV"
+    4       2     version (uint16), currently 1
+    6       2     header size in bytes (uint16), 80
+    8       4     line count (uint32)
+    12      4     arc count (uint32)
+    16      4     Bezier count (uint32)
+    20      8     units, NUL padded ASCII: b"nm"
+    28      16    layer, NUL padded UTF-8 (canonical name, "User.5")
+    44      32    project, NUL padded UTF-8
+    76      4     reserved, zero
+
+followed by three int64 arrays, row-major, coordinates in units:
+
+    lines    count x 4   x0 y0 x1 y1                   (start, end)
+    arcs     count x 6   x0 y0 x1 y1 x2 y2             (start, mid, end)
+    beziers  count x 8   x0 y0 x1 y1 x2 y2 x3 y3       (start, control1, control2, end)
+
+The arrays start 8-byte aligned, so numpy.memmap can map them in place.
+Readers reject a file whose magic, version or size does not match.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+MAGIC = b"KCRV"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII8s16s32s4x")
+COLUMNS = {"lines": 4, "arcs": 6, "beziers": 8}
+
+
+def _field(text: str, size: int, name: str) -> bytes:
+    data = text.encode("utf-8")
+    if len(data) > size:
+        raise ValueError(f"{name} {text!r} is longer than {size} bytes")
+    return data
+
+
+def write(path: Path, layer: str, project: str, lines=(), arcs=(), beziers=(), units: str = "nm"):
+    """Write rows of integer coordinates (4, 6 and 8 per row) to path."""
+    tables = {"lines": lines, "arcs": arcs, "beziers": beziers}
+    body = array("q")
+    for name, rows in tables.items():
+        for row in rows:
+            if len(row) != COLUMNS[name]:
+                raise ValueError(f"{name}: expected {COLUMNS[name]} values per row, got {len(row)}")
+            body.extend(row)
+    if sys.byteorder != "little":
+        body.byteswap()
+    header = HEADER.pack(MAGIC, VERSION, HEADER.size, len(lines), len(arcs), len(beziers),
+                         _field(units, 8, "units"), _field(layer, 16, "layer"),
+                         _field(project, 32, "project"))
+    Path(path).write_bytes(header + body.tobytes())
+
+
+def read_header(data: bytes) -> dict:
+    """Parse and check the header; return its fields and the array shapes."""
+    if len(data) < HEADER.size:
+        raise ValueError("file too short for a curve header")
+    magic, version, size, n_lines, n_arcs, n_beziers, units, layer, project = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"not a curve file (magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"unsupported curve file version {version}")
+    counts = {"lines": n_lines, "arcs": n_arcs, "beziers": n_beziers}
+    return {
+        "header_size": size,
+        "units": units.rstrip(b"\0").decode("ascii"),
+        "layer": layer.rstrip(b"\0").decode("utf-8"),
+        "project": project.rstrip(b"\0").decode("utf-8"),
+        "counts": counts,
+        "values": sum(COLUMNS[name] * n for name, n in counts.items()),
+    }
+
+
+def read(path: Path) -> tuple[dict, dict]:
+    """Return (header, {"lines": rows, "arcs": rows, "beziers": rows}).
+
+    Rows are numpy int64 arrays mapped from the file when numpy is
+    installed, otherwise lists of tuples.
+    """
+    with open(path, "rb") as f:
+        header = read_header(f.read(HEADER.size))
+    expected = header["header_size"] + 8 * header["values"]
+    actual = Path(path).stat().st_size
+    if actual != expected:
+        raise ValueError(f"{path}: {actual} bytes, header says {expected}")
+
+    tables = {}
+    try:
+        import numpy as np
+    except ImportError:
+        with open(path, "rb") as f:
+            f.seek(header["header_size"])
+            values = array("q")
+            values.frombytes(f.read())
+        if sys.byteorder != "little":
+            values.byteswap()
+        start = 0
+        for name, n in header["counts"].items():
+            width = COLUMNS[name]
+            tables[name] = [tuple(values[start + i * width:start + (i + 1) * width]) for i in range(n)]
+            start += n * width
+        return header, tables
+
+    if not header["values"]:  # nothing to map
+        return header, {name: np.zeros((0, COLUMNS[name]), dtype="<i8") for name in COLUMNS}
+    values = np.memmap(path, dtype="<i8", mode="r", offset=header["header_size"])
+    start = 0
+    for name, n in header["counts"].items():
+        width = COLUMNS[name]
+        tables[name] = values[start:start + n * width].reshape(n, width)
+        start += n * width
+    return header, tables
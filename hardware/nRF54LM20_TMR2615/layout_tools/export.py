@@ -0,0 +1,148 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Write border shapes per layer as DXF and SVG, without a KiCad plot step
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+from kipy.board_types import BoardArc, BoardBezier, BoardLayer, BoardSegment
+from kipy.util.board_layer import canonical_name
+
+EXPORT_LAYERS = (
+    BoardLayer.BL_Edge_Cuts,
+    BoardLayer.BL_User_4,
+    BoardLayer.BL_User_5,
+    BoardLayer.BL_User_6,
+    BoardLayer.BL_User_7,
+    BoardLayer.BL_User_8,
+)
+SVG_MARGIN_MM = 1.0
+
+
+def mm(v) -> tuple[float, float]:
+    """KiCad nanometer Vector2 to (x, y) in millimeters."""
+    return v.x / 1_000_000, v.y / 1_000_000
+
+
+def arc_geometry(shape: BoardArc):
+    """Return (center, radius, start_deg, end_deg, increasing) in board coordinates.
+
+    'increasing' is True when the arc runs from start through mid to end with
+    growing angle (clockwise on screen, since KiCad's Y axis points down).
+    """
+    cx, cy = mm(shape.center())
+    radius = shape.radius() / 1_000_000
+    a1, a2, a3 = (math.degrees(math.atan2(y - cy, x - cx))
+                  for x, y in map(mm, (shape.start, shape.mid, shape.end)))
+    increasing = (a2 - a1) % 360 < (a3 - a1) % 360
+    return (cx, cy), radius, a1, a3, increasing
+
+
+def file_stem(project: str, layer) -> str:
+    """KiCad's plot file name: <project>-Edge_Cuts, <project>-User_5, ..."""
+    return f"{project}-{canonical_name(layer).replace('.', '_')}"
+
+
+def by_layer(shapes) -> dict:
+    """Group shapes on EXPORT_LAYERS by layer, in drawing order."""
+    layers = {}
+    for shape in shapes:
+        if shape.layer in EXPORT_LAYERS:
+            layers.setdefault(shape.layer, []).append(shape)
+    return layers
+
+
+def write_dxf(path: Path, shapes, layer_name: str):
+    """Lines, true arcs and cubic splines, in mm with Y up."""
+    import ezdxf
+
+    doc = ezdxf.new(units=ezdxf.units.MM)
+    doc.layers.add(layer_name)
+    msp = doc.modelspace()
+    attribs = {"layer": layer_name}
+    flip = lambda v: (mm(v)[0], -mm(v)[1])
+    for shape in shapes:
+        if isinstance(shape, BoardSegment):
+            msp.add_line(flip(shape.start), flip(shape.end), dxfattribs=attribs)
+        elif isinstance(shape, BoardArc):
+            (cx, cy), radius, a1, a3, increasing = arc_geometry(shape)
+            # Flipping Y negates angles; DXF arcs run counterclockwise.
+            start, end = (-a3, -a1) if increasing else (-a1, -a3)
+            msp.add_arc((cx, -cy), radius, start, end, dxfattribs=attribs)
+        elif isinstance(shape, BoardBezier):
+            points = [flip(v) for v in (shape.start, shape.control1, shape.control2, shape.end)]
+            msp.add_open_spline(points, degree=3, dxfattribs=attribs)
+        else:
+            raise TypeError(f"Cannot export {type(shape).__name__}")
+    doc.saveas(path)
+
+
+def _svg_path(shape) -> str:
+    if isinstance(shape, BoardSegment):
+        (x1, y1), (x2, y2) = mm(shape.start), mm(shape.end)
+        return f"M {x1:.6f} {y1:.6f} L {x2:.6f} {y2:.6f}"
+    if isinstance(shape, BoardArc):
+        _, radius, a1, a3, increasing = arc_geometry(shape)
+        sweep = (a3 - a1) % 360 if increasing else (a1 - a3) % 360
+        (x1, y1), (x2, y2) = mm(shape.start), mm(shape.end)
+        return (f"M {x1:.6f} {y1:.6f} A {radius:.6f} {radius:.6f} 0 "
+                f"{int(sweep > 180)} {int(increasing)} {x2:.6f} {y2:.6f}")
+    if isinstance(shape, BoardBezier):
+        p0, p1, p2, p3 = map(mm, (shape.start, shape.control1, shape.control2, shape.end))
+        return (f"M {p0[0]:.6f} {p0[1]:.6f} C {p1[0]:.6f} {p1[1]:.6f} "
+                f"{p2[0]:.6f} {p2[1]:.6f} {p3[0]:.6f} {p3[1]:.6f}")
+    raise TypeError(f"Cannot export {type(shape).__name__}")
+
+
+def write_svg(path: Path, shapes):
+    """One path per shape (SVG arcs and cubics), sized in mm, Y down as in KiCad."""
+    points = []
+    for shape in shapes:
+        points += [mm(shape.start), mm(shape.end)]
+        if isinstance(shape, BoardArc):
+            (cx, cy), radius, _, _, _ = arc_geometry(shape)
+            points += [(cx - radius, cy - radius), (cx + radius, cy + radius)]
+        elif isinstance(shape, BoardBezier):
+            points += [mm(shape.control1), mm(shape.control2)]
+    x0 = min(x for x, _ in points) - SVG_MARGIN_MM
+    y0 = min(y for _, y in points) - SVG_MARGIN_MM
+    w = max(x for x, _ in points) + SVG_MARGIN_MM - x0
+    h = max(y for _, y in points) + SVG_MARGIN_MM - y0
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{w:.6f}mm" height="{h:.6f}mm" '
+        f'viewBox="{x0:.6f} {y0:.6f} {w:.6f} {h:.6f}">',
+        '<g fill="none" stroke="black" stroke-linecap="round">',
+    ]
+    for shape in shapes:
+        width = shape.attributes.stroke.width / 1_000_000
+        lines.append(f'<path stroke-width="{width:g}" d="{_svg_path(shape)}"/>')
+    lines += ["</g>", "</svg>", ""]
+    path.write_text("\n".join(lines))
+
+
+def export_shapes(shapes, directory: Path, project: str) -> list[Path]:
+    """Write <project>-<layer>.svg and .dxf in directory for every layer used.
+
+    DXF needs ezdxf; without it only the SVG files are written.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        import ezdxf  # noqa: F401
+        dxf = True
+    except ImportError:
+        print("ezdxf is not installed: skipping DXF export")
+        dxf = False
+
+    written = []
+    for layer, layer_shapes in by_layer(shapes).items():
+        stem = directory / file_stem(project, layer)
+        write_svg(stem.with_suffix(".svg"), layer_shapes)
+        written.append(stem.with_suffix(".svg"))
+        if dxf:
+            write_dxf(stem.with_suffix(".dxf"), layer_shapes, canonical_name(layer))
+            written.append(stem.with_suffix(".dxf"))
+    return written
@@ -0,0 +1,465 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Offline grid router for the TMR -> MUXB sensor nets
+
+"""Route the analog sensor nets without KiCad.
+
+tracks.py exports the routing problem from the open board (pads, tracks, vias,
+holes and the TMR{i} -> MUXB{k} nets). This script routes it in a plain Python
+interpreter and writes a routes file that tracks.py draws through its batched
+track writer:
+
+    python3 router.py routing_problem.json routes.json --workers 8
+
+Every net is a multi-layer A* search on a square grid; obstacle lookups go
+through spatial.GridIndex. Nets are routed independently in worker processes.
+Where two nets end up too close, the cells they share become more expensive
+and only those nets are routed again (negotiated congestion), until no cell is
+claimed by two nets or the iteration limit is reached. A via claims a disc of
+its own radius on every layer, so via-to-track and via-to-via clearance
+between nets counts as congestion too, and the off-grid stubs from pins to
+the grid are checked against the vias of other nets.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from spatial import Copper, build_index, distance_to_point, distance_to_segment
+
+SQRT2 = math.sqrt(2)
+MOVES = (
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2),
+)
+
+# Give up on a connection after expanding this many grid nodes.
+MAX_EXPANSIONS = 400_000
+
+
+class Router:
+    """A* over (ix, iy, layer) grid nodes for one routing problem."""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.pitch = problem["pitch"]
+        self.x0, self.y0, x1, y1 = problem["bounds"]
+        self.nx = int((x1 - self.x0) // self.pitch) + 1
+        self.ny = int((y1 - self.y0) // self.pitch) + 1
+        self.layers = problem["layers"]
+        self.track_reach = problem["track_width"] / 2 + problem["clearance"]
+        self.via_reach = problem["via_diameter"] / 2 + problem["clearance"]
+        self.via_cost = problem.get("via_cost", 10.0)
+
+        items = [Copper(k, tuple(p), r, tuple(layers), net)
+                 for k, p, r, layers, net in problem["obstacles"]]
+        self.index = build_index(items, cell_size=max(8 * self.pitch, 1_000_000))
+        self._track_blockers = {}
+        self._via_blockers = {}
+
+        # Congestion state, replaced by the caller between iterations
+        self.claimed = {}
+        self.via_claimed = {}
+        self.history = {}
+        self.present_factor = 0.0
+
+    # -------------------------------------------------------------------------
+    # Grid helpers
+    # -------------------------------------------------------------------------
+    def xy(self, ix, iy):
+        return self.x0 + ix * self.pitch, self.y0 + iy * self.pitch
+
+    def snap(self, x, y):
+        return round((x - self.x0) / self.pitch), round((y - self.y0) / self.pitch)
+
+    def _nets_near(self, x, y, layers, reach):
+        nets = set()
+        for item in self.index.near(x, y, reach):
+            if item.net in nets or not any(l in layers for l in item.layers):
+                continue
+            if distance_to_point(item, x, y) < reach:
+                nets.add(item.net)
+        return frozenset(nets)
+
+    def track_free(self, node, net):
+        nets = self._track_blockers.get(node)
+        if nets is None:
+            x, y = self.xy(node[0], node[1])
+            nets = self._nets_near(x, y, (self.layers[node[2]],), self.track_reach)
+            self._track_blockers[node] = nets
+        return not nets or (len(nets) == 1 and net in nets)
+
+    def via_free(self, ix, iy, net):
+        key = (ix, iy)
+        nets = self._via_blockers.get(key)
+        if nets is None:
+            x, y = self.xy(ix, iy)
+            nets = self._nets_near(x, y, self.layers, self.via_reach)
+            self._via_blockers[key] = nets
+        return not nets or (len(nets) == 1 and net in nets)
+
+    def congestion(self, node, net):
+        cost = self.history.get(node, 0.0)
+        others = self.claimed.get(node)
+        if others and (len(others) > 1 or net not in others):
+            cost += self.present_factor * len(others - {net})
+        return cost
+
+    def via_congestion(self, ix, iy, net):
+        others = self.via_claimed.get((ix, iy))
+        if others and (len(others) > 1 or net not in others):
+            return self.present_factor * len(others - {net})
+        return 0.0
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+    def astar(self, net, sources, targets, goal):
+        gx, gy = goal
+
+        def h(ix, iy):
+            dx, dy = abs(ix - gx), abs(iy - gy)
+            return (dx + dy) + (SQRT2 - 2) * min(dx, dy)
+
+        best = {}
+        came_from = {}
+        heap = []
+        for node in sources:
+            best[node] = 0.0
+            heapq.heappush(heap, (h(node[0], node[1]), 0.0, node))
+
+        expansions = 0
+        via_layers = range(len(self.layers))
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if cost > best.get(node, math.inf):
+                continue
+            if node in targets:
+                path = [node]
+                while node in came_from:
+                    node = came_from[node]
+                    path.append(node)
+                return path[::-1]
+
+            expansions += 1
+            if expansions > MAX_EXPANSIONS:
+                return None
+
+            ix, iy, li = node
+            neighbours = []
+            for dx, dy, step in MOVES:
+                jx, jy = ix + dx, iy + dy
+                if 0 <= jx < self.nx and 0 <= jy < self.ny:
+                    neighbours.append(((jx, jy, li), step))
+            if len(self.layers) > 1 and self.via_free(ix, iy, net):
+                via_step = self.via_cost + self.via_congestion(ix, iy, net)
+                neighbours.extend(((ix, iy, lj), via_step)
+                                  for lj in via_layers if lj != li)
+
+            for nxt, step in neighbours:
+                if nxt not in targets and not self.track_free(nxt, net):
+                    continue
+                new_cost = cost + step + self.congestion(nxt, net)
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    came_from[nxt] = node
+                    heapq.heappush(heap, (new_cost + h(nxt[0], nxt[1]), new_cost, nxt))
+        return None
+
+    def pin_nodes(self, pin):
+        x, y, layers = pin
+        ix, iy = self.snap(x, y)
+        return {(ix, iy, li) for li, name in enumerate(self.layers) if name in layers}
+
+    def route(self, net):
+        """Connect all pins of net; return tracks, vias and visited nodes."""
+        name = net["name"]
+        pins = sorted(net["pins"], key=lambda p: (p[0], p[1]))
+        first, rest = pins[0], pins[1:]
+        rest.sort(key=lambda p: math.hypot(p[0] - first[0], p[1] - first[1]))
+
+        tree = set(self.pin_nodes(first))
+        tree_pins = [first]
+        pin_at = {node: first for node in tree}
+        tracks, vias, nodes, stubs = [], [], [], []
+
+        for pin in rest:
+            sources = self.pin_nodes(pin)
+            if not sources:
+                return None
+            anchor = min(tree_pins, key=lambda p: math.hypot(p[0] - pin[0], p[1] - pin[1]))
+            path = self.astar(name, sources, tree, self.snap(anchor[0], anchor[1]))
+            if path is None:
+                return None
+
+            self._stub(stubs, pin, path[0])
+            if path[-1] in pin_at:
+                self._stub(stubs, pin_at[path[-1]], path[-1])
+            self._segments(path, tracks, vias)
+
+            nodes.extend(path)
+            tree.update(path)
+            for node in sources:
+                pin_at[node] = pin
+            tree.update(sources)
+            tree_pins.append(pin)
+
+        return {"tracks": tracks + stubs, "vias": vias, "nodes": nodes, "stubs": stubs}
+
+    def _stub(self, tracks, pin, node):
+        x, y = self.xy(node[0], node[1])
+        if (x, y) != (pin[0], pin[1]):
+            tracks.append([pin[0], pin[1], x, y, self.layers[node[2]]])
+
+    def _segments(self, path, tracks, vias):
+        """Merge straight runs of grid nodes into tracks; layer changes become vias."""
+        def flush(a, b):
+            if a[:2] != b[:2]:
+                tracks.append([*self.xy(a[0], a[1]), *self.xy(b[0], b[1]), self.layers[a[2]]])
+
+        start = prev = path[0]
+        direction = None
+        for node in path[1:]:
+            if node[2] != prev[2]:
+                flush(start, prev)
+                vias.append(list(self.xy(node[0], node[1])))
+                start, direction = node, None
+            else:
+                step = (node[0] - prev[0], node[1] - prev[1])
+                if direction is not None and step != direction:
+                    flush(start, prev)
+                    start = prev
+                direction = step
+            prev = node
+        flush(start, prev)
+
+
+# =============================================================================
+# CONGESTION
+# =============================================================================
+def _disc(reach):
+    """Grid offsets closer than reach (in grid steps) to the origin."""
+    k = math.ceil(reach)
+    return [(a, b) for a in range(-k, k + 1) for b in range(-k, k + 1)
+            if a * a + b * b < reach * reach]
+
+
+def _cell(problem, x, y):
+    x0, y0 = problem["bounds"][:2]
+    return round((x - x0) / problem["pitch"]), round((y - y0) / problem["pitch"])
+
+
+def _via_cells(problem, result):
+    return {_cell(problem, x, y) for x, y in result["vias"]}
+
+
+def claim(problem, routes):
+    """Map grid nodes to the nets whose copper would violate clearance there.
+
+    Returns (track claims, via claims). The first is keyed by (ix, iy, layer)
+    and holds the nets a track centred on that node would come too close to;
+    the second is keyed by (ix, iy) and holds the nets a via there would.
+    Track nodes are copper of half the track width on their layer, vias
+    copper of the via radius on every layer.
+    """
+    pitch = problem["pitch"]
+    track_r = problem["track_width"] / 2
+    via_r = problem["via_diameter"] / 2
+    clearance = problem["clearance"]
+    layers = range(len(problem["layers"]))
+    track_disc = _disc((2 * track_r + clearance) / pitch)
+    via_disc = _disc((via_r + track_r + clearance) / pitch)
+    via_via_disc = _disc((2 * via_r + clearance) / pitch)
+
+    claimed, via_claimed = {}, {}
+    for net, result in routes.items():
+        if not result:
+            continue
+        via_cells = _via_cells(problem, result)
+        for ix, iy, li in result["nodes"]:
+            if (ix, iy) in via_cells:
+                continue
+            for a, b in track_disc:
+                claimed.setdefault((ix + a, iy + b, li), set()).add(net)
+            for a, b in via_disc:
+                via_claimed.setdefault((ix + a, iy + b), set()).add(net)
+        for ix, iy in via_cells:
+            for a, b in via_disc:
+                for li in layers:
+                    claimed.setdefault((ix + a, iy + b, li), set()).add(net)
+            for a, b in via_via_disc:
+                via_claimed.setdefault((ix + a, iy + b), set()).add(net)
+    return claimed, via_claimed
+
+
+def stub_conflicts(problem, routes):
+    """Yield (net, other, node) where a pin stub of net passes too close to a via of other."""
+    via_r = problem["via_diameter"] / 2
+    reach = problem["track_width"] / 2 + problem["clearance"]
+    layer_of = {name: li for li, name in enumerate(problem["layers"])}
+    vias = [Copper("circle", (x, y), via_r, tuple(problem["layers"]), net)
+            for net, result in routes.items() if result for x, y in result["vias"]]
+    if not vias:
+        return
+    index = build_index(vias, cell_size=max(8 * problem["pitch"], 1_000_000))
+    for net, result in routes.items():
+        if not result:
+            continue
+        for x1, y1, x2, y2, layer in result.get("stubs", ()):
+            seg = (x1, y1, x2, y2)
+            box = (min(x1, x2) - via_r - reach, min(y1, y2) - via_r - reach,
+                   max(x1, x2) + via_r + reach, max(y1, y2) + via_r + reach)
+            for via in index.query(*box):
+                if via.net != net and distance_to_segment(via, seg) < reach:
+                    yield net, via.net, (*_cell(problem, x2, y2), layer_of[layer])
+
+
+def find_conflicts(problem, routes):
+    """Return (colliding net pairs, nodes) where a route enters another net's clearance."""
+    claimed, via_claimed = claim(problem, routes)
+    layers = range(len(problem["layers"]))
+    pairs, nodes = set(), set()
+
+    def collide(net, others, conflict_nodes):
+        for other in others:
+            if other != net:
+                pairs.add(tuple(sorted((net, other))))
+                nodes.update(conflict_nodes)
+
+    for net, result in routes.items():
+        if not result:
+            continue
+        via_cells = _via_cells(problem, result)
+        for node in result["nodes"]:
+            if node[:2] not in via_cells:
+                collide(net, claimed.get(node, ()), (node,))
+        for ix, iy in via_cells:
+            collide(net, via_claimed.get((ix, iy), ()), [(ix, iy, li) for li in layers])
+    for net, other, node in stub_conflicts(problem, routes):
+        collide(net, (other,), (node,))
+    return pairs, nodes
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+_worker = None
+_worker_state = None
+
+
+def _init_worker(problem):
+    global _worker
+    _worker = Router(problem)
+
+
+def _route_net(task):
+    """Route one net against the congestion state of the current iteration."""
+    global _worker_state
+    net, iteration, state = task
+    if _worker_state != iteration:
+        routes, history, present_factor = pickle.loads(state)
+        _worker.claimed, _worker.via_claimed = claim(_worker.problem, routes)
+        _worker.history = history
+        _worker.present_factor = present_factor
+        _worker_state = iteration
+    result = _worker.route(net)
+    return net["name"], result
+
+
+def rip_up(conflicts):
+    """Pick conflicting nets to reroute so that no two picked nets collide.
+
+    The other net of each colliding pair keeps its route and becomes an
+    obstacle the picked net has to negotiate around. Rerouting both sides of
+    a collision in parallel tends to move them into the same free space.
+    """
+    partners = {}
+    for a, b in conflicts:
+        partners.setdefault(a, set()).add(b)
+        partners.setdefault(b, set()).add(a)
+    picked = set()
+    for net in sorted(partners, key=lambda n: (-len(partners[n]), n)):
+        if not partners[net] & picked:
+            picked.add(net)
+    return sorted(picked)
+
+
+def route_all(problem, workers=None, iterations=12, log=print):
+    """Route every net in problem; return (routes, failed net names)."""
+    nets = {net["name"]: net for net in problem["nets"]}
+    routes = {}
+    history = {}
+    pending = sorted(nets)
+    present_factor = 1.0
+    conflicts = set()
+
+    if workers == 1:
+        _init_worker(problem)
+        pool = None
+        run = lambda tasks: map(_route_net, tasks)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(problem,))
+        run = lambda tasks: pool.map(_route_net, tasks)
+
+    try:
+        for iteration in range(1, iterations + 1):
+            started = time.perf_counter()
+            state = pickle.dumps((routes, history, present_factor))
+            routes.update(run([(nets[name], iteration, state) for name in pending]))
+
+            conflicts, nodes = find_conflicts(problem, routes)
+            unrouted = sorted(name for name, r in routes.items() if r is None)
+            log(f"Iteration {iteration}: routed {len(pending)} nets, "
+                f"{len(unrouted)} unroutable, {len(conflicts)} colliding pairs, "
+                f"{time.perf_counter() - started:.1f}s")
+            if not conflicts:
+                break
+
+            for node in nodes:
+                history[node] = history.get(node, 0.0) + 1.0
+            present_factor *= 1.5
+            pending = rip_up(conflicts)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    failed = {name for name, r in routes.items() if r is None}
+    failed.update(net for pair in conflicts for net in pair)
+    return {name: r for name, r in routes.items() if name not in failed}, sorted(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("problem", help="routing problem exported by tracks.py")
+    parser.add_argument("routes", help="output file read back by tracks.py")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 1 = in-process)")
+    parser.add_argument("--iterations", type=int, default=12)
+    args = parser.parse_args()
+
+    with open(args.problem) as f:
+        problem = json.load(f)
+
+    started = time.perf_counter()
+    routes, failed = route_all(problem, args.workers, args.iterations)
+
+    with open(args.routes, "w") as f:
+        json.dump({
+            "routes": [
+                {"net": name, "tracks": r["tracks"], "vias": r["vias"]}
+                for name, r in sorted(routes.items())
+            ],
+            "failed": failed,
+        }, f)
+
+    print(f"Routed {len(routes)} nets in {time.perf_counter() - started:.1f}s; "
+          f"failed: {', '.join(failed) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
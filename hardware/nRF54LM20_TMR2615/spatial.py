@@ -0,0 +1,270 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Spatial index and copper geometry shared by tracks.py and router.py
+
+"""Uniform-grid spatial index and copper clearance geometry.
+
+Plain Python, no pcbnew import, so the same code runs inside the KiCad
+scripting console (tracks.py) and in the offline worker processes of
+router.py. All coordinates are KiCad nanometers.
+
+Copper items are stored as Copper tuples, which pickle cheaply:
+
+    segment  points = (x1, y1, x2, y2),          radius = half track width
+    rect     points = (x_min, y_min, x_max, y_max), radius = 0
+    circle   points = (cx, cy),                    radius = circle radius
+    polygon  points = (x1, y1, x2, y2, ...),       radius = corner rounding
+
+A polygon item is the polygon grown by its radius, so a rotated rectangular
+pad is a polygon with radius 0 and a rounded one its inner rectangle with the
+corner radius. pad_shape() turns pad parameters into one of these; oval pads
+are segments with the half width as radius.
+
+'layers' holds copper layer names ("F.Cu", "B.Cu"). Holes are stored with
+every copper layer since a drill goes through the whole stackup.
+"""
+
+import math
+from collections import defaultdict
+from typing import NamedTuple
+
+
+class Copper(NamedTuple):
+    kind: str  # "segment", "rect", "circle" or "polygon"
+    points: tuple
+    radius: int
+    layers: tuple
+    net: str
+
+
+def bbox(item):
+    """Return (x_min, y_min, x_max, y_max) of a Copper item."""
+    p, r = item.points, item.radius
+    if item.kind == "segment":
+        return (min(p[0], p[2]) - r, min(p[1], p[3]) - r,
+                max(p[0], p[2]) + r, max(p[1], p[3]) + r)
+    if item.kind == "rect":
+        return p
+    if item.kind == "polygon":
+        xs, ys = p[0::2], p[1::2]
+        return (min(xs) - r, min(ys) - r, max(xs) + r, max(ys) + r)
+    return (p[0] - r, p[1] - r, p[0] + r, p[1] + r)
+
+
+def pad_shape(shape, cx, cy, width, height, angle=0.0, corner_radius=0):
+    """Return (kind, points, radius) of a pad for a Copper item.
+
+    shape is "circle", "oval", "rect" or "roundrect"; (cx, cy) is the centre
+    of the pad shape, width and height its size along the pad's own axes and
+    angle its orientation in degrees, counterclockwise on the board (Y down).
+    Returns None for other shapes, which the caller approximates.
+    """
+    a = math.radians(angle)
+    c, s = math.cos(a), math.sin(a)
+
+    def place(x, y):
+        return (round(cx + x * c + y * s), round(cy - x * s + y * c))
+
+    if shape == "circle" or (shape == "oval" and width == height):
+        return "circle", (cx, cy), min(width, height) / 2
+    if shape == "oval":
+        r = min(width, height) / 2
+        dx, dy = (width / 2 - r, 0) if width > height else (0, height / 2 - r)
+        return "segment", place(-dx, -dy) + place(dx, dy), r
+    if shape in ("rect", "roundrect"):
+        r = min(corner_radius, width / 2, height / 2) if shape == "roundrect" else 0
+        w, h = width / 2 - r, height / 2 - r
+        corners = [place(-w, -h), place(w, -h), place(w, h), place(-w, h)]
+        return "polygon", tuple(v for corner in corners for v in corner), r
+    return None
+
+
+def arc_segments(start, mid, end, max_step):
+    """Sample the arc through start, mid and end into chords no longer than max_step.
+
+    Returns (segments, sagitta): the chords as (x1, y1, x2, y2) and how far
+    the arc bulges past them at most, to add to the track's half width.
+    """
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if d == 0:
+        return [(x1, y1, x3, y3)], 0.0
+    q1, q2, q3 = x1 * x1 + y1 * y1, x2 * x2 + y2 * y2, x3 * x3 + y3 * y3
+    ux = (q1 * (y2 - y3) + q2 * (y3 - y1) + q3 * (y1 - y2)) / d
+    uy = (q1 * (x3 - x2) + q2 * (x1 - x3) + q3 * (x2 - x1)) / d
+    radius = math.hypot(x1 - ux, y1 - uy)
+    a1 = math.atan2(y1 - uy, x1 - ux)
+    a2 = math.atan2(y2 - uy, x2 - ux)
+    a3 = math.atan2(y3 - uy, x3 - ux)
+    sweep = (a3 - a1) % (2 * math.pi)
+    if (a2 - a1) % (2 * math.pi) > sweep:
+        sweep -= 2 * math.pi
+    n = max(1, math.ceil(abs(sweep) * radius / max_step))
+    points = [(round(ux + radius * math.cos(a1 + sweep * i / n)),
+               round(uy + radius * math.sin(a1 + sweep * i / n))) for i in range(1, n)]
+    points = [(x1, y1), *points, (x3, y3)]
+    segments = [(*p, *q) for p, q in zip(points, points[1:])]
+    return segments, radius * (1 - math.cos(sweep / (2 * n)))
+
+
+class GridIndex:
+    """Bucket items into square cells so neighbourhood queries stay local."""
+
+    def __init__(self, cell_size):
+        self.cell_size = int(cell_size)
+        self.cells = defaultdict(list)
+        self.items = []
+
+    def _span(self, x_min, y_min, x_max, y_max):
+        c = self.cell_size
+        return (int(x_min // c), int(y_min // c), int(x_max // c), int(y_max // c))
+
+    def insert(self, item, box=None):
+        """Add item, covering every cell its bounding box touches."""
+        index = len(self.items)
+        self.items.append(item)
+        i0, j0, i1, j1 = self._span(*(box or bbox(item)))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.cells[(i, j)].append(index)
+        return index
+
+    def query_ids(self, x_min, y_min, x_max, y_max):
+        """Return the insertion indices of items whose cells overlap the box."""
+        i0, j0, i1, j1 = self._span(x_min, y_min, x_max, y_max)
+        cells = self.cells
+        if i0 == i1 and j0 == j1:
+            return cells.get((i0, j0), ())
+        seen = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                seen.update(cells.get((i, j), ()))
+        return seen
+
+    def query(self, x_min, y_min, x_max, y_max):
+        """Return the items whose cells overlap the box, each once."""
+        items = self.items
+        return [items[k] for k in self.query_ids(x_min, y_min, x_max, y_max)]
+
+    def near(self, x, y, distance):
+        return self.query(x - distance, y - distance, x + distance, y + distance)
+
+
+# =============================================================================
+# DISTANCES (edge to edge; zero or negative when overlapping)
+# =============================================================================
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return math.hypot(px - x1, py - y1)
+    t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length2))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def point_rect_distance(px, py, x_min, y_min, x_max, y_max):
+    dx = max(x_min - px, 0, px - x_max)
+    dy = max(y_min - py, 0, py - y_max)
+    return math.hypot(dx, dy)
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    v = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return (v > 0) - (v < 0)
+
+
+def segments_intersect(a, b):
+    """True if segments a=(x1, y1, x2, y2) and b cross or touch."""
+    o1 = _orientation(a[0], a[1], a[2], a[3], b[0], b[1])
+    o2 = _orientation(a[0], a[1], a[2], a[3], b[2], b[3])
+    o3 = _orientation(b[0], b[1], b[2], b[3], a[0], a[1])
+    o4 = _orientation(b[0], b[1], b[2], b[3], a[2], a[3])
+    if o1 != o2 and o3 != o4:
+        return True
+    # Collinear overlap
+    if o1 == o2 == o3 == o4 == 0:
+        return (min(a[0], a[2]) <= max(b[0], b[2]) and min(b[0], b[2]) <= max(a[0], a[2])
+                and min(a[1], a[3]) <= max(b[1], b[3]) and min(b[1], b[3]) <= max(a[1], a[3]))
+    return False
+
+
+def segment_segment_distance(a, b):
+    if segments_intersect(a, b):
+        return 0.0
+    return min(
+        point_segment_distance(a[0], a[1], *b),
+        point_segment_distance(a[2], a[3], *b),
+        point_segment_distance(b[0], b[1], *a),
+        point_segment_distance(b[2], b[3], *a),
+    )
+
+
+def segment_rect_distance(seg, rect):
+    x_min, y_min, x_max, y_max = rect
+    x1, y1, x2, y2 = seg
+    if (x_min <= x1 <= x_max and y_min <= y1 <= y_max) or \
+       (x_min <= x2 <= x_max and y_min <= y2 <= y_max):
+        return 0.0
+    edges = (
+        (x_min, y_min, x_max, y_min), (x_max, y_min, x_max, y_max),
+        (x_max, y_max, x_min, y_max), (x_min, y_max, x_min, y_min),
+    )
+    return min(segment_segment_distance(seg, e) for e in edges)
+
+
+def _polygon_edges(points):
+    n = len(points)
+    return [(points[i], points[i + 1], points[(i + 2) % n], points[(i + 3) % n])
+            for i in range(0, n, 2)]
+
+
+def point_in_polygon(px, py, points):
+    inside = False
+    for x1, y1, x2, y2 in _polygon_edges(points):
+        if (y1 > py) != (y2 > py) and px < x1 + (py - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def point_polygon_distance(px, py, points):
+    if point_in_polygon(px, py, points):
+        return 0.0
+    return min(point_segment_distance(px, py, *e) for e in _polygon_edges(points))
+
+
+def segment_polygon_distance(seg, points):
+    if point_in_polygon(seg[0], seg[1], points):
+        return 0.0
+    return min(segment_segment_distance(seg, e) for e in _polygon_edges(points))
+
+
+def distance_to_point(item, px, py):
+    """Clearance between a Copper item and a point."""
+    p = item.points
+    if item.kind == "segment":
+        return point_segment_distance(px, py, *p) - item.radius
+    if item.kind == "rect":
+        return point_rect_distance(px, py, *p)
+    if item.kind == "polygon":
+        return point_polygon_distance(px, py, p) - item.radius
+    return math.hypot(px - p[0], py - p[1]) - item.radius
+
+
+def distance_to_segment(item, seg):
+    """Clearance between a Copper item and the centreline seg=(x1, y1, x2, y2)."""
+    p = item.points
+    if item.kind == "segment":
+        return segment_segment_distance(seg, p) - item.radius
+    if item.kind == "rect":
+        return segment_rect_distance(seg, p)
+    if item.kind == "polygon":
+        return segment_polygon_distance(seg, p) - item.radius
+    return point_segment_distance(p[0], p[1], *seg) - item.radius
+
+
+def build_index(items, cell_size):
+    index = GridIndex(cell_size)
+    for item in items:
+        index.insert(item)
+    return index
@@ -13,9 +13,16 @@
 #    exec(open("path-to-script-file").read())
 
 import pcbnew
+import json
 import math
+import os
+import time
 from pcbnew import VECTOR2I, FromMM
 
+# Keep spatial.py next to this script.
+from spatial import Copper, arc_segments, build_index, distance_to_point, pad_shape
+import clearance
+
 board = pcbnew.GetBoard()
 SWITCH_COUNT = 72
 KEY_SPACING = 19.00  # Standard key spacing in mm
@@ -23,6 +30,31 @@ KEY_SPACING = 19.00  # Standard key spacing in mm
 # Retrieve footprints. Indices 0 are unused/dummy.
 switches = [board.FindFootprintByReference(f'S{i}') for i in range(SWITCH_COUNT + 1)]
 
+# Offline routing of the TMR -> MUXB sensor nets (see router.py):
+#   "export" writes ROUTING_PROBLEM_FILE next to the board,
+#   "apply" draws the routes router.py wrote to ROUTES_FILE.
+# None draws the switch tracks only.
+SENSOR_ROUTING = None
+ROUTING_PROBLEM_FILE = "routing_problem.json"
+ROUTES_FILE = "routes.json"
+ROUTING_PITCH_MM = 0.2
+CLEARANCE_MM = 0.2
+COPPER_LAYERS = ((pcbnew.F_Cu, "F.Cu"), (pcbnew.B_Cu, "B.Cu"))
+
+# GND stitching vias filling the free board area on a square grid.
+STITCH_VIAS = False
+STITCH_PITCH_MM = 5.0
+STITCH_EDGE_CLEARANCE_MM = 0.5
+
+# Check pending tracks and vias against CLEARANCE_MM before committing them.
+# With ABORT_ON_VIOLATION nothing is added to the board if any check fails.
+CHECK_CLEARANCE = True
+ABORT_ON_VIOLATION = False
+
+# Tracks and vias are collected here and added to the board together by
+# commit_tracks() once all geometry has been computed.
+PENDING_TRACKS = []
+
 
 def mm_to_nm(mm_val):
     """Converts millimeters to KiCad internal units (nanometers)."""
@@ -46,9 +78,8 @@ def rotate(V, theta):
     return VECTOR2I(int(cos * V.x - sin * V.y), int(sin * V.x + cos * V.y))
 
 
-def draw_track(R, S, net_name, width=mm_to_nm(0.2)):
+def draw_track(R, S, net_name, width=mm_to_nm(0.2), layer=pcbnew.B_Cu):
     """Draw a track from R to S."""
-    layer = pcbnew.B_Cu
     net_code = board.GetNetcodeFromNetname(net_name)
     track = pcbnew.PCB_TRACK(board)
     track.SetStart(R)
@@ -56,7 +87,7 @@ def draw_track(R, S, net_name, width=mm_to_nm(0.2)):
     track.SetWidth(width)
     track.SetLayer(layer)
     track.SetNetCode(net_code)
-    board.Add(track)
+    PENDING_TRACKS.append(track)
 
 
 def draw_via(P, net_name="GND"):
@@ -76,7 +107,23 @@ def draw_via(P, net_name="GND"):
     # Assign the net code. This is crucial for the via to properly connect
     # tracks and plane fills
     via.SetNetCode(net_code)
-    board.Add(via)
+    PENDING_TRACKS.append(via)
+
+
+def commit_tracks():
+    """Add all pending tracks and vias to the board in one pass."""
+    if CHECK_CLEARANCE and PENDING_TRACKS:
+        violations = check_pending_clearance()
+        if violations and ABORT_ON_VIOLATION:
+            print(f"Nothing committed; {len(PENDING_TRACKS)} pending tracks and vias discarded.")
+            PENDING_TRACKS.clear()
+            return 0
+    count = len(PENDING_TRACKS)
+    for item in PENDING_TRACKS:
+        board.Add(item)
+    PENDING_TRACKS.clear()
+    pcbnew.Refresh()
+    return count
 
 
 def is_equal_with_tolerance(point1, point2):
@@ -206,14 +253,305 @@ def draw_angled_tracks():
     draw_angled_tracks_inner(tmrfp, 2.5, 2, False)
 
 
-def main():
-    EXCLUDE = []
+def project_file(name):
+    """Return the path of name in the board's project directory."""
+    board_path = board.GetFileName()
+    if board_path:
+        project_dir = os.path.dirname(board_path)
+    else:
+        project_dir = os.getenv("KIPRJMOD", ".")
+    return os.path.join(project_dir, name)
+
+
+def copper_layer_names(item):
+    return [name for layer, name in COPPER_LAYERS if item.IsOnLayer(layer)]
+
 
+def sensor_nets():
+    """Return {net: (tmr_pad, mux_pad)} for nets joining one TMR output to a MUXB input."""
+    mux_pads = {}
+    for k in range(1, 9):
+        mux = board.FindFootprintByReference(f'MUXB{k}')
+        if mux:
+            for pad in mux.Pads():
+                mux_pads.setdefault(pad.GetNetname(), pad)
+
+    candidates = {}
     for i in range(1, SWITCH_COUNT + 1):
-        if switches[i] and not i in EXCLUDE:
-            draw_switch_tracks(i)
+        tmr = board.FindFootprintByReference(f'TMR{i}')
+        if not tmr:
+            continue
+        for pad in tmr.Pads():
+            net = pad.GetNetname()
+            if net in mux_pads:
+                candidates.setdefault(net, []).append(pad)
+
+    # Power nets reach every sensor; a sensor output reaches exactly one.
+    return {net: (pads[0], mux_pads[net])
+            for net, pads in candidates.items() if len(pads) == 1}
+
+
+PAD_SHAPES = {
+    pcbnew.PAD_SHAPE_CIRCLE: "circle",
+    pcbnew.PAD_SHAPE_OVAL: "oval",
+    pcbnew.PAD_SHAPE_RECT: "rect",
+    pcbnew.PAD_SHAPE_ROUNDRECT: "roundrect",
+}
+
+# Arc tracks are checked as chords no longer than this, widened by how far
+# the arc bulges past them.
+ARC_STEP_MM = 0.25
+
+
+def track_obstacles(item):
+    """Return a track, arc or via as spatial.Copper-style lists."""
+    if isinstance(item, pcbnew.PCB_VIA):
+        P = item.GetPosition()
+        return [["circle", [P.x, P.y], item.GetWidth() // 2,
+                 [name for _, name in COPPER_LAYERS], item.GetNetname()]]
+    layers = [board.GetLayerName(item.GetLayer())]
+    R, S = item.GetStart(), item.GetEnd()
+    if isinstance(item, pcbnew.PCB_ARC):
+        M = item.GetMid()
+        segments, sagitta = arc_segments((R.x, R.y), (M.x, M.y), (S.x, S.y), mm_to_nm(ARC_STEP_MM))
+        radius = item.GetWidth() / 2 + sagitta
+        return [["segment", list(seg), radius, layers, item.GetNetname()] for seg in segments]
+    return [["segment", [R.x, R.y, S.x, S.y], item.GetWidth() // 2, layers, item.GetNetname()]]
+
+
+def pad_obstacle(pad, layers):
+    """Return a pad as a spatial.Copper-style list: its own shape, rotated.
+
+    Trapezoid, chamfered and custom pads fall back to their bounding box,
+    which is conservative.
+    """
+    P, size = pad.ShapePos(), pad.GetSize()
+    shape = pad_shape(PAD_SHAPES.get(pad.GetShape()), P.x, P.y, size.x, size.y,
+                      pad.GetOrientationDegrees(), pad.GetRoundRectCornerRadius())
+    if shape is None:
+        box = pad.GetBoundingBox()
+        shape = "rect", (box.GetLeft(), box.GetTop(), box.GetRight(), box.GetBottom()), 0
+    kind, points, radius = shape
+    return [kind, list(points), radius, layers, pad.GetNetname()]
+
+
+def board_obstacles(include_pending=True):
+    """Return pads, holes, tracks and vias as spatial.Copper-style lists."""
+    all_layers = [name for _, name in COPPER_LAYERS]
+    obstacles = []
+    for fp in board.GetFootprints():
+        for pad in fp.Pads():
+            if pad.GetAttribute() == pcbnew.PAD_ATTRIB_NPTH:
+                layers = all_layers
+            else:
+                layers = copper_layer_names(pad)
+            if layers:
+                obstacles.append(pad_obstacle(pad, layers))
+
+    # Pending items are included so later passes avoid tracks not yet committed.
+    tracks = list(board.GetTracks())
+    if include_pending:
+        tracks += PENDING_TRACKS
+    for item in tracks:
+        obstacles.extend(track_obstacles(item))
+    return obstacles
+
+
+def check_pending_clearance(max_report=20):
+    """Print pending tracks and vias closer than CLEARANCE_MM to other-net copper."""
+    started = time.perf_counter()
+    copper = [Copper(k, tuple(p), r, tuple(layers), net)
+              for k, p, r, layers, net in board_obstacles(include_pending=False)]
+    pending = [Copper(k, tuple(p), r, tuple(layers), net)
+               for item in PENDING_TRACKS for k, p, r, layers, net in track_obstacles(item)]
+    violations = clearance.check(pending, copper, mm_to_nm(CLEARANCE_MM))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f"Clearance: {len(pending)} pending items checked against {len(copper)} board items, "
+          f"{len(violations)} violations in {elapsed:.0f} ms")
+    for v in violations[:max_report]:
+        x, y = v.item.points[0], v.item.points[1]
+        print(f"  {v.item.kind} {v.item.net or '<no net>'} at ({pcbnew.ToMM(x):.2f}, {pcbnew.ToMM(y):.2f}) "
+              f"{pcbnew.ToMM(v.gap):.3f} mm from {v.other.kind} {v.other.net or '<no net>'}")
+    if len(violations) > max_report:
+        print(f"  ... {len(violations) - max_report} more")
+    return violations
+
+
+def export_routing_problem():
+    """Write the sensor nets and every copper obstacle for router.py."""
+    def pin(pad):
+        P = pad.GetPosition()
+        return [P.x, P.y, copper_layer_names(pad)]
+
+    nets = sensor_nets()
+    box = board.GetBoardEdgesBoundingBox()
+    problem = {
+        "pitch": mm_to_nm(ROUTING_PITCH_MM),
+        "track_width": mm_to_nm(0.2),
+        "clearance": mm_to_nm(CLEARANCE_MM),
+        "via_diameter": mm_to_nm(0.6),
+        "via_cost": 10,
+        "layers": [name for _, name in COPPER_LAYERS],
+        "bounds": [box.GetLeft(), box.GetTop(), box.GetRight(), box.GetBottom()],
+        "obstacles": board_obstacles(),
+        "nets": [{"name": net, "pins": [pin(tmr_pad), pin(mux_pad)]}
+                 for net, (tmr_pad, mux_pad) in sorted(nets.items())],
+    }
+    file_path = project_file(ROUTING_PROBLEM_FILE)
+    with open(file_path, "w") as f:
+        json.dump(problem, f)
+    print(f"Exported {len(nets)} sensor nets to {file_path}.")
+    print(f"Route them with: python3 router.py {file_path} {project_file(ROUTES_FILE)}")
+
+
+def apply_routes():
+    """Queue the tracks and vias router.py produced."""
+    file_path = project_file(ROUTES_FILE)
+    with open(file_path) as f:
+        result = json.load(f)
+
+    for route in result["routes"]:
+        net = route["net"]
+        for x1, y1, x2, y2, layer in route["tracks"]:
+            draw_track(VECTOR2I(int(x1), int(y1)), VECTOR2I(int(x2), int(y2)), net,
+                       layer=board.GetLayerID(layer))
+        for x, y in route["vias"]:
+            draw_via(VECTOR2I(int(x), int(y)), net)
+
+    print(f"Routed {len(result['routes'])} sensor nets from {file_path}.")
+    if result["failed"]:
+        print(f"Not routed: {', '.join(result['failed'])}")
+
+
+def edge_cut_segments(max_step=mm_to_nm(0.5)):
+    """Return the Edge.Cuts outline as straight segments; curves are sampled."""
+    def sample(points):
+        return [(round(x), round(y)) for x, y in points]
+
+    segments = []
+    for shape in board.GetDrawings():
+        if not isinstance(shape, pcbnew.PCB_SHAPE) or shape.GetLayer() != pcbnew.Edge_Cuts:
+            continue
+        kind = shape.GetShape()
+        S, E = shape.GetStart(), shape.GetEnd()
+        if kind == pcbnew.SHAPE_T_SEGMENT:
+            points = [(S.x, S.y), (E.x, E.y)]
+        elif kind == pcbnew.SHAPE_T_RECT:
+            points = [(S.x, S.y), (E.x, S.y), (E.x, E.y), (S.x, E.y), (S.x, S.y)]
+        elif kind in (pcbnew.SHAPE_T_ARC, pcbnew.SHAPE_T_CIRCLE):
+            C, radius = shape.GetCenter(), shape.GetRadius()
+            if kind == pcbnew.SHAPE_T_ARC:
+                start = math.atan2(S.y - C.y, S.x - C.x)
+                sweep = math.radians(shape.GetArcAngle().AsDegrees())
+            else:
+                start, sweep = 0.0, 2 * math.pi
+            n = max(2, int(abs(sweep) * radius / max_step) + 1)
+            points = [(C.x + radius * math.cos(start + sweep * i / n),
+                       C.y + radius * math.sin(start + sweep * i / n)) for i in range(n + 1)]
+        elif kind == pcbnew.SHAPE_T_BEZIER:
+            P = [S, shape.GetBezierC1(), shape.GetBezierC2(), E]
+            n = max(2, int((P[0] - P[1]).EuclideanNorm() + (P[1] - P[2]).EuclideanNorm()
+                           + (P[2] - P[3]).EuclideanNorm()) // max_step)
+            points = []
+            for i in range(n + 1):
+                t = i / n
+                a, b, c, d = (1 - t) ** 3, 3 * t * (1 - t) ** 2, 3 * t * t * (1 - t), t ** 3
+                points.append((a * P[0].x + b * P[1].x + c * P[2].x + d * P[3].x,
+                               a * P[0].y + b * P[1].y + c * P[2].y + d * P[3].y))
+        else:
+            continue
+        points = sample(points)
+        segments.extend((*a, *b) for a, b in zip(points, points[1:]) if a != b)
+    return segments
+
+
+def inside_intervals(segments, rows):
+    """Return {y: [(x_in, x_out), ...]} of the outline interior along each row.
+
+    Every edge is visited once and only for the rows it spans, so the cost is
+    proportional to edges plus crossings, not edges times rows. Even-odd
+    filling makes cutouts and holes in the outline come out as gaps.
+    """
+    y0, step, count = rows
+    crossings = [[] for _ in range(count)]
+    for x1, y1, x2, y2 in segments:
+        if y1 == y2:
+            continue
+        low, high = min(y1, y2), max(y1, y2)
+        first = max(0, math.ceil((low - y0) / step))
+        last = min(count - 1, math.ceil((high - y0) / step) - 1)
+        for j in range(first, last + 1):
+            y = y0 + j * step
+            if low <= y < high:
+                crossings[j].append(x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+    intervals = {}
+    for j, xs in enumerate(crossings):
+        xs.sort()
+        intervals[y0 + j * step] = list(zip(xs[0::2], xs[1::2]))
+    return intervals
+
+
+def draw_stitching_vias(pitch_mm=STITCH_PITCH_MM, net_name="GND"):
+    """Queue GND vias on a pitch_mm grid wherever the board has room for them."""
+    started = time.perf_counter()
+    pitch = mm_to_nm(pitch_mm)
+    via_radius = mm_to_nm(0.6) // 2
+    clearance_nm = mm_to_nm(CLEARANCE_MM)
+    edge_reach = via_radius + mm_to_nm(STITCH_EDGE_CLEARANCE_MM)
+    copper_reach = via_radius + clearance_nm
+
+    copper = build_index(
+        (Copper(k, tuple(p), r, tuple(layers), net)
+         for k, p, r, layers, net in board_obstacles()),
+        cell_size=pitch,
+    )
+    edges = edge_cut_segments()
+    edge_index = build_index(
+        (Copper("segment", e, 0, (), "") for e in edges), cell_size=pitch)
+
+    box = board.GetBoardEdgesBoundingBox()
+    x0, y0 = box.GetLeft() + pitch // 2, box.GetTop() + pitch // 2
+    rows = (y0, pitch, max(0, (box.GetBottom() - y0) // pitch + 1))
+
+    candidates = accepted = 0
+    for y, spans in inside_intervals(edges, rows).items():
+        for x_in, x_out in spans:
+            x = x0 + math.ceil((x_in - x0) / pitch) * pitch
+            while x <= x_out:
+                candidates += 1
+                if all(distance_to_point(e, x, y) >= edge_reach
+                       for e in edge_index.near(x, y, edge_reach)) and \
+                   all(distance_to_point(c, x, y) >= copper_reach
+                       or (c.kind == "segment" and c.net == net_name)
+                       for c in copper.near(x, y, copper_reach)):
+                    draw_via(VECTOR2I(int(x), int(y)), net_name)
+                    accepted += 1
+                x += pitch
+
+    print(f"Stitching: {accepted} of {candidates} candidate {net_name} vias accepted "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return accepted
 
-    pcbnew.Refresh()
+
+def main():
+    if SENSOR_ROUTING == "export":
+        export_routing_problem()
+        return
+
+    if SENSOR_ROUTING == "apply":
+        apply_routes()
+    else:
+        EXCLUDE = []
+
+        for i in range(1, SWITCH_COUNT + 1):
+            if switches[i] and not i in EXCLUDE:
+                draw_switch_tracks(i)
+
+    if STITCH_VIAS:
+        draw_stitching_vias()
+
+    commit_tracks()
 
 
 main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Structural diff of two .kicad_pcb files
+
+"""Compare two boards by footprint and graphic, not by text.
+
+    python3 boarddiff.py swplate/swplate.kicad_pcb            # vs .history copy
+    python3 boarddiff.py old.kicad_pcb new.kicad_pcb [-v] [--json]
+
+Footprints are matched by reference and reported as moved, rotated, flipped,
+added or removed. Graphics are matched by a geometry key: kind, layer and
+points rounded to 0.1 um, with the point order normalized so a reversed line
+or curve is the same shape. Leftovers within 1 um of each other are treated
+as equal, then unmatched graphics that share a uuid are reported as changed,
+the rest as added or removed. Every pass is a dictionary lookup,
+linear in the size of the boards, and the parsed boards come from boardq.py's
+sidecar cache.
+
+Exit status is 0 when the boards match, 1 when they differ, like diff.
+"""
+
+import argparse
+import collections
+import json
+import math
+import sys
+from pathlib import Path
+
+import boardq
+import pcbfile
+
+ROUND = 4  # decimals of a mm
+TOLERANCE = 0.001  # mm; closer shapes are the same shape
+
+
+def shape_key(shape, digits=ROUND):
+    points = tuple((round(x, digits), round(y, digits)) for x, y in shape.points)
+    if shape.kind in ("gr_line", "gr_arc", "gr_curve"):
+        points = min(points, points[::-1])
+    return (shape.kind, shape.layer, points)
+
+
+def _normalized(shape):
+    points = shape.points
+    if shape.kind in ("gr_line", "gr_arc", "gr_curve"):
+        points = min(tuple(points), tuple(points[::-1]))
+    return points
+
+
+def _drop_near_matches(added, removed, tolerance=TOLERANCE):
+    """Treat added/removed pairs within tolerance (mm) of each other as unchanged.
+
+    Exact keys miss shapes that moved by a nanometer across a rounding
+    boundary. Removed shapes are bucketed on a tolerance grid by their first
+    point, so each added shape only checks the 3x3 neighbouring cells.
+    """
+    if not added or not removed:
+        return added, removed
+    cell = lambda x, y: (int(x // tolerance), int(y // tolerance))
+    grid = collections.defaultdict(list)
+    for shape in removed:
+        points = _normalized(shape)
+        if points:
+            grid[(shape.kind, shape.layer, cell(*points[0]))].append((shape, points))
+
+    matched, still_added = set(), []
+    for shape in added:
+        points = _normalized(shape)
+        hit = None
+        if points:
+            i, j = cell(*points[0])
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    for candidate, other in grid.get((shape.kind, shape.layer, (i + di, j + dj)), ()):
+                        if id(candidate) not in matched and len(other) == len(points) and all(
+                                abs(a[0] - b[0]) <= tolerance and abs(a[1] - b[1]) <= tolerance
+                                for a, b in zip(points, other)):
+                            hit = candidate
+                            break
+                    if hit:
+                        break
+                if hit:
+                    break
+        if hit is None:
+            still_added.append(shape)
+        else:
+            matched.add(id(hit))
+    return still_added, [s for s in removed if id(s) not in matched]
+
+
+def diff_footprints(old, new):
+    diff = {"moved": [], "rotated": [], "flipped": [], "added": [], "removed": []}
+    old = {fp.ref: fp for fp in old}
+    for fp in new:
+        before = old.pop(fp.ref, None)
+        if before is None:
+            diff["added"].append(fp.ref)
+            continue
+        if (round(before.x, ROUND), round(before.y, ROUND)) != (round(fp.x, ROUND), round(fp.y, ROUND)):
+            diff["moved"].append(fp.ref)
+        if abs((before.angle - fp.angle + 180) % 360 - 180) > 1e-6:
+            diff["rotated"].append(fp.ref)
+        if before.layer != fp.layer:
+            diff["flipped"].append(fp.ref)
+    diff["removed"] = list(old)
+    return diff
+
+
+def diff_shapes(old, new, tolerance=TOLERANCE):
+    """Return {"added": [...], "removed": [...], "changed": [(old, new), ...]}.
+
+    Keys are rounded finely enough that rounding never hides a difference
+    larger than tolerance (mm).
+    """
+    digits = max(ROUND, math.ceil(round(-math.log10(tolerance), 6)))
+    pool = collections.defaultdict(list)
+    for shape in old:
+        pool[shape_key(shape, digits)].append(shape)
+    added = []
+    for shape in new:
+        matches = pool.get(shape_key(shape, digits))
+        if matches:
+            matches.pop()
+        else:
+            added.append(shape)
+    removed = [shape for shapes in pool.values() for shape in shapes]
+    added, removed = _drop_near_matches(added, removed, tolerance)
+
+    removed_by_uuid = {shape.uuid: shape for shape in removed if shape.uuid}
+    changed, still_added = [], []
+    for shape in added:
+        before = removed_by_uuid.pop(shape.uuid, None) if shape.uuid else None
+        if before is None:
+            still_added.append(shape)
+        else:
+            changed.append((before, shape))
+    paired = {id(before) for before, _ in changed}
+    return {"added": still_added,
+            "removed": [s for s in removed if id(s) not in paired],
+            "changed": changed}
+
+
+def history_copy(board):
+    return board.parent / ".history" / board.name
+
+
+def load(board):
+    data = boardq.index(Path(board))
+    return (list(map(pcbfile.Footprint._make, data["footprints"])),
+            [pcbfile.Shape._make([kind, layer, tuple(map(tuple, points)), width, uuid])
+             for kind, layer, points, width, uuid in data["shapes"]])
+
+
+def diff_boards(old_board, new_board):
+    old_fps, old_shapes = load(old_board)
+    new_fps, new_shapes = load(new_board)
+    return diff_footprints(old_fps, new_fps), diff_shapes(old_shapes, new_shapes)
+
+
+def _points(shape):
+    return " ".join(f"({x:g} {y:g})" for x, y in shape.points)
+
+
+def report(fp_diff, shape_diff, verbose=False):
+    for kind, refs in fp_diff.items():
+        if refs:
+            print(f"footprints {kind:>8}: {len(refs):>4}  {', '.join(refs)}")
+
+    per_layer = collections.defaultdict(collections.Counter)
+    for kind in ("added", "removed"):
+        for shape in shape_diff[kind]:
+            per_layer[shape.layer][kind] += 1
+    for before, _ in shape_diff["changed"]:
+        per_layer[before.layer]["changed"] += 1
+    for layer, counts in sorted(per_layer.items()):
+        summary = ", ".join(f"{counts[k]} {k}" for k in ("changed", "added", "removed") if counts[k])
+        print(f"shapes {layer:<12} {summary}")
+
+    if verbose:
+        for before, after in shape_diff["changed"]:
+            print(f"  ~ {before.kind} {before.layer} {_points(before)} -> {_points(after)}")
+        for shape in shape_diff["added"]:
+            print(f"  + {shape.kind} {shape.layer} {_points(shape)}")
+        for shape in shape_diff["removed"]:
+            print(f"  - {shape.kind} {shape.layer} {_points(shape)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("boards", nargs="+", type=Path,
+                        help="NEW (compared with .history/NEW), or OLD NEW")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list every changed shape")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if len(args.boards) == 1:
+        new = args.boards[0]
+        old = history_copy(new)
+        if not old.exists():
+            parser.error(f"{old} not found; give OLD and NEW")
+    elif len(args.boards) == 2:
+        old, new = args.boards
+    else:
+        parser.error("expected one or two boards")
+
+    fp_diff, shape_diff = diff_boards(old, new)
+    if args.json:
+        print(json.dumps({
+            "old": str(old), "new": str(new), "footprints": fp_diff,
+            "shapes": {"added": [s._asdict() for s in shape_diff["added"]],
+                       "removed": [s._asdict() for s in shape_diff["removed"]],
+                       "changed": [[a._asdict(), b._asdict()] for a, b in shape_diff["changed"]]},
+        }))
+    else:
+        print(f"--- {old}\n+++ {new}")
+        report(fp_diff, shape_diff, args.verbose)
+
+    different = any(fp_diff.values()) or any(shape_diff.values())
+    if not different and not args.json:
+        print("No structural differences.")
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
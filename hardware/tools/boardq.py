@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Query footprints, shapes and nets of .kicad_pcb files without KiCad
+
+"""Query .kicad_pcb files from the command line.
+
+    python3 boardq.py fp S65                      # every board
+    python3 boardq.py fp 'TMR*' -b ../nRF54LM20_TMR2615/swplate/swplate.kicad_pcb
+    python3 boardq.py shapes --layer BL_User_5 -b .../swplate.kicad_pcb
+    python3 boardq.py nets 'ROW*'
+    python3 boardq.py layers
+
+Patterns are shell-style (fnmatch). Without -b every board under hardware/ is
+searched, .history copies included.
+
+The parsed footprints, shapes and nets of each board are cached in a sidecar
+file .<stem>.boardq.json next to it. The cache is used while the board's
+mtime and size are unchanged; otherwise the board is hashed, and only a
+different sha256 causes a re-parse.
+"""
+
+import argparse
+import collections
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pcbfile
+import sexpr
+
+CACHE_VERSION = 3
+
+
+def cache_path(board):
+    return board.with_name(f".{board.stem}.boardq.json")
+
+
+def sha256(board):
+    return hashlib.sha256(board.read_bytes()).hexdigest()
+
+
+def parse(board):
+    with sexpr.load(board) as doc:
+        return {
+            "footprints": [list(fp) for fp in pcbfile.footprints(doc)],
+            "shapes": [list(s) for s in pcbfile.shapes(doc)],
+            "fp_shapes": [list(s) for s in pcbfile.footprint_shapes(doc)],
+            "drills": [list(d) for d in pcbfile.drills(doc)],
+            "nets": pcbfile.nets(doc),
+            "thickness": pcbfile.thickness(doc),
+        }
+
+
+def index(board):
+    """Return the cached index of board, re-parsing only if its content changed."""
+    stat = board.stat()
+    sidecar = cache_path(board)
+    cached = None
+    try:
+        with open(sidecar) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if cached and cached.get("version") == CACHE_VERSION:
+        if cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached
+        digest = sha256(board)
+        if cached["sha256"] == digest:
+            cached.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write(sidecar, cached)
+            return cached
+    else:
+        digest = sha256(board)
+
+    data = {"version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size, "sha256": digest, **parse(board)}
+    _write(sidecar, data)
+    return data
+
+
+def _write(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        # Read-only checkout: answer the query without caching.
+        pass
+
+
+def query_fp(board, data, args):
+    for fp in map(pcbfile.Footprint._make, data["footprints"]):
+        if fnmatch.fnmatchcase(fp.ref, args.pattern):
+            yield fp._asdict(), f"{fp.ref:<8} {fp.x:>10.3f} {fp.y:>10.3f} {fp.angle:>8.2f}  {fp.layer:<5} {fp.lib}"
+
+
+def query_shapes(board, data, args):
+    layer = pcbfile.layer_name(args.layer) if args.layer else None
+    for s in map(pcbfile.Shape._make, data["shapes"]):
+        if (layer is None or s.layer == layer) and fnmatch.fnmatchcase(s.kind, args.pattern):
+            points = " ".join(f"({x:g} {y:g})" for x, y in s.points)
+            yield s._asdict(), f"{s.kind:<9} {s.layer:<10} {points}"
+
+
+def query_nets(board, data, args):
+    for net, pads in sorted(data["nets"].items()):
+        if fnmatch.fnmatchcase(net, args.pattern):
+            yield {"net": net, "pads": pads}, f"{net:<40} {' '.join(pads)}"
+
+
+def query_layers(board, data, args):
+    counts = collections.Counter(s[1] for s in data["shapes"])
+    for layer, count in sorted(counts.items()):
+        if fnmatch.fnmatchcase(layer, args.pattern):
+            yield {"layer": layer, "shapes": count}, f"{layer:<12} {count:>5} shapes"
+
+
+QUERIES = {"fp": query_fp, "shapes": query_shapes, "nets": query_nets, "layers": query_layers}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("what", choices=QUERIES)
+    parser.add_argument("pattern", nargs="?", default="*",
+                        help="reference, shape kind, net or layer pattern")
+    parser.add_argument("-b", "--board", action="append", type=Path,
+                        help="board file (repeatable); default: every board in hardware/")
+    parser.add_argument("--layer", help="shapes on this layer only, e.g. Edge.Cuts or BL_User_5")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per result")
+    args = parser.parse_args()
+
+    boards = args.board or sexpr.repo_boards()
+    found = 0
+    for board in boards:
+        try:
+            data = index(board)
+        except (OSError, sexpr.SexprError) as e:
+            print(f"{board}: {e}", file=sys.stderr)
+            continue
+        results = list(QUERIES[args.what](board, data, args))
+        if not results:
+            continue
+        found += len(results)
+        if args.json:
+            for record, _ in results:
+                print(json.dumps({"board": str(board), **record}))
+        else:
+            if len(boards) > 1:
+                print(f"== {board}")
+            for _, line in results:
+                print(line)
+    return 0 if found else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Tangent (G1) and curvature (G2) continuity at the joins of board outlines
+
+"""Report the tangent angle and curvature jump at every join of an outline.
+
+    python3 variants.py nRF54LM20_TMR2615        # writes build/variants/.../swplate.kicad_pcb
+    python3 continuity.py build/variants/nRF54LM20_TMR2615/swplate/swplate.kicad_pcb --layer User.5
+    python3 continuity.py botcover_edge_cuts.json --all
+
+Outlines are edgecuts.py records (from a board, or its JSON output) chained
+end to end by wires.py. At every join the direction and signed curvature
+leaving the first edge are compared with those entering the next: lines
+have zero curvature, arcs 1/r, Beziers |B' x B''| / |B'|^3 at t = 0 or 1.
+All ends are evaluated at once with NumPy.
+
+A join is G1 when its tangent angle is below --g1 degrees, and G2 when its
+curvature also jumps by less than --g2 (1/mm). A join turning more than
+--corner degrees is a deliberate corner. Anything between is a kink: a
+near-tangent join a hand-set handle length missed, which shows on a
+finished surface. Kinks are listed (every join with --all) and make the
+exit status 1.
+
+bezier_ends() and join_metrics() take arrays with leading batch dimensions,
+so a sweep can evaluate many candidate handle lengths in one call.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import edgecuts
+import wires
+
+G1_DEGREES = 0.01
+G2_PER_MM = 1e-3
+CORNER_DEGREES = 5.0
+
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def bezier_ends(P):
+    """Directions and signed curvatures at both ends of cubic Beziers.
+
+    P has shape (..., 8): x0 y0 x1 y1 x2 y2 x3 y3. Returns (start_dir,
+    start_k, end_dir, end_k) with directions of shape (..., 2), unit
+    length, in the direction of travel. A zero-length handle leaves the
+    direction to the next control point and the curvature NaN.
+    """
+    P = np.asarray(P, dtype=float)
+    P = P.reshape(P.shape[:-1] + (4, 2))
+    p0, p1, p2, p3 = P[..., 0, :], P[..., 1, :], P[..., 2, :], P[..., 3, :]
+    d0, dd0 = 3 * (p1 - p0), 6 * (p0 - 2 * p1 + p2)
+    d1, dd1 = 3 * (p3 - p2), 6 * (p1 - 2 * p2 + p3)
+    return (*_direction_curvature(d0, dd0, p2 - p0), *_direction_curvature(d1, dd1, p3 - p1))
+
+
+def _direction_curvature(d, dd, fallback):
+    speed = np.hypot(d[..., 0], d[..., 1])
+    degenerate = speed < 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(degenerate, np.nan, _cross(d, dd) / speed ** 3)
+    d = np.where(degenerate[..., None], fallback, d)
+    length = np.hypot(d[..., 0], d[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return d / length[..., None], k
+
+
+def _arc_ends(S, M, E):
+    """Arcs through start S, mid M and end E, arrays of shape (n, 2)."""
+    (x1, y1), (x2, y2), (x3, y3) = S.T, M.T, E.T
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    ux = ((x1 * x1 + y1 * y1) * (y2 - y3) + (x2 * x2 + y2 * y2) * (y3 - y1) + (x3 * x3 + y3 * y3) * (y1 - y2)) / d
+    uy = ((x1 * x1 + y1 * y1) * (x3 - x2) + (x2 * x2 + y2 * y2) * (x1 - x3) + (x3 * x3 + y3 * y3) * (x2 - x1)) / d
+    center = np.stack([ux, uy], axis=-1)
+    sense = np.sign(_cross(M - S, E - M))  # +1 when the angle grows from S to E
+    radius = np.hypot(*(S - center).T)
+
+    def tangent(p):
+        r = p - center
+        t = np.stack([-r[:, 1], r[:, 0]], axis=-1) * sense[:, None]
+        return t / np.hypot(*t.T)[:, None]
+
+    k = sense / radius
+    return tangent(S), k, tangent(E), k
+
+
+def end_states(records):
+    """Per record: (start_dir, start_k, end_dir, end_k), arrays over records.
+
+    Only lines, arcs and Beziers have ends; other records get NaN.
+    """
+    n = len(records)
+    start_dir, end_dir = np.full((n, 2), np.nan), np.full((n, 2), np.nan)
+    start_k, end_k = np.full(n, np.nan), np.full(n, np.nan)
+    by_type = {}
+    for i, r in enumerate(records):
+        by_type.setdefault(r["type"], []).append(i)
+
+    if "line" in by_type:
+        idx = np.array(by_type["line"])
+        v = np.array([[*records[i]["start"], *records[i]["end"]] for i in idx], dtype=float)
+        d = v[:, 2:] - v[:, :2]
+        d /= np.hypot(*d.T)[:, None]
+        start_dir[idx], end_dir[idx], start_k[idx], end_k[idx] = d, d, 0.0, 0.0
+    if "arc" in by_type:
+        idx = np.array(by_type["arc"])
+        v = np.array([[*records[i]["start"], *records[i]["mid"], *records[i]["end"]] for i in idx], dtype=float)
+        start_dir[idx], start_k[idx], end_dir[idx], end_k[idx] = _arc_ends(v[:, 0:2], v[:, 2:4], v[:, 4:6])
+    if "bezier" in by_type:
+        idx = np.array(by_type["bezier"])
+        v = np.array([[*records[i]["p0"], *records[i]["p1"], *records[i]["p2"], *records[i]["p3"]]
+                      for i in idx], dtype=float)
+        start_dir[idx], start_k[idx], end_dir[idx], end_k[idx] = bezier_ends(v)
+    return start_dir, start_k, end_dir, end_k
+
+
+def join_metrics(dir_in, k_in, dir_out, k_out):
+    """Tangent angle (degrees, 0 to 180) and curvature jump (1/mm) at joins."""
+    angle = np.degrees(np.abs(np.arctan2(_cross(dir_in, dir_out), (dir_in * dir_out).sum(axis=-1))))
+    return angle, np.abs(k_out - k_in)
+
+
+def analyze(records, tolerance=wires.TOLERANCE):
+    """Chain records and measure every join; return a dict of arrays.
+
+    Keys: point (n, 2), angle (degrees), jump (1/mm), k_in, k_out and
+    loop (index of the loop or open chain the join belongs to).
+    """
+    loops, open_chains = wires.chain(records, tolerance)
+    edges, pairs, owner = [], [], []
+    for number, (path, closed) in enumerate([(loop, True) for loop in loops] +
+                                            [(path, False) for path in open_chains]):
+        if path[0]["type"] not in wires._ENDS:
+            continue  # circles, rectangles and polygons have no joins
+        base = len(edges)
+        edges += path
+        count = len(path)
+        for i in range(count if closed else count - 1):
+            pairs.append((base + i, base + (i + 1) % count))
+            owner.append(number)
+
+    result = {"point": np.zeros((0, 2)), "angle": np.zeros(0), "jump": np.zeros(0),
+              "k_in": np.zeros(0), "k_out": np.zeros(0), "loop": np.zeros(0, dtype=int)}
+    if not pairs:
+        return result
+    start_dir, start_k, end_dir, end_k = end_states(edges)
+    a, b = np.array(pairs).T
+    angle, jump = join_metrics(end_dir[a], end_k[a], start_dir[b], start_k[b])
+    result.update(
+        point=np.array([edges[i][wires._ENDS[edges[i]["type"]][0]] for i in b], dtype=float),
+        angle=angle, jump=jump, k_in=end_k[a], k_out=start_k[b], loop=np.array(owner))
+    return result
+
+
+def classify(result, g1=G1_DEGREES, g2=G2_PER_MM, corner=CORNER_DEGREES):
+    """Return a label per join: "G2", "G1", "kink" or "corner"."""
+    angle, jump = result["angle"], result["jump"]
+    labels = np.full(len(angle), "kink", dtype=object)
+    labels[angle > corner] = "corner"
+    smooth = angle <= g1
+    labels[smooth] = "G1"
+    labels[smooth & (jump <= g2)] = "G2"
+    return labels
+
+
+def load(path, layers):
+    if Path(path).suffix == ".json":
+        with open(path) as f:
+            return json.load(f)
+    return edgecuts.export(path, layers)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help=".kicad_pcb or edgecuts.py JSON")
+    parser.add_argument("--layer", action="append", help="repeatable (default Edge.Cuts)")
+    parser.add_argument("--g1", type=float, default=G1_DEGREES, help="degrees")
+    parser.add_argument("--g2", type=float, default=G2_PER_MM, help="curvature jump, 1/mm")
+    parser.add_argument("--corner", type=float, default=CORNER_DEGREES, help="degrees")
+    parser.add_argument("--all", action="store_true", help="list every join, not just kinks")
+    args = parser.parse_args()
+
+    records = load(args.source, args.layer or ["Edge.Cuts"])
+    started = time.perf_counter()
+    result = analyze(records)
+    labels = classify(result, args.g1, args.g2, args.corner)
+    seconds = time.perf_counter() - started
+
+    print(f"{'x':>10} {'y':>10} {'angle':>10} {'k in':>10} {'k out':>10} {'jump':>10}  join")
+    for i in range(len(labels)):
+        if args.all or labels[i] == "kink":
+            (x, y), k_in, k_out = result["point"][i], result["k_in"][i], result["k_out"][i]
+            print(f"{x:>10.3f} {y:>10.3f} {result['angle'][i]:>10.4f} {k_in:>10.4f} {k_out:>10.4f} "
+                  f"{result['jump'][i]:>10.4f}  {labels[i]}")
+    counts = {label: int((labels == label).sum()) for label in ("G2", "G1", "kink", "corner")}
+    print(f"{len(labels)} joins: " + ", ".join(f"{n} {label}" for label, n in counts.items())
+          + f" in {seconds * 1000:.1f} ms")
+    return 1 if counts["kink"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
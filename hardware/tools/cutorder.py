@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Order closed contours for laser/CNC cutting and export them as DXF
+
+"""Order the closed contours of a part to shorten the cutter's travel.
+
+    python3 cutorder.py ../archive/nRF54L15_TMR2615_sm_kailh/botcover/botcover.kicad_pcb \\
+        --layer Edge.Cuts --layer User.5 -o botcover_cut.dxf
+
+Contours come from edgecuts.py and wires.py. They are cut deepest first:
+hexagons, rivet and screw holes before the outline around them, so a part
+never drops out of the sheet before its holes are cut. Within each depth the
+order is built by nearest neighbour, using a grid over the contours' start
+points, then improved by 2-opt until no reversal shortens the tour. Every
+contour is finally entered at its vertex nearest to where the cutter is.
+
+Travel is the rapid (non-cutting) distance from the origin through every
+contour entry; it is reported for the file order and for the new one. The
+DXF holds the contours in cutting order with true arcs and splines, in mm,
+with Y up as KiCad plots it. Writing DXF needs ezdxf.
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import edgecuts
+import wires
+
+CELL = 10.0  # mm; grid cell for the nearest-neighbour search
+
+
+def entry_points(loop):
+    """Candidate entry points of a loop: where its edges start."""
+    if loop[0]["type"] in wires._ENDS:
+        return [tuple(record[wires._ENDS[record["type"]][0]]) for record in loop]
+    return [wires.polyline(loop)[0]]
+
+
+def rotate(loop, index):
+    """The same loop, cut starting at edge index."""
+    return loop[index:] + loop[:index]
+
+
+class _Grid:
+    """Points bucketed by cell, removed once visited."""
+
+    def __init__(self, points):
+        self.points = points
+        self.cells = {}
+        for i, (x, y) in enumerate(points):
+            self.cells.setdefault((int(x // CELL), int(y // CELL)), set()).add(i)
+        self.left = len(points)
+
+    def pop_nearest(self, x, y):
+        cx, cy = int(x // CELL), int(y // CELL)
+        best, best_d = None, math.inf
+        ring = 0
+        while self.left:
+            for i in range(cx - ring, cx + ring + 1):
+                for j in range(cy - ring, cy + ring + 1):
+                    if ring and cx - ring < i < cx + ring and cy - ring < j < cy + ring:
+                        continue  # inner cells were searched in earlier rings
+                    for k in self.cells.get((i, j), ()):
+                        px, py = self.points[k]
+                        d = math.hypot(px - x, py - y)
+                        if d < best_d:
+                            best, best_d = k, d
+            # A point in ring r is at least (r - 1) * CELL away from (x, y)
+            # along some axis, so stop once the best beats the next ring.
+            if best is not None and best_d <= ring * CELL:
+                break
+            ring += 1
+        self.cells[(int(self.points[best][0] // CELL), int(self.points[best][1] // CELL))].discard(best)
+        self.left -= 1
+        return best
+
+
+def nearest_neighbour(points, start):
+    grid = _Grid(points)
+    order, (x, y) = [], start
+    while grid.left:
+        k = grid.pop_nearest(x, y)
+        order.append(k)
+        x, y = points[k]
+    return order
+
+
+def tour_length(points, order, start):
+    total, here = 0.0, start
+    for k in order:
+        total += math.dist(here, points[k])
+        here = points[k]
+    return total
+
+
+def two_opt(points, order, start):
+    """Reverse segments of the open tour from start while that shortens it."""
+    pts = list(points) + [start]
+    tour = [len(points)] + list(order)
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            a, b = pts[tour[i]], pts[tour[i + 1]]
+            for j in range(i + 2, n):
+                c = pts[tour[j]]
+                before, after = math.dist(a, b), math.dist(a, c)
+                if j + 1 < n:
+                    d = pts[tour[j + 1]]
+                    before += math.dist(c, d)
+                    after += math.dist(b, d)
+                if after < before - 1e-9:
+                    tour[i + 1:j + 1] = tour[j:i:-1]
+                    b = pts[tour[i + 1]]
+                    improved = True
+    return tour[1:]
+
+
+def plan(loops, start=(0.0, 0.0)):
+    """Return (ordered loops, travel in file order, travel after ordering)."""
+    shapes = wires.classify(loops)
+    file_points = [entry_points(loop)[0] for loop in loops]
+    before = tour_length(file_points, range(len(loops)), start)
+
+    ordered, here = [], start
+    for depth in sorted({s["depth"] for s in shapes}, reverse=True):
+        group = [s["loop"] for s in shapes if s["depth"] == depth]
+        points = [_centroid(entry_points(loop)) for loop in group]
+        order = two_opt(points, nearest_neighbour(points, here), here)
+        for k in order:
+            loop = group[k]
+            candidates = entry_points(loop)
+            best = min(range(len(candidates)), key=lambda i: math.dist(here, candidates[i]))
+            ordered.append(rotate(loop, best) if loop[0]["type"] in wires._ENDS else loop)
+            here = candidates[best]
+    after = tour_length([entry_points(loop)[0] for loop in ordered], range(len(ordered)), start)
+    return ordered, before, after
+
+
+def _centroid(points):
+    return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+def _flip(point):
+    return (point[0], -point[1])
+
+
+def _arc(msp, record, attribs):
+    (x1, y1), (x2, y2), (x3, y3) = map(_flip, (record["start"], record["mid"], record["end"]))
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if abs(d) < 1e-12:
+        msp.add_line((x1, y1), (x3, y3), dxfattribs=attribs)
+        return
+    ux = ((x1 * x1 + y1 * y1) * (y2 - y3) + (x2 * x2 + y2 * y2) * (y3 - y1) + (x3 * x3 + y3 * y3) * (y1 - y2)) / d
+    uy = ((x1 * x1 + y1 * y1) * (x3 - x2) + (x2 * x2 + y2 * y2) * (x1 - x3) + (x3 * x3 + y3 * y3) * (x2 - x1)) / d
+    a1, a2, a3 = (math.degrees(math.atan2(y - uy, x - ux)) for x, y in ((x1, y1), (x2, y2), (x3, y3)))
+    # DXF arcs run counterclockwise; swap the ends if the mid point says otherwise.
+    if (a2 - a1) % 360 > (a3 - a1) % 360:
+        a1, a3 = a3, a1
+    msp.add_arc((ux, uy), math.hypot(x1 - ux, y1 - uy), a1, a3, dxfattribs=attribs)
+
+
+def write_dxf(path, loops, layer="Cut"):
+    import ezdxf
+
+    doc = ezdxf.new(units=ezdxf.units.MM)
+    doc.layers.add(layer)
+    add_loops(doc.modelspace(), loops, layer)
+    doc.saveas(path)
+
+
+def add_loops(msp, loops, layer):
+    """Add loops to an ezdxf layout on layer, Y flipped."""
+    attribs = {"layer": layer}
+    for loop in loops:
+        for record in loop:
+            kind = record["type"]
+            if kind == "line":
+                msp.add_line(_flip(record["start"]), _flip(record["end"]), dxfattribs=attribs)
+            elif kind == "arc":
+                _arc(msp, record, attribs)
+            elif kind == "bezier":
+                points = [_flip(record[k]) for k in ("p0", "p1", "p2", "p3")]
+                msp.add_open_spline(points, degree=3, dxfattribs=attribs)
+            elif kind == "circle":
+                msp.add_circle(_flip(record["center"]), record["radius"], dxfattribs=attribs)
+            elif kind == "rectangle":
+                (x1, y1), (x2, y2) = _flip(record["start"]), _flip(record["end"])
+                msp.add_lwpolyline([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], close=True,
+                                   dxfattribs=attribs)
+            elif kind == "polygon":
+                msp.add_lwpolyline([_flip(p) for p in record["outlines"][0]], close=True,
+                                   dxfattribs=attribs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("board", type=Path)
+    parser.add_argument("--layer", action="append", help="repeatable (default Edge.Cuts)")
+    parser.add_argument("-o", "--output", type=Path, help="DXF to write in cutting order")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loops, open_chains = wires.chain(edgecuts.export(args.board, args.layer or ["Edge.Cuts"]))
+    if open_chains:
+        print(f"{len(open_chains)} open outlines are not cut", file=sys.stderr)
+    ordered, before, after = plan(loops)
+    seconds = time.perf_counter() - started
+    saved = 100 * (before - after) / before if before else 0.0
+    holes = sum(s["depth"] % 2 for s in wires.classify(loops))
+    print(f"{len(ordered)} contours ({holes} holes, {len(ordered) - holes} outlines), "
+          f"travel {before:.0f} mm -> {after:.0f} mm "
+          f"({saved:.0f}% less) in {seconds:.2f}s")
+    if args.output:
+        write_dxf(args.output, ordered)
+        print(f"{args.output}: written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
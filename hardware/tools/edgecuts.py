@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Export board graphics to the JSON rebuild_board.py reads
+
+"""Export the graphics on one or more layers of a .kicad_pcb as JSON.
+
+    python3 edgecuts.py botcover/botcover.kicad_pcb            # botcover_edge_cuts.json
+    python3 edgecuts.py swplate/swplate.kicad_pcb --layer User.5 -o plate.json
+
+The output is the list rebuild_board.py builds a sketch from, coordinates in
+mm as in the board:
+
+    {"type": "line", "start": [x, y], "end": [x, y]}
+    {"type": "arc", "start": ..., "mid": ..., "end": ...}
+    {"type": "circle", "center": [x, y], "radius": r}
+    {"type": "rectangle", "start": ..., "end": ...}
+    {"type": "bezier", "p0": ..., "p1": ..., "p2": ..., "p3": ...}
+    {"type": "polygon", "outlines": [[[x, y], ...]]}
+
+Graphics inside footprints (switch cutouts, hole outlines) are placed in
+board coordinates like the board's own. With Edge.Cuts, every non-plated
+pad drill that goes through material is cut too: a circle, or two lines
+and two arcs for a slot (--no-drills leaves them out). Drills off the
+board or inside a cutout are skipped.
+
+The board is read through boardq.py's sidecar cache, so it is parsed again
+only when its sha256 changes, and the JSON is only rewritten when it would
+differ.
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+import boardq
+import pcbfile
+import wires
+
+
+def record(shape):
+    p = [list(point) for point in shape.points]
+    if shape.kind == "gr_line":
+        return {"type": "line", "start": p[0], "end": p[1]}
+    if shape.kind == "gr_arc":
+        return {"type": "arc", "start": p[0], "mid": p[1], "end": p[2]}
+    if shape.kind == "gr_circle":
+        (cx, cy), (ex, ey) = p
+        return {"type": "circle", "center": p[0], "radius": math.hypot(ex - cx, ey - cy)}
+    if shape.kind == "gr_rect":
+        return {"type": "rectangle", "start": p[0], "end": p[1]}
+    if shape.kind == "gr_curve":
+        return {"type": "bezier", "p0": p[0], "p1": p[1], "p2": p[2], "p3": p[3]}
+    return {"type": "polygon", "outlines": [p]}
+
+
+def drill_records(drill):
+    """A round hole as a circle; a slot as line, arc, line, arc."""
+    d = drill if drill.width >= drill.height else drill._replace(
+        width=drill.height, height=drill.width, angle=drill.angle + 90)
+    if d.width - d.height < 1e-6:
+        return [{"type": "circle", "center": [d.x, d.y], "radius": d.width / 2}]
+    a, r = (d.width - d.height) / 2, d.height / 2
+    c, s = math.cos(math.radians(d.angle)), math.sin(math.radians(d.angle))
+
+    def at(along, across):  # slot frame to board, y down
+        return [round(d.x + along * c + across * s, 6), round(d.y - along * s + across * c, 6)]
+    return [{"type": "line", "start": at(-a, r), "end": at(a, r)},
+            {"type": "arc", "start": at(a, r), "mid": at(a + r, 0), "end": at(a, -r)},
+            {"type": "line", "start": at(a, -r), "end": at(-a, -r)},
+            {"type": "arc", "start": at(-a, -r), "mid": at(-a - r, 0), "end": at(-a, r)}]
+
+
+def export(board, layers=("Edge.Cuts",), drills=True):
+    """Return the rebuild_board.py records for the graphics on layers.
+
+    Board graphics come first, then footprint graphics, then (on Edge.Cuts)
+    the non-plated drills.
+    """
+    layers = {pcbfile.layer_name(layer) for layer in layers}
+    data = boardq.index(Path(board))
+    records = [record(shape) for shape in map(pcbfile.Shape._make, data["shapes"] + data["fp_shapes"])
+               if shape.layer in layers]
+    if drills and "Edge.Cuts" in layers:
+        loops, _ = wires.chain([r for r in records if r["type"] in wires._ENDS])
+        outlines = [wires.polyline(loop) for loop in loops]
+        for drill in map(pcbfile.Drill._make, data["drills"]):
+            if sum(wires.contains(points, (drill.x, drill.y)) for points in outlines) % 2:
+                records += drill_records(drill)
+    return records
+
+
+def default_output(board, layers):
+    suffix = "_".join(layer.replace(".", "_").lower() for layer in map(pcbfile.layer_name, layers))
+    return Path(f"{Path(board).stem}_{suffix}.json")
+
+
+def write(path, records):
+    """Write records unless path already holds them; return True if written."""
+    text = "[\n" + ",\n".join(json.dumps(r) for r in records) + "\n]\n"
+    path = Path(path)
+    if path.exists() and path.read_text() == text:
+        return False
+    path.write_text(text)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("board", type=Path)
+    parser.add_argument("--layer", action="append",
+                        help="layer to export, repeatable (default Edge.Cuts); BL_User_5 works too")
+    parser.add_argument("--no-drills", action="store_true", help="leave out non-plated pad drills")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="default: <board>_<layer>.json in the current directory")
+    args = parser.parse_args()
+
+    layers = args.layer or ["Edge.Cuts"]
+    records = export(args.board, layers, drills=not args.no_drills)
+    if not records:
+        print(f"{args.board}: nothing on {', '.join(layers)}", file=sys.stderr)
+        return 1
+    output = args.output or default_output(args.board, layers)
+    written = write(output, records)
+    print(f"{output}: {len(records)} shapes{'' if written else ' (unchanged)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Offline stand-in for the Fusion 360 API (adsk) that Bezier.py imports into
+
+"""Run the Fusion 360 import script without Fusion, counting API calls.
+
+    python3 fakeadsk.py ../nRF54LM20_TMR2615/Bezier.py swplate/border_curves.kcrv
+    python3 fakeadsk.py ../nRF54LM20_TMR2615/Bezier.py border_curves.kcrv --compare
+
+Provides adsk.core and adsk.fusion with the classes and calls Bezier.py
+uses: Application.get(), a file dialog that answers with the given file,
+Point3D, Design.cast(), rootComponent.sketches.add(), sketchPoints.add(),
+sketchLines.addByTwoPoints(), sketchArcs.addByThreePoints(),
+sketchControlPointSplines.add(), NurbsCurve3D.createNonRational(),
+sketchFixedSplines.addByNurbsCurve(), geometricConstraints.addCoincident(), isFixed, isControlFrameDisplayed and
+isComputeDeferred. NURBS knot vectors are checked as Fusion would. Like Fusion, a curve given a SketchPoint uses it and a
+curve given a Point3D gets a new SketchPoint.
+
+Every call and property access is counted. A sketch change made while
+isComputeDeferred is False counts as one recompute, as does turning
+deferral off. The summary also reports joins left open: coordinates where
+curve ends sit on different SketchPoints. --compare runs the script with
+BATCH_IMPORT and MERGE_C1_CHAINS off, then with each turned on.
+"""
+
+import argparse
+import collections
+import contextlib
+import importlib.util
+import sys
+import time
+import types
+from pathlib import Path
+
+calls = collections.Counter()
+
+
+class Point3D:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        calls["Point3D.create"] += 1
+        return Point3D(x, y, z)
+
+
+class NurbsCurve3D:
+    def __init__(self, points, degree, knots):
+        self.controlPoints, self.degree, self.knots = points, degree, knots
+
+    @staticmethod
+    def createNonRational(points, degree, knots, isPeriodic):
+        calls["NurbsCurve3D.createNonRational"] += 1
+        if len(knots) != len(points) + degree + 1:
+            raise ValueError(f"{len(knots)} knots for {len(points)} control points of degree {degree}")
+        if any(b < a for a, b in zip(knots, knots[1:])):
+            raise ValueError("knots must not decrease")
+        counts = collections.Counter(knots)
+        if max(counts.values()) > degree + 1:
+            raise ValueError(f"knot multiplicity above {degree + 1}")
+        return NurbsCurve3D(list(points), degree, list(knots))
+
+
+class SketchPoint:
+    def __init__(self, sketch, geometry):
+        self.sketch = sketch
+        self.geometry = geometry
+        self._fixed = False
+
+    @property
+    def isFixed(self):
+        calls["SketchPoint.isFixed get"] += 1
+        return self._fixed
+
+    @isFixed.setter
+    def isFixed(self, value):
+        self.sketch.changed("SketchPoint.isFixed set")
+        self._fixed = value
+
+
+class _Curve:
+    def __init__(self, sketch, start, end):
+        self._start, self._end = start, end
+        sketch.ends += [start, end]
+        sketch.curves += 1
+
+    @property
+    def startSketchPoint(self):
+        calls["startSketchPoint"] += 1
+        return self._start
+
+    @property
+    def endSketchPoint(self):
+        calls["endSketchPoint"] += 1
+        return self._end
+
+
+class _Spline(_Curve):
+    def __init__(self, sketch, points):
+        super().__init__(sketch, points[0], points[-1])
+        self.sketch = sketch
+        self._points = list(points)
+
+    @property
+    def controlPoints(self):
+        calls["controlPoints"] += 1
+        return list(self._points)
+
+    @property
+    def isControlFrameDisplayed(self):
+        return False
+
+    @isControlFrameDisplayed.setter
+    def isControlFrameDisplayed(self, value):
+        self.sketch.changed("isControlFrameDisplayed set")
+
+
+class _SketchPoints:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def add(self, point):
+        self.sketch.changed("sketchPoints.add")
+        return self.sketch.point(point)
+
+
+class _SketchLines:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def addByTwoPoints(self, start, end):
+        self.sketch.changed("sketchLines.addByTwoPoints")
+        return _Curve(self.sketch, self.sketch.point(start), self.sketch.point(end))
+
+
+class _SketchArcs:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def addByThreePoints(self, start, mid, end):
+        self.sketch.changed("sketchArcs.addByThreePoints")
+        if not isinstance(mid, Point3D):
+            raise TypeError("addByThreePoints: the mid point must be a Point3D")
+        return _Curve(self.sketch, self.sketch.point(start), self.sketch.point(end))
+
+
+class _SketchControlPointSplines:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def add(self, points, degree):
+        self.sketch.changed("sketchControlPointSplines.add")
+        if not isinstance(points, list) or not all(isinstance(p, SketchPoint) for p in points):
+            raise TypeError("sketchControlPointSplines.add expects a list of SketchPoints")
+        if len(points) != degree + 1:
+            raise ValueError(f"{len(points)} control points for degree {degree}")
+        return _Spline(self.sketch, points)
+
+
+class _SketchFixedSplines:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def addByNurbsCurve(self, curve):
+        self.sketch.changed("sketchFixedSplines.addByNurbsCurve")
+        if not isinstance(curve, NurbsCurve3D):
+            raise TypeError("addByNurbsCurve expects a NurbsCurve3D")
+        start, end = (self.sketch.point(p) for p in (curve.controlPoints[0], curve.controlPoints[-1]))
+        start._fixed = end._fixed = True  # a fixed spline cannot move its ends
+        return _Curve(self.sketch, start, end)
+
+
+class _GeometricConstraints:
+    def __init__(self, sketch):
+        self.sketch = sketch
+
+    def addCoincident(self, point, entity):
+        self.sketch.changed("geometricConstraints.addCoincident")
+        if not isinstance(point, SketchPoint) or not isinstance(entity, SketchPoint):
+            raise TypeError("fakeadsk: addCoincident supports two SketchPoints only")
+        self.sketch.coincident.append((point, entity))
+        return object()
+
+
+class Sketch:
+    def __init__(self):
+        self.name = ""
+        self.deferred = False
+        self.recomputes = 0
+        self.curves = 0
+        self.points = []
+        self.ends = []
+        self.coincident = []
+        self.sketchPoints = _SketchPoints(self)
+        self.geometricConstraints = _GeometricConstraints(self)
+        self.sketchCurves = types.SimpleNamespace(
+            sketchLines=_SketchLines(self),
+            sketchArcs=_SketchArcs(self),
+            sketchControlPointSplines=_SketchControlPointSplines(self),
+            sketchFixedSplines=_SketchFixedSplines(self),
+        )
+
+    def changed(self, call):
+        calls[call] += 1
+        if not self.deferred:
+            self.recomputes += 1
+
+    def point(self, point):
+        """The SketchPoint a curve gets for point: point itself or a new one."""
+        if isinstance(point, SketchPoint):
+            if point.sketch is not self:
+                raise ValueError("SketchPoint belongs to another sketch")
+            return point
+        created = SketchPoint(self, point)
+        self.points.append(created)
+        return created
+
+    @property
+    def isComputeDeferred(self):
+        return self.deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        calls["isComputeDeferred set"] += 1
+        if self.deferred and not value:
+            self.recomputes += 1
+        self.deferred = value
+
+    def open_joins(self):
+        """Coordinates where curve ends sit on SketchPoints not made coincident."""
+        parent = {}
+
+        def root(point):
+            while id(point) in parent:
+                point = parent[id(point)]
+            return point
+
+        for a, b in self.coincident:
+            ra, rb = root(a), root(b)
+            if ra is not rb:
+                parent[id(ra)] = rb
+        at = collections.defaultdict(set)
+        for point in self.ends:
+            g = point.geometry
+            at[(round(g.x, 9), round(g.y, 9))].add(id(root(point)))
+        return sum(1 for ids in at.values() if len(ids) > 1)
+
+
+class _Sketches:
+    def __init__(self):
+        self.items = []
+
+    def add(self, plane):
+        calls["sketches.add"] += 1
+        self.items.append(Sketch())
+        return self.items[-1]
+
+
+class Design:
+    def __init__(self):
+        self.rootComponent = types.SimpleNamespace(sketches=_Sketches(), xYConstructionPlane="XY")
+
+    @staticmethod
+    def cast(product):
+        return product if isinstance(product, Design) else None
+
+
+class _FileDialog:
+    def __init__(self, filename):
+        self.title = self.filter = ""
+        self.filename = filename
+
+    def showOpen(self):
+        return DialogResults.DialogOK if self.filename else DialogResults.DialogCancel
+
+
+class _UserInterface:
+    def __init__(self, filename):
+        self.filename = filename
+        self.messages = []
+
+    def createFileDialog(self):
+        return _FileDialog(self.filename)
+
+    def messageBox(self, text, *args):
+        self.messages.append(text)
+
+
+class Application:
+    _app = None
+
+    def __init__(self, filename):
+        self.userInterface = _UserInterface(filename)
+        self.activeProduct = Design()
+
+    @staticmethod
+    def get():
+        if Application._app is None:
+            raise RuntimeError("fakeadsk: not installed, use installed(filename)")
+        return Application._app
+
+
+DialogResults = types.SimpleNamespace(DialogOK=0, DialogCancel=1)
+SplineDegrees = types.SimpleNamespace(SplineDegreeThree=3)
+
+
+@contextlib.contextmanager
+def installed(filename):
+    """Make `import adsk.core, adsk.fusion` pick up this module; yield the Application."""
+    core = types.ModuleType("adsk.core")
+    core.Application, core.Point3D, core.DialogResults = Application, Point3D, DialogResults
+    core.NurbsCurve3D = NurbsCurve3D
+    fusion = types.ModuleType("adsk.fusion")
+    fusion.Design, fusion.SplineDegrees = Design, SplineDegrees
+    adsk = types.ModuleType("adsk")
+    adsk.core, adsk.fusion = core, fusion
+    modules = {"adsk": adsk, "adsk.core": core, "adsk.fusion": fusion}
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    Application._app = Application(str(filename))
+    calls.clear()
+    try:
+        yield Application._app
+    finally:
+        Application._app = None
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def run_script(script, filename, **constants):
+    """Run script's run() against filename; return (app, seconds, call counts)."""
+    with installed(filename) as app:
+        spec = importlib.util.spec_from_file_location(Path(script).stem, script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, value in constants.items():
+            if not hasattr(module, name):
+                raise KeyError(f"{Path(script).name}: no {name} to set")
+            setattr(module, name, value)
+        started = time.perf_counter()
+        module.run(None)
+        return app, time.perf_counter() - started, dict(calls)
+
+
+def print_summary(app, seconds, counted, file=sys.stdout):
+    sketches = app.activeProduct.rootComponent.sketches.items
+    for message in app.userInterface.messages:
+        print(message, file=file)
+    print(f"{'call':<34} {'count':>7}", file=file)
+    for call, count in sorted(counted.items()):
+        print(f"{call:<34} {count:>7}", file=file)
+    for sketch in sketches:
+        print(f"{sketch.name}: {sketch.curves} curves, {len(sketch.points)} sketch points, "
+              f"{sketch.recomputes} recomputes, "
+              f"{sketch.open_joins()} open joins, {seconds:.3f}s", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", type=Path)
+    parser.add_argument("curves", type=Path, help="file the script's open dialog returns")
+    parser.add_argument("--compare", action="store_true",
+                        help="run with BATCH_IMPORT and MERGE_C1_CHAINS off, then each turned on")
+    args = parser.parse_args()
+
+    modes = [{}]
+    if args.compare:
+        modes = [{"BATCH_IMPORT": False, "MERGE_C1_CHAINS": False},
+                 {"BATCH_IMPORT": True, "MERGE_C1_CHAINS": False},
+                 {"BATCH_IMPORT": True, "MERGE_C1_CHAINS": True}]
+    for constants in modes:
+        if constants:
+            print("--- " + ", ".join(f"{name} = {value}" for name, value in constants.items()))
+        print_summary(*run_script(args.script, args.curves, **constants))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
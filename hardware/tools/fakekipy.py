@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Offline stand-in for the KiCad IPC connection the layout_tools plugins use
+
+"""In-memory kipy board backed by a parsed .kicad_pcb.
+
+Replaces kipy.KiCad only. Footprints and shapes are real kipy wrappers
+(FootprintInstance, BoardSegment, ...), so the plugins' geometry code runs
+exactly as it does against KiCad. The board implements the calls the
+plugins make:
+
+    KiCad().get_board(), board.name, get_project(), get_footprints(),
+    get_shapes(), begin_commit()/push_commit()/drop_commit(),
+    update_items(), create_items(), remove_items(),
+    clear_selection(), add_to_selection(), remove_from_selection(),
+    get_selection()
+
+Like KiCad, every get_* returns fresh copies: a change is only kept when
+passed to update_items(). drop_commit() reverts to the board at
+begin_commit(). There is no flip_items(), as in KiCad 10, so placefp.py
+selects the footprints to flip instead; plan() reports them. gr_poly
+outlines are loaded with their layer and uuid only.
+
+Every call is recorded with the number of items and their serialized
+protobuf size, the payload an IPC round trip would carry.
+
+    python3 fakekipy.py BOARD SCRIPT... [--profile] [--save OUT]
+
+runs the scripts end to end against BOARD, prints the call log, optionally
+a cProfile summary, and writes the result to OUT with pcbwrite.py.
+"""
+
+import argparse
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from pathlib import Path
+
+import kipy
+from kipy.board_types import (
+    BoardArc,
+    BoardBezier,
+    BoardCircle,
+    BoardPolygon,
+    BoardRectangle,
+    BoardSegment,
+    FootprintInstance,
+)
+from kipy.geometry import Angle, Vector2
+from kipy.util.board_layer import canonical_name, layer_from_canonical_name
+
+import boardq
+import pcbwrite
+
+IU_PER_MM = 1_000_000
+
+# pcbfile point keys -> kipy wrapper attributes, per kind.
+_SHAPES = {
+    "gr_line": (BoardSegment, ("start", "end")),
+    "gr_arc": (BoardArc, ("start", "mid", "end")),
+    "gr_curve": (BoardBezier, ("start", "control1", "control2", "end")),
+    "gr_circle": (BoardCircle, ("center", "radius_point")),
+    "gr_rect": (BoardRectangle, ("top_left", "bottom_right")),
+    "gr_poly": (BoardPolygon, ()),
+}
+_KINDS = {cls: (kind, keys) for kind, (cls, keys) in _SHAPES.items()}
+
+
+def _vec(point_mm):
+    return Vector2.from_xy(round(point_mm[0] * IU_PER_MM), round(point_mm[1] * IU_PER_MM))
+
+
+def _mm(value):
+    return value / IU_PER_MM
+
+
+def _copy(item):
+    proto = item.proto.__class__()
+    proto.CopyFrom(item.proto)
+    return item.__class__(proto=proto)
+
+
+def _footprint(fp):
+    ref, lib, x, y, angle, layer = fp
+    item = FootprintInstance()
+    item.proto.id.value = f"fp-{ref}"
+    item.reference_field.text.value = ref
+    item.position = _vec((x, y))
+    item.orientation = Angle.from_degrees(angle)
+    item.layer = layer_from_canonical_name(layer)
+    return item
+
+
+def _shape(index, shape):
+    kind, layer, points, width, uuid = shape
+    cls, keys = _SHAPES[kind]
+    item = cls()
+    item.proto.id.value = uuid or f"shape-{index}"
+    item.layer = layer_from_canonical_name(layer)
+    item.attributes.stroke.width = round(width * IU_PER_MM)
+    for key, point in zip(keys, points):
+        setattr(item, key, _vec(point))
+    return item
+
+
+def to_plan(item):
+    """Shape dict for pcbwrite.py, in mm."""
+    kind, keys = _KINDS[type(item)]
+    if not keys:
+        raise pcbwrite.PlanError(f"Creating {kind} offline is not supported")
+    return {"kind": kind, "layer": canonical_name(item.layer),
+            "points": [[_mm(getattr(item, k).x), _mm(getattr(item, k).y)] for k in keys],
+            "width": _mm(item.attributes.stroke.width)}
+
+
+class FakeProject:
+    def __init__(self, path):
+        self.path = path
+        self.name = Path(path).name
+
+
+class FakeBoard:
+    def __init__(self, path, file_name=None, data=None):
+        self.path = path
+        self.name = str(Path(file_name or path).resolve())
+        if data is None:
+            data = boardq.index(Path(path))
+        self.footprints = {}
+        for fp in data["footprints"]:
+            item = _footprint(fp)
+            self.footprints[item.id.value] = item
+        self.shapes = {}
+        for index, shape in enumerate(data.get("shapes", ())):
+            item = _shape(index, shape)
+            self.shapes[item.id.value] = item
+        self.original_footprints = {k: _copy(v) for k, v in self.footprints.items()}
+        self.original_shapes = set(self.shapes)
+        self.created = []
+        self.selection = {}
+        self.commits = []
+        self.next_id = 0
+        self.calls = []
+
+    def _record(self, method, items=()):
+        items = list(items)
+        self.calls.append((method, len(items), sum(item.proto.ByteSize() for item in items)))
+        return items
+
+    def get_project(self):
+        self._record("get_project")
+        return FakeProject(str(Path(self.name).parent))
+
+    def get_footprints(self):
+        return self._record("get_footprints", map(_copy, self.footprints.values()))
+
+    def get_shapes(self):
+        return self._record("get_shapes", map(_copy, self.shapes.values()))
+
+    def begin_commit(self):
+        self._record("begin_commit")
+        commit = len(self.commits)
+        self.commits.append(({k: _copy(v) for k, v in self.footprints.items()},
+                             {k: _copy(v) for k, v in self.shapes.items()}, list(self.created)))
+        return commit
+
+    def push_commit(self, commit, message=""):
+        self._record("push_commit")
+        self.commits[commit] = None
+
+    def drop_commit(self, commit):
+        self._record("drop_commit")
+        footprints, shapes, created = self.commits[commit]
+        self.footprints, self.shapes, self.created = footprints, shapes, created
+        self.commits[commit] = None
+
+    def _store(self, item):
+        if item.id.value in self.footprints:
+            self.footprints[item.id.value] = _copy(item)
+        elif item.id.value in self.shapes:
+            self.shapes[item.id.value] = _copy(item)
+        else:
+            raise ValueError(f"update_items: no item {item.id.value!r} on the board")
+
+    def update_items(self, items):
+        items = self._record("update_items", items)
+        for item in items:
+            self._store(item)
+        return items
+
+    def create_items(self, items):
+        created = []
+        for item in self._record("create_items", items):
+            if isinstance(item, FootprintInstance):
+                raise ValueError("create_items: footprints cannot be created offline")
+            item = _copy(item)
+            self.next_id += 1
+            item.proto.id.value = f"new-{self.next_id}"
+            self.shapes[item.id.value] = item
+            self.created.append(item.id.value)
+            created.append(_copy(item))
+        return created
+
+    def remove_items(self, items):
+        for item in self._record("remove_items", items):
+            self.footprints.pop(item.id.value, None)
+            self.shapes.pop(item.id.value, None)
+            if item.id.value in self.created:
+                self.created.remove(item.id.value)
+
+    def get_selection(self):
+        return self._record("get_selection", map(_copy, self.selection.values()))
+
+    def clear_selection(self):
+        self._record("clear_selection")
+        self.selection.clear()
+
+    def add_to_selection(self, items):
+        for item in self._record("add_to_selection", items):
+            self.selection[item.id.value] = item
+
+    def remove_from_selection(self, items):
+        for item in self._record("remove_from_selection", items):
+            self.selection.pop(item.id.value, None)
+
+    def selected_footprints(self):
+        return sorted(item.reference_field.text.value for item in self.selection.values()
+                      if isinstance(item, FootprintInstance))
+
+    def call_summary(self):
+        """Return {method: [calls, items, payload bytes]}."""
+        summary = collections.defaultdict(lambda: [0, 0, 0])
+        for method, count, size in self.calls:
+            entry = summary[method]
+            entry[0] += 1
+            entry[1] += count
+            entry[2] += size
+        return dict(summary)
+
+    def plan(self):
+        """Return the pcbwrite.py plan for everything the scripts changed."""
+        moved = {}
+        for key, fp in self.footprints.items():
+            before = self.original_footprints.get(key)
+            if before is None:
+                continue
+            turned = abs((fp.orientation.degrees - before.orientation.degrees + 180) % 360 - 180)
+            if fp.position != before.position or turned > 1e-9:
+                moved[fp.reference_field.text.value] = [
+                    _mm(fp.position.x), _mm(fp.position.y), fp.orientation.degrees]
+        return {
+            "footprints": moved,
+            "remove_uuids": sorted(k for k in self.original_shapes - set(self.shapes)
+                                   if not k.startswith("shape-")),
+            "shapes": [to_plan(self.shapes[k]) for k in self.created],
+        }
+
+
+_board = None
+
+
+class KiCad:
+    """Connection stand-in; get_board() returns the board given to LoadBoard()."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_board(self):
+        if _board is None:
+            raise RuntimeError("fakekipy: no board loaded, call LoadBoard() first")
+        return _board
+
+
+def LoadBoard(path, file_name=None, data=None):
+    """Load path as the board KiCad().get_board() returns; file_name is board.name."""
+    global _board
+    _board = FakeBoard(path, file_name, data)
+    return _board
+
+
+@contextlib.contextmanager
+def installed():
+    """Make `from kipy import KiCad` in the scripts pick up this module's KiCad."""
+    real = kipy.KiCad
+    kipy.KiCad = KiCad
+    try:
+        yield
+    finally:
+        kipy.KiCad = real
+
+
+def print_calls(board, file=sys.stdout):
+    print(f"{'call':<22} {'count':>6} {'items':>7} {'bytes':>9}", file=file)
+    for method, (calls, items, size) in board.call_summary().items():
+        print(f"{method:<22} {calls:>6} {items:>7} {size:>9}", file=file)
+
+
+def main():
+    import variants
+
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("board", type=Path)
+    parser.add_argument("scripts", nargs="+", type=Path)
+    parser.add_argument("--profile", action="store_true", help="print the top cProfile entries")
+    parser.add_argument("--save", type=Path, help="write the resulting board here")
+    args = parser.parse_args()
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+    board = LoadBoard(args.board, file_name=args.save)
+    profiler = cProfile.Profile() if args.profile else None
+    started = time.perf_counter()
+    with installed():
+        for script in args.scripts:
+            if profiler:
+                profiler.runcall(variants.run_script, script, {})
+            else:
+                variants.run_script(script, {})
+    print(f"{time.perf_counter() - started:.3f}s")
+    print_calls(board)
+    if board.selected_footprints():
+        print(f"flip in KiCad: {', '.join(board.selected_footprints())}")
+    if profiler:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+        print(out.getvalue())
+    if args.save:
+        plan = board.plan()
+        print(f"{args.save}: {pcbwrite.apply(args.board, plan, args.save)} edits")
+        with open(args.save.with_suffix(".plan.json"), "w") as f:
+            json.dump(plan, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Offline stand-in for the parts of pcbnew the archived scripts use
+
+"""Minimal pcbnew replacement backed by a parsed .kicad_pcb.
+
+variants.py installs this module as sys.modules["pcbnew"] and runs the
+archived placefp.py and border.py scripts against a FakeBoard loaded from a
+board file. Only the API those scripts call is provided. The board records
+what the scripts did, and FakeBoard.plan() turns that into a pcbwrite.py plan.
+
+Units follow pcbnew: nanometers and degrees.
+"""
+
+import math
+from pathlib import Path
+
+import boardq
+import pcbfile
+
+IU_PER_MM = PCB_IU_PER_MM = 1_000_000
+
+# Layer ids are arbitrary here; the scripts only compare them.
+F_Cu, B_Cu, Edge_Cuts, Margin = 0, 2, 25, 31
+User_1, User_2, User_3, User_4, User_5, User_6, User_7, User_8, User_9 = range(50, 59)
+LAYER_NAMES = {
+    F_Cu: "F.Cu", B_Cu: "B.Cu", Edge_Cuts: "Edge.Cuts", Margin: "Margin",
+    **{User_1 + i: f"User.{i + 1}" for i in range(9)},
+}
+LAYER_IDS = {name: layer for layer, name in LAYER_NAMES.items()}
+
+SHAPE_T_SEGMENT, SHAPE_T_RECT, SHAPE_T_ARC, SHAPE_T_CIRCLE, SHAPE_T_POLY, SHAPE_T_BEZIER = range(6)
+_KINDS = {
+    SHAPE_T_SEGMENT: "gr_line", SHAPE_T_RECT: "gr_rect", SHAPE_T_ARC: "gr_arc",
+    SHAPE_T_CIRCLE: "gr_circle", SHAPE_T_POLY: "gr_poly", SHAPE_T_BEZIER: "gr_curve",
+}
+_SHAPES = {kind: shape for shape, kind in _KINDS.items()}
+
+
+def FromMM(mm):
+    return int(round(mm * IU_PER_MM))
+
+
+def ToMM(iu):
+    return iu / IU_PER_MM
+
+
+def Refresh():
+    pass
+
+
+class VECTOR2I:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        if isinstance(x, VECTOR2I):
+            x, y = x.x, x.y
+        self.x, self.y = int(x), int(y)
+
+    def __add__(self, other):
+        return VECTOR2I(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return VECTOR2I(self.x - other.x, self.y - other.y)
+
+    def __neg__(self):
+        return VECTOR2I(-self.x, -self.y)
+
+    def __mul__(self, k):
+        return VECTOR2I(self.x * k, self.y * k)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, k):
+        return VECTOR2I(self.x / k, self.y / k)
+
+    def __eq__(self, other):
+        return isinstance(other, VECTOR2I) and (self.x, self.y) == (other.x, other.y)
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"VECTOR2I({self.x}, {self.y})"
+
+    def EuclideanNorm(self):
+        return math.hypot(self.x, self.y)
+
+    def Resize(self, length):
+        norm = self.EuclideanNorm()
+        if norm == 0:
+            return VECTOR2I(0, 0)
+        return VECTOR2I(round(self.x * length / norm), round(self.y * length / norm))
+
+    def Cross(self, other):
+        return self.x * other.y - self.y * other.x
+
+    def Dot(self, other):
+        return self.x * other.x + self.y * other.y
+
+
+def _vec(point_mm):
+    return VECTOR2I(FromMM(point_mm[0]), FromMM(point_mm[1]))
+
+
+class PCB_SHAPE:
+    def __init__(self, board=None, shape=None):
+        self.shape = SHAPE_T_SEGMENT
+        self.points = {}
+        self.layer = Edge_Cuts
+        self.width = FromMM(0.1)
+        self.uuid = ""
+        if shape is not None:
+            self._load(shape)
+
+    def _load(self, shape):
+        self.shape = _SHAPES[shape.kind]
+        self.layer = LAYER_IDS.get(shape.layer, shape.layer)
+        self.width = FromMM(shape.width)
+        self.uuid = shape.uuid
+        pts = [_vec(p) for p in shape.points]
+        if shape.kind == "gr_curve":
+            self.points = dict(zip(("start", "c1", "c2", "end"), pts))
+        elif shape.kind == "gr_poly":
+            self.points = {"pts": pts}
+        else:
+            self.points = dict(zip(pcbfile._POINT_KEYS[shape.kind], pts))
+
+    def SetShape(self, shape):
+        self.shape = shape
+
+    def GetShape(self):
+        return self.shape
+
+    def SetStart(self, point):
+        self.points["start"] = VECTOR2I(point.x, point.y)
+
+    def GetStart(self):
+        return self.points.get("start")
+
+    def SetEnd(self, point):
+        self.points["end"] = VECTOR2I(point.x, point.y)
+
+    def GetEnd(self):
+        return self.points.get("end")
+
+    def SetBezierC1(self, point):
+        self.points["c1"] = VECTOR2I(point.x, point.y)
+
+    def SetBezierC2(self, point):
+        self.points["c2"] = VECTOR2I(point.x, point.y)
+
+    def GetBezierC1(self):
+        return self.points.get("c1")
+
+    def GetBezierC2(self):
+        return self.points.get("c2")
+
+    def SetArcGeometry(self, start, mid, end):
+        self.points.update(start=VECTOR2I(start.x, start.y), mid=VECTOR2I(mid.x, mid.y),
+                           end=VECTOR2I(end.x, end.y))
+
+    def SetLayer(self, layer):
+        self.layer = layer
+
+    def GetLayer(self):
+        return self.layer
+
+    def SetWidth(self, width):
+        self.width = width
+
+    def GetWidth(self):
+        return self.width
+
+    def to_plan(self):
+        """Shape dict for pcbwrite.py, in mm."""
+        kind = _KINDS[self.shape]
+        if kind == "gr_curve":
+            keys = ("start", "c1", "c2", "end")
+        elif kind == "gr_poly":
+            keys = None
+        else:
+            keys = pcbfile._POINT_KEYS[kind]
+        pts = self.points["pts"] if keys is None else [self.points[k] for k in keys]
+        return {"kind": kind, "layer": LAYER_NAMES.get(self.layer, self.layer),
+                "points": [[ToMM(p.x), ToMM(p.y)] for p in pts], "width": ToMM(self.width)}
+
+
+class FOOTPRINT:
+    def __init__(self, fp):
+        self.ref = fp.ref
+        self.position = VECTOR2I(FromMM(fp.x), FromMM(fp.y))
+        self.angle = fp.angle
+        self.layer = LAYER_IDS.get(fp.layer, F_Cu)
+        self.original = (self.position, self.angle, self.layer)
+
+    def GetReference(self):
+        return self.ref
+
+    def GetPosition(self):
+        return VECTOR2I(self.position.x, self.position.y)
+
+    def SetPosition(self, point):
+        self.position = VECTOR2I(point.x, point.y)
+
+    def GetOrientationDegrees(self):
+        return self.angle
+
+    def SetOrientationDegrees(self, angle):
+        self.angle = float(angle)
+
+    def GetLayer(self):
+        return self.layer
+
+    def Flip(self, centre, flip_left_right=True):
+        # Recorded only; pcbwrite.py cannot mirror footprint children.
+        self.layer = B_Cu if self.layer == F_Cu else F_Cu
+
+    def changed(self):
+        position, angle, _ = self.original
+        return self.position != position or abs((self.angle - angle + 180) % 360 - 180) > 1e-9
+
+
+class FakeBoard:
+    def __init__(self, path, file_name=None, data=None):
+        self.path = path
+        self.file_name = str(file_name or path)
+        if data is None:
+            # Parsed once per board content and shared with boardq.py/boarddiff.py.
+            data = boardq.index(Path(path))
+        self.footprints = {fp[0]: FOOTPRINT(pcbfile.Footprint._make(fp))
+                           for fp in data["footprints"]}
+        self.drawings = [PCB_SHAPE(shape=pcbfile.Shape._make(s)) for s in data.get("shapes", ())]
+        self.original_drawings = list(self.drawings)
+        self.added = []
+        self.calls = 0
+
+    def GetFileName(self):
+        return self.file_name
+
+    def FindFootprintByReference(self, ref):
+        self.calls += 1
+        return self.footprints.get(ref)
+
+    def GetFootprints(self):
+        return list(self.footprints.values())
+
+    def GetDrawings(self):
+        return list(self.drawings)
+
+    def Add(self, item):
+        self.calls += 1
+        if isinstance(item, PCB_SHAPE):
+            self.drawings.append(item)
+            self.added.append(item)
+
+    def Delete(self, item):
+        self.calls += 1
+        self.drawings.remove(item)
+        if item in self.added:
+            self.added.remove(item)
+
+    Remove = Delete
+
+    def Save(self, path):
+        pass
+
+    def flipped(self):
+        return sorted(ref for ref, fp in self.footprints.items() if fp.layer != fp.original[2])
+
+    def plan(self):
+        """Return the pcbwrite.py plan for everything the scripts changed."""
+        kept = set(map(id, self.drawings))
+        removed = [s for s in self.original_drawings if id(s) not in kept]
+        return {
+            "footprints": {ref: [ToMM(fp.position.x), ToMM(fp.position.y), fp.angle]
+                           for ref, fp in self.footprints.items() if fp.changed()},
+            "remove_uuids": [s.uuid for s in removed if s.uuid],
+            "shapes": [s.to_plan() for s in self.added],
+        }
+
+
+_board = None
+
+
+def LoadBoard(path, file_name=None, data=None):
+    """Load path as the board GetBoard() returns; file_name is what scripts see.
+
+    data, in boardq.py's index format, is used instead of reading path; a
+    golden.py pose fixture has only "footprints".
+    """
+    global _board
+    _board = FakeBoard(path, file_name, data)
+    return _board
+
+
+def GetBoard():
+    if _board is None:
+        raise RuntimeError("fakepcbnew: no board loaded, call LoadBoard() first")
+    return _board
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Golden-geometry regression and timing of the border scripts
+
+"""Check that border scripts still draw the same outlines, and how fast.
+
+Each variant in variants/ with a "golden" section is checked project by
+project:
+
+    "golden": {
+      "fixture": "swplate/swplate.kicad_pcb",      # switch poses come from here
+      "scripts": ["border.py"],
+      "projects": {"pcb": {}, "swplate": {}, "plate": {"overrides": {...}}}
+    }
+
+The footprint poses of the fixture board are recorded once in
+golden/<variant>/poses.json. Every project is then run offline against those
+poses, with the board named <project>.kicad_pcb so the scripts take that
+project's branch; no board file is needed, so "pcb" runs too. The shapes a
+script emits are compared with golden/<variant>/<project>.json, matched as
+boarddiff.py matches graphics, within --tolerance nanometers.
+
+Runtime (best of --repeat) and shape counts are appended to
+.cache/golden/history.csv with the git commit, and the report shows the
+change since the previous run. Projects run one after another in this
+process, so the timings are comparable.
+
+    python3 golden.py --record           # record fixtures and goldens
+    python3 golden.py                    # check every variant
+    python3 golden.py nRF54L15_TMR2615_sm_kailh --repeat 5
+    python3 golden.py --update           # accept the current shapes
+    python3 golden.py --history 10
+
+Goldens and fixtures are only written by --record and --update. Exit
+status is 1 when any project differs from its golden, has no golden (or
+its variant no fixture) to compare with, or fails.
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import io
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import boarddiff
+import boardq
+import pcbfile
+import variants
+
+GOLDEN_DIR = variants.TOOLS_DIR / "golden"
+HISTORY = variants.TOOLS_DIR / ".cache" / "golden" / "history.csv"
+OUTPUT_DIR = variants.TOOLS_DIR / "build" / "golden"
+HISTORY_FIELDS = ["time", "commit", "variant", "project", "seconds", "shapes", "status"]
+
+
+def golden_variants(names=None):
+    return {name: config for name, config in variants.load_variants(names).items()
+            if "golden" in config}
+
+
+def fixture_path(variant):
+    return GOLDEN_DIR / variant / "poses.json"
+
+
+def golden_path(variant, project):
+    return GOLDEN_DIR / variant / f"{project}.json"
+
+
+def record_fixture(variant, config):
+    board = variants.HARDWARE_DIR / config["dir"] / config["golden"]["fixture"]
+    data = boardq.index(board)
+    fixture = {"source": str(board.relative_to(variants.HARDWARE_DIR)),
+               "sha256": data["sha256"], "footprints": data["footprints"]}
+    _write_json(fixture_path(variant), fixture)
+    return fixture
+
+
+def load_fixture(variant):
+    with open(fixture_path(variant)) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    """Write data with one list item per line, so goldens diff line by line."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fields = []
+    for key, value in data.items():
+        if isinstance(value, list):
+            items = ",\n  ".join(json.dumps(item) for item in value)
+            fields.append(f"{json.dumps(key)}: [\n  {items}\n ]")
+        else:
+            fields.append(f"{json.dumps(key)}: {json.dumps(value)}")
+    path.write_text("{\n " + ",\n ".join(fields) + "\n}\n")
+
+
+def make_job(variant, config, project, fixture):
+    golden = config["golden"]
+    options = golden["projects"][project]
+    variant_dir = variants.HARDWARE_DIR / config["dir"]
+    return {
+        "variant": variant,
+        "api": config.get("api", "pcbnew"),
+        "scripts": [str(variant_dir / s) for s in golden.get("scripts", config["scripts"])],
+        "overrides": {**config.get("overrides", {}), **options.get("overrides", {})},
+        "board": None,
+        "output": str(OUTPUT_DIR / variant / project / f"{project}.kicad_pcb"),
+        "fixture": fixture,
+    }
+
+
+def run_project(job, repeat=1):
+    """Return (shapes, best seconds) for job; script output goes to a .log."""
+    backend = variants.BACKENDS.get(job["api"])
+    if backend is None:
+        raise LookupError(f"no offline backend for api {job['api']!r}")
+    output = Path(job["output"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    best = None
+    for _ in range(repeat):
+        log = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            plan, _ = backend(job)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    (output.parent / f"{output.stem}.log").write_text(log.getvalue())
+    return plan["shapes"], best
+
+
+def as_shapes(shapes):
+    return [pcbfile.Shape(s["kind"], s["layer"], tuple(map(tuple, s["points"])),
+                          s.get("width", 0), s.get("uuid", "")) for s in shapes]
+
+
+def compare(golden, shapes, tolerance_nm):
+    diff = boarddiff.diff_shapes(as_shapes(golden), as_shapes(shapes), tolerance_nm / 1e6)
+    return diff if any(diff.values()) else None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=variants.TOOLS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def read_history():
+    try:
+        with open(HISTORY, newline="") as f:
+            return list(csv.DictReader(f))
+    except OSError:
+        return []
+
+
+def append_history(rows):
+    HISTORY.parent.mkdir(parents=True, exist_ok=True)
+    new = not HISTORY.exists()
+    with open(HISTORY, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+        if new:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def previous_runs(history):
+    last = {}
+    for row in history:
+        if row["status"] in ("ok", "updated", "recorded"):
+            last[(row["variant"], row["project"])] = row
+    return last
+
+
+def print_history(history, count):
+    runs = {}
+    for row in history:
+        runs.setdefault((row["variant"], row["project"]), []).append(row)
+    for (variant, project), rows in sorted(runs.items()):
+        print(f"{variant} {project}")
+        for row in rows[-count:]:
+            print(f"  {row['time']}  {row['commit']:<8} {float(row['seconds']):>7.3f}s "
+                  f"{int(row['shapes']):>6} shapes  {row['status']}")
+
+
+def _change(now, before, fmt):
+    if before is None:
+        return ""
+    delta = now - before
+    return f" ({'+' if delta >= 0 else ''}{fmt(delta)})"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("variants", nargs="*", help="variant names (default: all with goldens)")
+    parser.add_argument("--record", action="store_true",
+                        help="record pose fixtures from the boards, then the goldens")
+    parser.add_argument("--update", action="store_true", help="overwrite the goldens")
+    parser.add_argument("--tolerance", type=float, default=1, help="nanometers (default 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per project, best time kept")
+    parser.add_argument("--history", type=int, metavar="N", help="show the last N runs and exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list differing shapes")
+    args = parser.parse_args()
+
+    history = read_history()
+    if args.history:
+        print_history(history, args.history)
+        return 0
+
+    previous = previous_runs(history)
+    stamp = datetime.datetime.now().isoformat(timespec="seconds")
+    commit = git_commit()
+    rows, failed = [], 0
+    for variant, config in golden_variants(args.variants).items():
+        if args.record:
+            fixture = record_fixture(variant, config)
+        elif fixture_path(variant).exists():
+            fixture = load_fixture(variant)
+        else:
+            failed += 1
+            print(f"{variant:<46} MISSING {fixture_path(variant)} (record with --record)")
+            continue
+        for project in config["golden"]["projects"]:
+            name = f"{variant} {project}"
+            job = make_job(variant, config, project, fixture)
+            try:
+                shapes, seconds = run_project(job, args.repeat)
+            except Exception as e:
+                failed += 1
+                print(f"{name:<46} ERROR {type(e).__name__}: {e}")
+                continue
+
+            path = golden_path(variant, project)
+            diff = None
+            if args.record or args.update:
+                _write_json(path, {"shapes": shapes})
+                status = "updated" if args.update else "recorded"
+            elif not path.exists():
+                # Never recorded (or deleted): nothing was checked, so it fails.
+                status = "MISSING"
+                failed += 1
+            else:
+                with open(path) as f:
+                    diff = compare(json.load(f)["shapes"], shapes, args.tolerance)
+                status = "DIFF" if diff else "ok"
+                failed += bool(diff)
+
+            before = previous.get((variant, project))
+            print(f"{name:<46} {len(shapes):>5} shapes"
+                  f"{_change(len(shapes), before and int(before['shapes']), str):<8} "
+                  f"{seconds:>7.3f}s"
+                  f"{_change(seconds, before and float(before['seconds']), lambda d: f'{d:.3f}s'):<11} "
+                  f"{status}")
+            if diff:
+                boarddiff.report({}, diff, args.verbose)
+            rows.append({"time": stamp, "commit": commit, "variant": variant, "project": project,
+                         "seconds": f"{seconds:.4f}", "shapes": len(shapes), "status": status})
+    append_history(rows)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
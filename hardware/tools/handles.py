@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Search the Bezier handle lengths of border.py for the smoothest outline
+
+"""Optimize BORDER_HANDLES_MM in border.py offline for the smoothest outline.
+
+    python3 handles.py                                  # botcase and swplate
+    python3 handles.py --project topcase --rounds 30 --samples 4000 --jobs 4
+
+Handle lengths move only the inner control points of their Beziers, along
+fixed directions; the end points, and with them the reveal, stay put. So
+the border script is run just once per project with the current values and
+once per constant raised by 1 mm (in a process pool, offline through
+golden.py's fixture), and the Beziers that moved, by how much per mm, give
+a linear model of every candidate.
+
+Candidates are then scored in batches with NumPy, the batches spread over
+the pool: the score is the curvature variation along each modelled Bezier
+(sum of |dk| over 16 samples) plus the curvature jump at each of its
+joins (continuity.py). A candidate is rejected where a Bezier comes closer
+to the layer's other outlines (the cavity, so the wall left by SIDE_WALL)
+than it does today. The search starts uniform within --range of the
+current values and narrows around the best for --rounds rounds.
+
+The best values are run through the real script again; the report gives
+the score, the thinnest wall, the model's error and continuity.py's labels
+for both, and the BORDER_HANDLES_MM line to paste into border.py.
+"""
+
+import argparse
+import ast
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import continuity
+import edgecuts
+import golden
+import pcbfile
+import variants
+import wires
+
+VARIANT = "nRF54LM20_TMR2615"
+SCRIPT = variants.HARDWARE_DIR / VARIANT / "layout_tools" / "border.py"
+CONSTANT = "BORDER_HANDLES_MM"
+OUTPUT_DIR = variants.TOOLS_DIR / "build" / "handles"
+PROBE_MM = 1.0
+POINTS = 16  # samples per Bezier for curvature and wall distance
+MIN_HANDLE_MM = 1.0
+DECIMALS = 1  # handle lengths to 0.1 mm
+CHUNK = 500  # candidates per pool task
+
+
+def current_handles(script=SCRIPT):
+    """The literal value of BORDER_HANDLES_MM in script."""
+    for stmt in ast.parse(Path(script).read_text()).body:
+        if isinstance(stmt, ast.Assign) and any(getattr(t, "id", None) == CONSTANT for t in stmt.targets):
+            return {k: float(v) for k, v in ast.literal_eval(stmt.value).items()}
+    raise KeyError(f"{Path(script).name}: no {CONSTANT}")
+
+
+def run_border(job):
+    """Run border.py for (project, handles, tag); return the plan's shapes."""
+    project, handles, tag = job
+    config = golden.golden_variants([VARIANT])[VARIANT]
+    run = golden.make_job(VARIANT, config, project, golden.load_fixture(VARIANT))
+    run["overrides"] = {**run["overrides"], CONSTANT: handles}
+    run["output"] = str(OUTPUT_DIR / project / tag / f"{project}.kicad_pcb")
+    shapes, _ = golden.run_project(run)
+    return shapes
+
+
+def records_of(shapes, layer):
+    return [dict(edgecuts.record(pcbfile.Shape(s["kind"], s["layer"], s["points"], 0, "")), index=i)
+            for i, s in enumerate(shapes) if s["layer"] == layer]
+
+
+def _rows(records):
+    return np.array([[*r["p0"], *r["p1"], *r["p2"], *r["p3"]] for r in records], dtype=float)
+
+
+class Model:
+    """Linear model of one project's layer in the handle constants."""
+
+    def __init__(self, project, layer, keys, base, shapes, probes):
+        self.project, self.layer, self.keys = project, layer, keys
+        records = records_of(shapes, layer)
+        by_index = {r["index"]: r for r in records}
+        beziers = [r for r in records if r["type"] == "bezier"]
+        rows = _rows(beziers)
+
+        # Which constant drives which handle, and by how much per mm.
+        n = len(beziers)
+        self.start_key, self.end_key = np.full(n, -1), np.full(n, -1)
+        self.start_slope, self.end_slope = np.zeros(n), np.zeros(n)
+        for k, probe in enumerate(probes):
+            moved = _rows(b for b in records_of(probe, layer) if b["type"] == "bezier")
+            if moved.shape != rows.shape:
+                raise ValueError(f"{project}: {keys[k]} changes the number of Beziers")
+            if np.abs(moved[:, [0, 1, 6, 7]] - rows[:, [0, 1, 6, 7]]).max() > 1e-6:
+                raise ValueError(f"{project}: {keys[k]} moves Bezier end points")
+            for handle, (a, b), key, slope in (("start", (0, 2), self.start_key, self.start_slope),
+                                                ("end", (6, 4), self.end_key, self.end_slope)):
+                before = np.hypot(*(rows[:, b:b + 2] - rows[:, a:a + 2]).T)
+                after = np.hypot(*(moved[:, b:b + 2] - moved[:, a:a + 2]).T)
+                change = (after - before) / PROBE_MM
+                for i in np.flatnonzero(np.abs(change) > 1e-6):
+                    if key[i] >= 0:
+                        raise ValueError(f"{project}: Bezier {i} {handle} handle follows two constants")
+                    key[i], slope[i] = k, change[i]
+
+        variable = np.flatnonzero((self.start_key >= 0) | (self.end_key >= 0))
+        self.variable = variable
+        self.base_values = np.array([base[k] for k in keys])
+        self.rows = rows[variable]
+        self.start_key, self.end_key = self.start_key[variable], self.end_key[variable]
+        self.start_slope, self.end_slope = self.start_slope[variable], self.end_slope[variable]
+        p0, p1, p2, p3 = (self.rows[:, 2 * j:2 * j + 2] for j in range(4))
+        self.start_len, self.end_len = np.hypot(*(p1 - p0).T), np.hypot(*(p2 - p3).T)
+        self.start_dir = (p1 - p0) / self.start_len[:, None]
+        self.end_dir = (p2 - p3) / self.end_len[:, None]
+
+        # Joins in loop order touching a modelled Bezier: (into, out of), each
+        # end a slot and whether the chain reversed it, or -1 and a fixed curvature.
+        loops, _ = wires.chain(records)
+        slot = {beziers[i]["index"]: j for j, i in enumerate(variable)}
+        self.joins = []
+        for loop in loops:
+            if loop[0]["type"] not in wires._ENDS:
+                continue
+            _, start_k, _, end_k = continuity.end_states(loop)
+            ends = []
+            for i, edge in enumerate(loop):
+                flipped = edge["p0"] != by_index[edge["index"]]["p0"] if edge["type"] == "bezier" else False
+                ends.append((slot.get(edge["index"], -1), flipped, start_k[i], end_k[i]))
+            for i, (j, flipped, _, k) in enumerate(ends):
+                j2, flipped2, k2, _ = ends[(i + 1) % len(ends)]
+                if j >= 0 or j2 >= 0:
+                    self.joins.append(((j, flipped, k), (j2, flipped2, k2)))
+
+        # Wall: the nearby segments of every other loop on the layer.
+        own = {id(loop) for loop in loops if any(e["index"] in slot for e in loop)}
+        others = [wires.polyline(loop) for loop in loops if id(loop) not in own]
+        segments = np.array([(*a, *b) for poly in others for a, b in zip(poly, poly[1:] + poly[:1])])
+        self.walls = []
+        base_points = self.sample(self.base_values[None, :])[0]
+        for j in range(len(variable)):
+            reach = self.start_len[j] + self.end_len[j] + 20.0
+            lo, hi = self.rows[j].reshape(4, 2).min(axis=0) - reach, self.rows[j].reshape(4, 2).max(axis=0) + reach
+            near = segments[(segments[:, [0, 2]].max(axis=1) >= lo[0]) & (segments[:, [0, 2]].min(axis=1) <= hi[0]) &
+                            (segments[:, [1, 3]].max(axis=1) >= lo[1]) & (segments[:, [1, 3]].min(axis=1) <= hi[1])] \
+                if len(segments) else segments
+            self.walls.append(near)
+        self.base_wall = np.array([_distance(base_points[j][None], self.walls[j])[0] for j in range(len(variable))])
+
+    def controls(self, values):
+        """(K, n, 8) control points for candidate values (K, keys)."""
+        delta = values - self.base_values
+        h0 = self.start_len + np.where(self.start_key >= 0, delta[:, self.start_key] * self.start_slope, 0.0)
+        h1 = self.end_len + np.where(self.end_key >= 0, delta[:, self.end_key] * self.end_slope, 0.0)
+        p0, p3 = self.rows[:, 0:2], self.rows[:, 6:8]
+        p1 = p0 + h0[..., None] * self.start_dir
+        p2 = p3 + h1[..., None] * self.end_dir
+        return np.concatenate([np.broadcast_to(p0, p1.shape), p1, p2, np.broadcast_to(p3, p1.shape)], axis=-1)
+
+    def sample(self, values, points=POINTS):
+        """(K, n, points, 2) points along each modelled Bezier."""
+        P = self.controls(values).reshape(len(values), -1, 4, 2)
+        t = np.linspace(0.0, 1.0, points)[:, None]
+        basis = np.stack([(1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3], axis=1)[..., 0]
+        return np.einsum("sj,knjd->knsd", basis, P)
+
+    def score(self, values, points=POINTS):
+        """(score, thinnest wall) per candidate; infeasible ones score inf."""
+        controls = self.controls(values)
+        P = controls.reshape(len(values), -1, 4, 2)
+        t = np.linspace(0.0, 1.0, points)[:, None, None, None]
+        p0, p1, p2, p3 = (P[:, :, j] for j in range(4))
+        d1 = 3 * ((1 - t) ** 2 * (p1 - p0) + 2 * (1 - t) * t * (p2 - p1) + t ** 2 * (p3 - p2))
+        d2 = 6 * ((1 - t) * (p2 - 2 * p1 + p0) + t * (p3 - 2 * p2 + p1))
+        speed = np.hypot(d1[..., 0], d1[..., 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k = continuity._cross(d1, d2) / speed ** 3
+        variation = np.abs(np.diff(k, axis=0)).sum(axis=(0, 2))
+
+        # Curvature is signed along the direction of travel; a reversed Bezier
+        # enters at its p3 and with the sign flipped.
+        _, start_k, _, end_k = continuity.bezier_ends(controls)
+        jumps = np.zeros(len(values))
+        for (j, flipped, k_fixed), (j2, flipped2, k2_fixed) in self.joins:
+            k_in = k_fixed if j < 0 else (-start_k[:, j] if flipped else end_k[:, j])
+            k_out = k2_fixed if j2 < 0 else (-end_k[:, j2] if flipped2 else start_k[:, j2])
+            jumps += continuity.join_metrics(np.zeros(2), k_in, np.zeros(2), k_out)[1]
+
+        samples = self.sample(values, points)
+        walls = np.full(len(values), np.inf)
+        feasible = np.ones(len(values), dtype=bool)
+        for j in range(samples.shape[1]):
+            distance = _distance(samples[:, j], self.walls[j])
+            walls = np.minimum(walls, distance)
+            feasible &= distance >= self.base_wall[j] - 1e-3
+        total = np.where(feasible & np.isfinite(variation + jumps), variation + jumps, np.inf)
+        return total, walls
+
+
+def _distance(points, segments):
+    """Smallest distance from each set of points (K, S, 2) to segments (M, 4); shape (K,)."""
+    if not len(segments):
+        return np.full(len(points), np.inf)
+    a, b = segments[:, 0:2], segments[:, 2:4]
+    ab = b - a
+    length2 = np.maximum((ab * ab).sum(axis=1), 1e-18)
+    ap = points[..., None, :] - a
+    t = np.clip((ap * ab).sum(axis=-1) / length2, 0.0, 1.0)
+    nearest = a + t[..., None] * ab
+    return np.hypot(*(points[..., None, :] - nearest).transpose(3, 0, 1, 2)).min(axis=(1, 2))
+
+
+_models = None
+
+
+def _init(models):
+    global _models
+    _models = models
+
+
+def score_batch(values):
+    """Sum of the projects' scores; thinnest wall over them."""
+    total, walls = np.zeros(len(values)), np.full(len(values), np.inf)
+    for model in _models:
+        score, wall = model.score(values)
+        total += score
+        walls = np.minimum(walls, wall)
+    return total, walls
+
+
+def search(pool, jobs, low, high, base, rounds, samples, seed):
+    """Uniform start within [low, high], then narrowing Gaussian rounds around the best."""
+    rng = np.random.default_rng(seed)
+    best = base.copy()
+    best_score = score_batch(base[None, :])[0][0]
+    sigma = (high - low) / 4
+    for r in range(rounds):
+        if r == 0:
+            values = rng.uniform(low, high, size=(samples, len(base)))
+        else:
+            values = best + rng.normal(size=(samples, len(base))) * sigma
+            sigma *= 0.8
+        values = np.round(np.clip(values, low, high), DECIMALS)  # as pasted into border.py
+        scores, _ = pool_score(pool, jobs, values)
+        i = int(np.argmin(scores))
+        if scores[i] < best_score:
+            best, best_score = values[i], scores[i]
+    return best, best_score
+
+
+def pool_score(pool, jobs, values):
+    chunks = np.array_split(values, max(jobs or 1, -(-len(values) // CHUNK)))
+    results = list(pool.map(score_batch, [c for c in chunks if len(c)]))
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def _labels(shapes, layer):
+    result = continuity.analyze([{k: v for k, v in r.items() if k != "index"} for r in records_of(shapes, layer)])
+    labels = continuity.classify(result)
+    return ", ".join(f"{int((labels == label).sum())} {label}" for label in ("G2", "G1", "kink", "corner"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", action="append", help="repeatable (default botcase, swplate)")
+    parser.add_argument("--layer", default="Edge.Cuts")
+    parser.add_argument("--range", type=float, default=0.6, help="search +-range x current value")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=2000, help="candidates per round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel processes")
+    args = parser.parse_args()
+
+    projects = args.project or ["botcase", "swplate"]
+    base = current_handles()
+    keys = list(base)
+    started = time.perf_counter()
+
+    runs = [(p, base, "base") for p in projects]
+    for key in keys:
+        runs += [(p, {**base, key: base[key] + PROBE_MM}, f"probe-{key}") for p in projects]
+    with ProcessPoolExecutor(args.jobs) as pool:
+        shapes = dict(zip([(p, tag) for p, _, tag in runs], pool.map(run_border, runs)))
+    models = [Model(p, args.layer, keys, base, shapes[(p, "base")],
+                    [shapes[(p, f"probe-{key}")] for key in keys]) for p in projects]
+    for model in models:
+        print(f"{model.project}: {len(model.variable)} Beziers follow the handles, "
+              f"{len(model.joins)} joins, wall {model.base_wall.min():.2f} mm at the thinnest")
+    print(f"{len(runs)} probe runs in {time.perf_counter() - started:.1f}s")
+
+    base_values = np.array([base[k] for k in keys])
+    low = np.maximum(MIN_HANDLE_MM, base_values * (1 - args.range))
+    high = base_values * (1 + args.range)
+    started = time.perf_counter()
+    _init(models)
+    with ProcessPoolExecutor(args.jobs, initializer=_init, initargs=(models,)) as pool:
+        best, best_score = search(pool, args.jobs, low, high, base_values, args.rounds, args.samples, args.seed)
+    base_score, base_wall = score_batch(base_values[None, :])
+    _, best_wall = score_batch(best[None, :])
+    print(f"{args.rounds * args.samples} candidates in {time.perf_counter() - started:.1f}s")
+
+    handles = {k: (int(v) if float(v).is_integer() else float(v)) for k, v in zip(keys, best)}
+    print(f"{'constant':<10} {'now':>8} {'best':>8}")
+    for k, before, after in zip(keys, base_values, best):
+        print(f"{k:<10} {before:>8g} {after:>8g}")
+    check = {p: run_border((p, handles, "best")) for p in projects}
+    error = max(np.abs(m.controls(best[None, :])[0] - _rows(
+        [r for r in records_of(check[m.project], m.layer) if r["type"] == "bezier"])[m.variable]).max()
+        for m in models)
+    rounded, wall = score_batch(best[None, :])
+    print(f"score {base_score[0]:.4f} -> {rounded[0]:.4f}, thinnest wall {base_wall[0]:.2f} -> "
+          f"{wall[0]:.2f} mm, model error {error * 1e6:.0f} nm")
+    for p in projects:
+        print(f"{p:<10} now:  {_labels(shapes[(p, 'base')], args.layer)}")
+        print(f"{p:<10} best: {_labels(check[p], args.layer)}")
+    print(f"{CONSTANT} = {handles}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
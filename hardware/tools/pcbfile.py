@@ -0,0 +1,209 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Footprints, graphics and nets of a .kicad_pcb, read with sexpr.py
+
+"""Board-level views over a sexpr.Document.
+
+Coordinates are millimeters as written in the file. Shapes keep their points
+in file order so equal geometry compares equal:
+
+    gr_line, gr_rect   (start, end)
+    gr_arc             (start, mid, end)
+    gr_circle          (center, end)
+    gr_curve, gr_poly  pts
+
+Footprint graphics (fp_line, ...) are returned as the gr_ shape they draw,
+in board coordinates. A flipped footprint's items are stored mirrored
+already, so only its rotation and position apply. fp_rect on a footprint
+turned off the 90 degree grid becomes a four-point gr_poly.
+"""
+
+import math
+from typing import NamedTuple
+
+SHAPE_KINDS = ("gr_line", "gr_arc", "gr_circle", "gr_rect", "gr_curve", "gr_poly")
+_POINT_KEYS = {
+    "gr_line": ("start", "end"),
+    "gr_rect": ("start", "end"),
+    "gr_arc": ("start", "mid", "end"),
+    "gr_circle": ("center", "end"),
+}
+
+
+_FP_KINDS = {"fp_line": "gr_line", "fp_arc": "gr_arc", "fp_circle": "gr_circle",
+             "fp_rect": "gr_rect", "fp_curve": "gr_curve", "fp_poly": "gr_poly"}
+
+
+class Footprint(NamedTuple):
+    ref: str
+    lib: str
+    x: float
+    y: float
+    angle: float
+    layer: str
+
+
+class Shape(NamedTuple):
+    kind: str
+    layer: str
+    points: tuple  # ((x, y), ...)
+    width: float
+    uuid: str
+
+
+class Drill(NamedTuple):
+    ref: str
+    x: float
+    y: float
+    width: float  # diameter, or slot length along angle
+    height: float  # diameter across a slot; equal to width for a round hole
+    angle: float  # degrees, board frame
+
+
+def layer_name(name):
+    """Accept kipy enum names too: "BL_User_5" -> "User.5", "BL_F_Cu" -> "F.Cu"."""
+    if name.startswith("BL_"):
+        head, _, tail = name[3:].partition("_")
+        return f"{head}.{tail}" if tail else head
+    return name
+
+
+def _xy(atoms):
+    return (float(atoms[0]), float(atoms[1]))
+
+
+def footprint(node):
+    at = node.value("at", ["0", "0"])
+    return Footprint(
+        ref=node.property("Reference") or "",
+        lib=node.atoms[0] if node.atoms else "",
+        x=float(at[0]),
+        y=float(at[1]),
+        angle=float(at[2]) if len(at) > 2 else 0.0,
+        layer=(node.value("layer") or [""])[0],
+    )
+
+
+def footprints(doc):
+    """Footprint poses in file order. Pads and graphics are not read."""
+    return [footprint(node) for node in doc.root.find_all("footprint")]
+
+
+def shape_points(node):
+    keys = _POINT_KEYS.get(_FP_KINDS.get(node.name, node.name))
+    if keys is None:
+        pts = node.find("pts")
+        return tuple(_xy(xy.atoms) for xy in pts.find_all("xy")) if pts else ()
+    return tuple(_xy(node.value(key)) for key in keys)
+
+
+def shape(node):
+    stroke = node.find("stroke")
+    width = stroke.value("width") if stroke is not None else node.value("width")
+    return Shape(
+        kind=node.name,
+        layer=(node.value("layer") or [""])[0],
+        points=shape_points(node),
+        width=float(width[0]) if width else 0.0,
+        uuid=(node.value("uuid") or node.value("tstamp") or [""])[0],
+    )
+
+
+def shape_nodes(doc, layer=None):
+    """Board-level graphic nodes, optionally only those on layer."""
+    layer = layer_name(layer) if layer else None
+    for node in doc.root.children:
+        if node.name in SHAPE_KINDS:
+            if layer is None or (node.value("layer") or [""])[0] == layer:
+                yield node
+
+
+def shapes(doc, layer=None):
+    return [shape(node) for node in shape_nodes(doc, layer)]
+
+
+def _placement(node):
+    """Map footprint-local points to board coordinates (KiCad y down, angles counterclockwise)."""
+    at = node.value("at", ["0", "0"])
+    x0, y0 = float(at[0]), float(at[1])
+    angle = float(at[2]) if len(at) > 2 else 0.0
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+
+    def place(point):
+        x, y = point
+        return (round(x0 + x * c + y * s, 6), round(y0 - x * s + y * c, 6))
+    return place, angle
+
+
+def footprint_shapes(doc, layer=None):
+    """Graphics inside footprints as board-level Shapes, optionally only on layer."""
+    layer = layer_name(layer) if layer else None
+    result = []
+    for fp in doc.root.find_all("footprint"):
+        place, angle = _placement(fp)
+        for node in fp.children:
+            kind = _FP_KINDS.get(node.name)
+            if kind is None or (layer is not None and (node.value("layer") or [""])[0] != layer):
+                continue
+            item = shape(node)
+            points = item.points
+            if kind == "gr_rect" and angle % 90:
+                (x1, y1), (x2, y2) = points
+                kind, points = "gr_poly", ((x1, y1), (x2, y1), (x2, y2), (x1, y2))
+            result.append(item._replace(kind=kind, points=tuple(place(p) for p in points)))
+    return result
+
+
+def drills(doc):
+    """Non-plated holes (np_thru_hole pads) in board coordinates."""
+    result = []
+    for fp in doc.root.find_all("footprint"):
+        place, _ = _placement(fp)
+        ref = fp.property("Reference") or ""
+        for pad in fp.find_all("pad"):
+            if len(pad.atoms) < 2 or pad.atoms[1] != "np_thru_hole":
+                continue
+            drill = pad.value("drill")
+            if not drill:
+                continue
+            at = pad.value("at", ["0", "0"])
+            oval = drill[0] == "oval"
+            sizes = [float(v) for v in drill[1:3]] if oval else [float(drill[0])] * 2
+            if oval and len(sizes) == 1:
+                sizes *= 2
+            x, y = place((float(at[0]), float(at[1])))
+            # Pad angles are written in the board frame already; a drill
+            # offset is in the pad's own frame.
+            angle = float(at[2]) if len(at) > 2 else 0.0
+            dx, dy = (float(v) for v in pad.find("drill").value("offset", ["0", "0"]))
+            c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+            x, y = round(x + dx * c + dy * s, 6), round(y - dx * s + dy * c, 6)
+            result.append(Drill(ref, x, y, sizes[0], sizes[1], angle))
+    return result
+
+
+def thickness(doc):
+    """Board thickness in mm from (general (thickness ...)), or None."""
+    general = doc.root.find("general")
+    value = general.value("thickness") if general is not None else None
+    return float(value[0]) if value else None
+
+
+def nets(doc):
+    """Net name -> sorted ["REF.pad", ...]; nets no pad uses map to []."""
+    result = {}
+    # Boards before KiCad 10 declare nets at top level as (net code "name").
+    for node in doc.root.find_all("net"):
+        atoms = node.atoms
+        if atoms and atoms[-1]:
+            result.setdefault(atoms[-1], [])
+    for fp in doc.root.find_all("footprint"):
+        ref = fp.property("Reference") or ""
+        for pad in fp.find_all("pad"):
+            net = pad.value("net")
+            if net and net[-1]:
+                result.setdefault(net[-1], []).append(f"{ref}.{pad.atoms[0]}")
+    for pads in result.values():
+        pads.sort()
+    return result
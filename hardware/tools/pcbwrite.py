@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Apply placement and border results to .kicad_pcb files without KiCad
+
+"""Patch footprint poses and board graphics directly in a .kicad_pcb.
+
+Only the affected nodes are rewritten: a footprint's own (at ...) and the
+angle of its pads and texts when it rotates, removed gr_* nodes, and new
+gr_* nodes appended before the final ')'. Every other byte of the file is
+kept. Output goes to a temporary file in the same directory that replaces
+the board with os.replace, so a crash never leaves a half-written board.
+
+A plan is JSON, all coordinates in mm:
+
+    {
+      "footprints": {"S1": [19, 0, 0], "S62": [75.9, 80.7, -20]},
+      "replace_layers": ["Edge.Cuts", "User.5"],
+      "remove_uuids": ["94fdc7df-c192-4fd9-a427-6573487a0795"],
+      "shapes": [
+        {"kind": "gr_line", "layer": "Edge.Cuts", "points": [[0, 0], [10, 0]]},
+        {"kind": "gr_curve", "layer": "User.5", "points": [[0, 0], [1, 2], [3, 2], [4, 0]],
+         "width": 0.1}
+      ]
+    }
+
+replace_layers removes the board-level graphics on those layers first, like
+border.py's remove_border(); remove_uuids removes individual graphics.
+Layers may be given as kipy names (BL_User_5).
+Moving a footprint between F.Cu and B.Cu is refused: a flip mirrors every
+child and must be done in KiCad (see layout_tools/placefp.py).
+
+    python3 pcbwrite.py board.kicad_pcb plan.json [-o out.kicad_pcb]
+    python3 pcbwrite.py --jobs 4 a.kicad_pcb=a.json b.kicad_pcb=b.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pcbfile
+import sexpr
+
+
+class PlanError(ValueError):
+    pass
+
+
+def fmt(value):
+    """Format a number the way KiCad writes it: up to 6 decimals, no trailing zeros."""
+    text = f"{value:.6f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _normalize(angle, signed):
+    angle %= 360
+    if signed and angle > 180:
+        angle -= 360
+    return angle
+
+
+def _at(x, y, angle=None):
+    if angle is None:
+        return f"(at {fmt(x)} {fmt(y)})".encode()
+    return f"(at {fmt(x)} {fmt(y)} {fmt(angle)})".encode()
+
+
+def footprint_edits(fp, pose):
+    """Return (start, end, bytes) replacements that move and rotate fp."""
+    x, y, angle = (list(pose) + [None])[:3]
+    at = fp.find("at")
+    if at is None:
+        raise PlanError(f"{fp.property('Reference')}: footprint has no (at ...)")
+    old = at.atoms
+    old_angle = float(old[2]) if len(old) > 2 else 0.0
+    angle = old_angle if angle is None else float(angle)
+    delta = _normalize(angle - old_angle, signed=True)
+
+    edits = []
+    if (float(old[0]), float(old[1])) != (x, y) or abs(delta) > 1e-9:
+        new_angle = _normalize(angle, signed=True)
+        edits.append((at.start, at.end, _at(x, y, new_angle if new_angle else None)))
+    if abs(delta) > 1e-9:
+        # Pad and text angles in the file include the footprint rotation.
+        for child in fp.children:
+            if child.name not in ("pad", "property", "fp_text"):
+                continue
+            child_at = child.find("at")
+            if child_at is None:
+                continue
+            a = child_at.atoms
+            child_angle = float(a[2]) if len(a) > 2 else 0.0
+            edits.append((child_at.start, child_at.end,
+                          _at(float(a[0]), float(a[1]), _normalize(child_angle + delta, signed=False))))
+    return edits
+
+
+def _line_span(data, node):
+    """Byte range of node including its indentation and trailing newline."""
+    start, end = node.start, node.end
+    line_start = data.rfind(b"\n", 0, start) + 1
+    if data[line_start:start].strip() == b"":
+        start = line_start
+    if data[end:end + 1] == b"\n":
+        end += 1
+    return start, end
+
+
+def shape_text(shape):
+    """Render a shape dict as a tab-indented gr_* node like KiCad 10 writes."""
+    kind = shape["kind"]
+    points = [tuple(p) for p in shape["points"]]
+    layer = pcbfile.layer_name(shape["layer"])
+    width = shape.get("width", 0.1)
+    lines = [f"\t({kind}"]
+    if kind in ("gr_curve", "gr_poly"):
+        xy = " ".join(f"(xy {fmt(x)} {fmt(y)})" for x, y in points)
+        lines += ["\t\t(pts", f"\t\t\t{xy}", "\t\t)"]
+    else:
+        keys = pcbfile._POINT_KEYS.get(kind)
+        if keys is None:
+            raise PlanError(f"Unsupported shape kind {kind!r}")
+        if len(points) != len(keys):
+            raise PlanError(f"{kind} needs {len(keys)} points, got {len(points)}")
+        lines += [f"\t\t({key} {fmt(x)} {fmt(y)})" for key, (x, y) in zip(keys, points)]
+    lines += ["\t\t(stroke", f"\t\t\t(width {fmt(width)})", "\t\t\t(type default)", "\t\t)"]
+    if kind in ("gr_circle", "gr_rect", "gr_poly"):
+        lines.append("\t\t(fill no)")
+    lines += [f'\t\t(layer "{layer}")', f'\t\t(uuid "{shape.get("uuid") or uuid.uuid4()}")', "\t)"]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def plan_edits(doc, plan):
+    """Collect every (start, end, bytes) edit for plan against doc."""
+    data = doc.data
+    edits = []
+
+    poses = plan.get("footprints", {})
+    if poses:
+        remaining = dict(poses)
+        for fp in doc.root.find_all("footprint"):
+            ref = fp.property("Reference")
+            pose = remaining.pop(ref, None)
+            if pose is None:
+                continue
+            if isinstance(pose, dict):
+                if "layer" in pose and pose["layer"] != (fp.value("layer") or [""])[0]:
+                    raise PlanError(f"{ref}: flipping to {pose['layer']} is not supported, flip it in KiCad")
+                pose = [pose["x"], pose["y"], pose.get("angle")]
+            edits += footprint_edits(fp, pose)
+        if remaining:
+            raise PlanError(f"Footprints not on the board: {', '.join(sorted(remaining))}")
+
+    layers = {pcbfile.layer_name(name) for name in plan.get("replace_layers", ())}
+    uuids = set(plan.get("remove_uuids", ()))
+    if layers or uuids:
+        for node in pcbfile.shape_nodes(doc):
+            if (node.value("layer") or [""])[0] in layers or \
+               (uuids and (node.value("uuid") or [""])[0] in uuids):
+                start, end = _line_span(data, node)
+                edits.append((start, end, b""))
+
+    shapes = plan.get("shapes", ())
+    if shapes:
+        # Insert before the closing ')' of (kicad_pcb ...), on its own line.
+        close = doc.root.end - 1
+        insert_at = data.rfind(b"\n", 0, close) + 1
+        edits.append((insert_at, insert_at, b"".join(shape_text(s) for s in shapes)))
+    return edits
+
+
+def patch(data, edits):
+    """Apply non-overlapping (start, end, bytes) edits to data."""
+    edits.sort(key=lambda e: (e[0], e[1]))
+    out, pos = [], 0
+    for start, end, text in edits:
+        if start < pos:
+            raise PlanError(f"Overlapping edits at byte {start}")
+        out.append(data[pos:start])
+        out.append(text)
+        pos = end
+    out.append(data[pos:])
+    return b"".join(out)
+
+
+def write_atomic(path, data):
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def apply(board, plan, output=None):
+    """Apply plan (a dict) to board and write output (board itself by default).
+
+    Returns the number of edits; nothing is written when there are none.
+    """
+    board = Path(board)
+    data = board.read_bytes()
+    doc = sexpr.parse(data, board)
+    edits = plan_edits(doc, plan)
+    if edits or output:
+        write_atomic(output or board, patch(data, edits))
+    return len(edits)
+
+
+def _apply_job(job):
+    board, plan_path, output = job
+    with open(plan_path) as f:
+        count = apply(board, json.load(f), output)
+    return board, count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("args", nargs="+", help="BOARD PLAN, or BOARD=PLAN pairs")
+    parser.add_argument("-o", "--output", help="write here instead of in place (single board only)")
+    parser.add_argument("--jobs", type=int, default=1, help="boards patched in parallel")
+    args = parser.parse_args()
+
+    if len(args.args) == 2 and "=" not in args.args[0]:
+        jobs = [(args.args[0], args.args[1], args.output)]
+    else:
+        if args.output:
+            parser.error("-o works with a single BOARD PLAN")
+        if not all("=" in pair for pair in args.args):
+            parser.error("expected BOARD PLAN, or BOARD=PLAN pairs")
+        jobs = [(*pair.split("=", 1), None) for pair in args.args]
+
+    try:
+        if args.jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(args.jobs) as pool:
+                results = list(pool.map(_apply_job, jobs))
+        else:
+            results = [_apply_job(job) for job in jobs]
+    except (PlanError, sexpr.SexprError, OSError) as e:
+        print(f"pcbwrite: {e}", file=sys.stderr)
+        return 1
+    for board, count in results:
+        print(f"{board}: {count} edits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Lazy s-expression reader for .kicad_pcb files
+
+"""Read .kicad_pcb files without KiCad.
+
+The file is mapped with mmap and scanned once with a regex for parentheses
+and quoted strings. That single pass records, for every list, its byte range
+and the index of the next sibling. Nodes are thin views over those arrays:
+names, atoms and children are decoded only when asked for, and walking the
+children of a footprint jumps over each pad and graphic subtree instead of
+reading it. Byte offsets are kept so pcbwrite.py can patch files in place.
+
+    with sexpr.load("swplate/swplate.kicad_pcb") as pcb:
+        for fp in pcb.root.find_all("footprint"):
+            print(fp.atoms[0], fp.find("at").atoms)
+
+Benchmark against every board in the repo:
+
+    python3 sexpr.py --bench
+"""
+
+import argparse
+import mmap
+import re
+import time
+from pathlib import Path
+
+# Parentheses, or a quoted string so parentheses inside it are not counted.
+_STRUCTURE = re.compile(rb'[()]|"(?:[^"\\]|\\.)*"', re.S)
+_ATOM = re.compile(rb'"((?:[^"\\]|\\.)*)"|([^\s()"]+)', re.S)
+_NAME = re.compile(rb"\s*([^\s()\"]+)")
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+OPEN, CLOSE = ord("("), ord(")")
+
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def _atom(match):
+    quoted, bare = match.groups()
+    if bare is not None:
+        return bare.decode()
+    return _unescape(quoted.decode())
+
+
+class SexprError(ValueError):
+    pass
+
+
+class Document:
+    """Structural index of one s-expression buffer.
+
+    starts[k] and ends[k] are the byte offsets of the k-th '(' (in file order)
+    and one past its matching ')'. after[k] is the index of the first list
+    that opens after list k closes, i.e. k + (number of lists in k's subtree).
+    """
+
+    def __init__(self, data, path=None, _map=None):
+        self.data = data
+        self.path = path
+        self._map = _map
+        self.starts, self.ends, self.after = self._index(data)
+        if not self.starts:
+            raise SexprError(f"{path or 'buffer'}: no s-expression found")
+        self.root = Node(self, 0)
+
+    @staticmethod
+    def _index(data):
+        starts, ends, after = [], [], []
+        stack = []
+        for m in _STRUCTURE.finditer(data):
+            pos = m.start()
+            c = data[pos]
+            if c == OPEN:
+                stack.append(len(starts))
+                starts.append(pos)
+                ends.append(0)
+                after.append(0)
+            elif c == CLOSE:
+                if not stack:
+                    raise SexprError(f"unbalanced ')' at byte {pos}")
+                k = stack.pop()
+                ends[k] = pos + 1
+                after[k] = len(starts)
+        if stack:
+            raise SexprError(f"unclosed '(' at byte {starts[stack[-1]]}")
+        return starts, ends, after
+
+    def close(self):
+        if self._map is not None:
+            self.data = None
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def nodes(self, name):
+        """Yield every list named name anywhere in the document, in file order."""
+        key = name.encode()
+        data, starts, size = self.data, self.starts, len(name)
+        for k, pos in enumerate(starts):
+            # Cheap prefix test before decoding the name.
+            if data[pos + 1:pos + 1 + size] == key:
+                node = Node(self, k)
+                if node.name == name:
+                    yield node
+
+
+class Node:
+    """A lazily decoded list: (name atom... (child ...) ...)."""
+
+    __slots__ = ("doc", "index", "_name", "_atoms")
+
+    def __init__(self, doc, index):
+        self.doc = doc
+        self.index = index
+        self._name = None
+        self._atoms = None
+
+    @property
+    def start(self):
+        return self.doc.starts[self.index]
+
+    @property
+    def end(self):
+        return self.doc.ends[self.index]
+
+    @property
+    def raw(self):
+        return bytes(self.doc.data[self.start:self.end])
+
+    @property
+    def name(self):
+        if self._name is None:
+            m = _NAME.match(self.doc.data, self.start + 1, self.end)
+            self._name = m.group(1).decode() if m else ""
+        return self._name
+
+    def _child_indices(self):
+        doc = self.doc
+        k, stop = self.index + 1, doc.after[self.index]
+        while k < stop:
+            yield k
+            k = doc.after[k]
+
+    @property
+    def children(self):
+        return [Node(self.doc, k) for k in self._child_indices()]
+
+    @property
+    def atoms(self):
+        """Atoms of this list after its name, skipping child lists."""
+        if self._atoms is None:
+            doc, data = self.doc, self.doc.data
+            atoms = []
+            pos = self.start + 1
+            for k in self._child_indices():
+                atoms.extend(_atom(m) for m in _ATOM.finditer(data, pos, doc.starts[k]))
+                pos = doc.ends[k]
+            atoms.extend(_atom(m) for m in _ATOM.finditer(data, pos, self.end - 1))
+            self._atoms = atoms[1:]
+        return self._atoms
+
+    def find(self, name):
+        """Return the first direct child named name, or None."""
+        for child in self.find_all(name):
+            return child
+        return None
+
+    def find_all(self, name):
+        """Yield direct children named name, jumping over other subtrees."""
+        key = name.encode()
+        data, starts, size = self.doc.data, self.doc.starts, len(name)
+        for k in self._child_indices():
+            pos = starts[k]
+            if data[pos + 1:pos + 1 + size] == key:
+                child = Node(self.doc, k)
+                if child.name == name:
+                    yield child
+
+    def value(self, name, default=None):
+        """Atoms of the first child named name, e.g. fp.value("at") -> ['10', '20', '90']."""
+        child = self.find(name)
+        return child.atoms if child is not None else default
+
+    def property(self, key):
+        """Value of (property "key" "value" ...), as used for footprint references."""
+        for child in self.find_all("property"):
+            atoms = child.atoms
+            if atoms and atoms[0] == key:
+                return atoms[1] if len(atoms) > 1 else ""
+        return None
+
+    def __repr__(self):
+        return f"<Node {self.name} @{self.start}:{self.end}>"
+
+
+def parse(data, path=None):
+    """Index an in-memory bytes buffer."""
+    return Document(data, path)
+
+
+def load(path):
+    """Map a file read-only and index it. Use as a context manager or close()."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return Document(mapped, path, mapped)
+    except Exception:
+        mapped.close()
+        raise
+
+
+HARDWARE_DIR = Path(__file__).resolve().parent.parent
+
+
+def repo_boards():
+    """All .kicad_pcb files under hardware/, including .history copies."""
+    return sorted(HARDWARE_DIR.rglob("*.kicad_pcb"))
+
+
+def bench(paths, repeat=5):
+    print(f"{'board':<60} {'KB':>5} {'lists':>7} {'index ms':>9} {'poses ms':>9} {'fps':>4}")
+    for path in paths:
+        best_index = best_query = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with load(path) as doc:
+                indexed = time.perf_counter()
+                poses = [(fp.property("Reference"), fp.value("at"))
+                         for fp in doc.root.find_all("footprint")]
+                done = time.perf_counter()
+                lists = len(doc.starts)
+            best_index = min(best_index, indexed - started)
+            best_query = min(best_query, done - indexed)
+        try:
+            name = str(path.resolve().relative_to(HARDWARE_DIR))
+        except ValueError:
+            name = str(path)
+        print(f"{name[-60:]:<60} {path.stat().st_size // 1024:>5} {lists:>7} "
+              f"{best_index * 1000:>9.1f} {best_query * 1000:>9.2f} {len(poses):>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--bench", action="store_true",
+                        help="time indexing and a footprint pose query (default: all repo boards)")
+    args = parser.parse_args()
+
+    paths = args.files or repo_boards()
+    if args.bench:
+        bench(paths)
+        return
+    for path in paths:
+        with load(path) as doc:
+            print(f"{path}: ({doc.root.name} ...) {len(doc.starts)} lists, "
+                  f"{sum(1 for _ in doc.root.find_all('footprint'))} footprints")
+
+
+if __name__ == "__main__":
+    main()
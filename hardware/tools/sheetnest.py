@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Pack the cut parts of several keyboards onto stock sheets
+
+"""Nest the parts of a batch of keyboards onto sheets and write one DXF.
+
+    K=../archive/nRF54L15_TMR2615_sm_kailh
+    python3 sheetnest.py $K/wristrest/wristrest.kicad_pcb $K/swplate/swplate.kicad_pcb \\
+        --quantity 4 --sheet 600x400 -o batch.dxf
+    python3 sheetnest.py $K/botcover/botcover.kicad_pcb:Edge.Cuts,User.5 -q 2
+
+Every closed outline on a board (Edge.Cuts, or the layers after the colon)
+is one part, with its holes; the wrist rest board gives two. Each part is
+needed --quantity times. Run once per stock material: parts of different
+thickness do not share a sheet.
+
+Parts are placed largest first, bottom-left: for every sheet in use and
+every rotation (--rotations, 4 by default: multiples of 90 degrees), the
+candidate positions are the sheet margin and the right and top edges of the
+parts already placed, tried from the bottom row up; the rotation whose fit
+ends lowest, then leftmost, wins. A part that fits no sheet opens a new one.
+Parts collide through their convex hulls, kept --gap apart; a grid over the
+placed parts' bounding boxes picks the few hulls worth testing.
+
+The DXF has the sheets side by side, their outlines on layer Sheet and the
+contours on layer Cut in cutorder.py's order (holes before outlines).
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import cutorder
+import edgecuts
+import wires
+
+SHEET = (600.0, 400.0)  # mm
+GAP = 3.0  # mm between parts
+MARGIN = 5.0  # mm from the sheet edge
+CELL = 50.0  # mm; grid cell of the collision index
+
+
+def hull(points):
+    """Convex hull of points, counterclockwise (monotone chain)."""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def half(seq):
+        out = []
+        for p in seq:
+            while len(out) > 1 and ((out[-1][0] - out[-2][0]) * (p[1] - out[-2][1]) -
+                                    (out[-1][1] - out[-2][1]) * (p[0] - out[-2][0])) <= 0:
+                out.pop()
+            out.append(p)
+        return out
+
+    lower, upper = half(points), half(reversed(points))
+    return lower[:-1] + upper[:-1]
+
+
+def _rotate_point(point, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return (point[0] * c - point[1] * s, point[0] * s + point[1] * c)
+
+
+def transform(record, angle, dx, dy):
+    """record rotated by angle (radians) about the origin, then moved by (dx, dy)."""
+
+    def move(point):
+        x, y = _rotate_point(point, angle)
+        return [x + dx, y + dy]
+
+    kind = record["type"]
+    if kind == "circle":
+        return dict(record, center=move(record["center"]))
+    if kind == "rectangle":
+        (x1, y1), (x2, y2) = record["start"], record["end"]
+        corners = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        return {"type": "polygon", "outlines": [[move(p) for p in corners]]}
+    if kind == "polygon":
+        return {"type": kind, "outlines": [[move(p) for p in outline] for outline in record["outlines"]]}
+    keys = ("p0", "p1", "p2", "p3") if kind == "bezier" else ("start", "mid", "end")
+    return dict(record, **{k: move(record[k]) for k in keys if k in record})
+
+
+def _separated(a, b, gap):
+    """True if convex polygons a and b are at least gap apart along some edge normal."""
+    for poly in (a, b):
+        for (x1, y1), (x2, y2) in zip(poly, poly[1:] + poly[:1]):
+            nx, ny = y2 - y1, x1 - x2
+            length = math.hypot(nx, ny)
+            if not length:
+                continue
+            pa = [(x * nx + y * ny) / length for x, y in a]
+            pb = [(x * nx + y * ny) / length for x, y in b]
+            if min(pb) - max(pa) >= gap or min(pa) - max(pb) >= gap:
+                return True
+    return False
+
+
+class Sheet:
+    """Placed hulls on one sheet, indexed by the grid cells their boxes cover."""
+
+    def __init__(self, size, margin, gap):
+        self.size, self.margin, self.gap = size, margin, gap
+        self.placed = []  # (part, angle, dx, dy, hull, box)
+        self.cells = {}
+        self.xs, self.ys = {margin}, {margin}
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = box
+        for i in range(int(x0 // CELL), int(x1 // CELL) + 1):
+            for j in range(int(y0 // CELL), int(y1 // CELL) + 1):
+                yield i, j
+
+    def fits(self, points, box):
+        x0, y0, x1, y1 = box
+        w, h = self.size
+        if x0 < self.margin - 1e-9 or y0 < self.margin - 1e-9 or x1 > w - self.margin + 1e-9 \
+                or y1 > h - self.margin + 1e-9:
+            return False
+        grown = (x0 - self.gap, y0 - self.gap, x1 + self.gap, y1 + self.gap)
+        seen = set()
+        for cell in self._cells(grown):
+            for k in self.cells.get(cell, ()):
+                if k in seen:
+                    continue
+                seen.add(k)
+                bx0, by0, bx1, by1 = self.placed[k][5]
+                if bx0 >= grown[2] or grown[0] >= bx1 or by0 >= grown[3] or grown[1] >= by1:
+                    continue
+                if not _separated(points, self.placed[k][4], self.gap):
+                    return False
+        return True
+
+    def first_fit(self, shape):
+        """Lowest, then leftmost, (x, y) where shape's min corner can go, or None."""
+        points, (w, h) = shape
+        for y in sorted(self.ys):
+            for x in sorted(self.xs):
+                moved = [(px + x, py + y) for px, py in points]
+                if self.fits(moved, (x, y, x + w, y + h)):
+                    return x, y
+        return None
+
+    def add(self, part, angle, dx, dy, points, box):
+        k = len(self.placed)
+        self.placed.append((part, angle, dx, dy, points, box))
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(k)
+        self.xs.add(box[2] + self.gap)
+        self.ys.add(box[3] + self.gap)
+
+
+def parts_of(spec):
+    """[(name, outline, holes)] for a BOARD[:LAYER,...] argument."""
+    board, _, layers = spec.partition(":")
+    loops, open_chains = wires.chain(edgecuts.export(board, layers.split(",") if layers else ["Edge.Cuts"]))
+    if open_chains:
+        print(f"{board}: {len(open_chains)} open outlines are not cut", file=sys.stderr)
+    name = Path(board).stem
+    faces = wires.nest(loops)
+    return [(f"{name}{i + 1}" if len(faces) > 1 else name, outer, holes)
+            for i, (outer, holes) in enumerate(faces)]
+
+
+def pack(parts, size=SHEET, rotations=4, gap=GAP, margin=MARGIN):
+    """Place parts on as few sheets as it takes; return the list of Sheets.
+
+    Raise ValueError for a part that fits an empty sheet in no rotation.
+    """
+    angles = [2 * math.pi * i / rotations for i in range(rotations)]
+    prepared = []
+    for part in parts:
+        base = hull(wires.polyline(part[1]))
+        shapes = []
+        for angle in angles:
+            turned = [_rotate_point(p, angle) for p in base]
+            mx, my = min(p[0] for p in turned), min(p[1] for p in turned)
+            points = [(x - mx, y - my) for x, y in turned]
+            shapes.append((angle, -mx, -my, (points, (max(p[0] for p in points), max(p[1] for p in points)))))
+        prepared.append((abs(wires.area(base)), part, shapes))
+    prepared.sort(key=lambda item: -item[0])
+
+    sheets = []
+    for _, part, shapes in prepared:
+        for sheet in sheets + [Sheet(size, margin, gap)]:
+            best = None
+            for angle, dx, dy, shape in shapes:
+                at = sheet.first_fit(shape)
+                if at is None:
+                    continue
+                (x, y), (w, h) = at, shape[1]
+                if best is None or (y + h, x) < best[0]:
+                    best = ((y + h, x), angle, dx + x, dy + y, [(px + x, py + y) for px, py in shape[0]],
+                            (x, y, x + w, y + h))
+            if best is not None:
+                if sheet not in sheets:
+                    sheets.append(sheet)
+                sheet.add(part, *best[1:])
+                break
+        else:
+            raise ValueError(f"{part[0]} does not fit a {size[0]:g}x{size[1]:g} mm sheet")
+    return sheets
+
+
+def placed_loops(sheet, offset=0.0):
+    """The placed parts of sheet as loops, moved right by offset."""
+    loops = []
+    for (name, outer, holes), angle, dx, dy, _, _ in sheet.placed:
+        for loop in [outer] + holes:
+            loops.append([transform(record, angle, dx + offset, dy) for record in loop])
+    return loops
+
+
+def write_dxf(path, sheets, spacing=20.0):
+    import ezdxf
+
+    doc = ezdxf.new(units=ezdxf.units.MM)
+    doc.layers.add("Sheet")
+    doc.layers.add("Cut")
+    msp = doc.modelspace()
+    for i, sheet in enumerate(sheets):
+        offset = i * (sheet.size[0] + spacing)
+        w, h = sheet.size
+        frame = {"type": "polygon", "outlines": [[[offset, 0], [offset + w, 0], [offset + w, h], [offset, h]]]}
+        cutorder.add_loops(msp, [[frame]], "Sheet")
+        ordered, _, _ = cutorder.plan(placed_loops(sheet, offset), start=(offset, 0.0))
+        cutorder.add_loops(msp, ordered, "Cut")
+    doc.saveas(path)
+
+
+def _size(text):
+    w, _, h = text.lower().partition("x")
+    return float(w), float(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("boards", nargs="+", help="BOARD[:LAYER,...]")
+    parser.add_argument("-q", "--quantity", type=int, default=1, help="keyboards to cut")
+    parser.add_argument("--sheet", type=_size, default=SHEET, help="WxH in mm (default 600x400)")
+    parser.add_argument("--rotations", type=int, default=4, help="angles tried per part")
+    parser.add_argument("--gap", type=float, default=GAP, help="mm between parts")
+    parser.add_argument("--margin", type=float, default=MARGIN, help="mm from the sheet edge")
+    parser.add_argument("-o", "--output", type=Path, help="combined DXF")
+    args = parser.parse_args()
+
+    parts = [part for spec in args.boards for part in parts_of(spec)] * args.quantity
+    started = time.perf_counter()
+    try:
+        sheets = pack(parts, args.sheet, args.rotations, args.gap, args.margin)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+
+    sheet_area = args.sheet[0] * args.sheet[1]
+    for i, sheet in enumerate(sheets):
+        used = sum(abs(wires.area(wires.polyline(outer))) - sum(abs(wires.area(wires.polyline(h))) for h in holes)
+                   for (_, outer, holes), *_ in sheet.placed)
+        names = ", ".join(part[0] for part, *_ in sheet.placed)
+        print(f"sheet {i + 1}: {len(sheet.placed)} parts, {100 * used / sheet_area:.0f}% used: {names}")
+    print(f"{len(parts)} parts on {len(sheets)} sheets (one per sheet: {len(parts)}) in {seconds:.2f}s")
+    if args.output:
+        write_dxf(args.output, sheets)
+        print(f"{args.output}: written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
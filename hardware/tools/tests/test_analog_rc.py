@@ -0,0 +1,108 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# TMUX1208 pad -> mux address mapping of analog_rc.py
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parents[2] / "nRF54LM20_TMR2615"
+
+# TMUX1208RSV pads and pin names, as in the pcb schematic's symbol.
+TMUX1208 = {"1": "VSS", "2": "S1", "3": "S2", "4": "S3", "5": "S4", "6": "D", "7": "S8", "8": "S7",
+            "9": "S6", "10": "S5", "11": "VDD", "12": "GND", "13": "A2", "14": "A1", "15": "A0",
+            "16": "EN"}
+ADDRESS = {"2": 0, "3": 1, "4": 2, "5": 3, "10": 4, "9": 5, "8": 6, "7": 7}
+
+
+class _Pad:
+    def __init__(self, number, function, net=""):
+        self.number, self.function, self.net = number, function, net
+
+    def GetNumber(self):
+        return self.number
+
+    def GetPinFunction(self):
+        return self.function
+
+    def GetNetname(self):
+        return self.net
+
+
+class _Footprint:
+    def __init__(self, pads):
+        self.pads = pads
+
+    def Pads(self):
+        return self.pads
+
+
+class _EmptyBoard:
+    """Just enough board for the report the script runs on import to find nothing."""
+
+    def GetFileName(self):
+        return ""
+
+    def GetDesignSettings(self):
+        return types.SimpleNamespace(GetBoardThickness=lambda: 1_600_000)
+
+    def GetTracks(self):
+        return []
+
+    def FindFootprintByReference(self, ref):
+        return None
+
+
+@pytest.fixture
+def analog_rc(monkeypatch):
+    pcbnew = types.ModuleType("pcbnew")
+    pcbnew.GetBoard = _EmptyBoard
+    pcbnew.ToMM = lambda iu: iu / 1e6
+    monkeypatch.setitem(sys.modules, "pcbnew", pcbnew)
+    monkeypatch.syspath_prepend(str(SCRIPT_DIR))
+    monkeypatch.delitem(sys.modules, "analog_rc", raising=False)
+    return importlib.import_module("analog_rc")
+
+
+def test_all_16_pads_by_pin_function(analog_rc):
+    mapped = {number: analog_rc.mux_channel(_Pad(number, name)) for number, name in TMUX1208.items()}
+    assert mapped == {number: ADDRESS.get(number) for number in TMUX1208}
+
+
+def test_all_16_pads_by_number(analog_rc):
+    mapped = {number: analog_rc.mux_channel(_Pad(number, "")) for number in TMUX1208}
+    assert mapped == {number: ADDRESS.get(number) for number in TMUX1208}
+
+
+def test_4051_names_stay_zero_based(analog_rc):
+    assert [analog_rc.mux_channel(_Pad("", f"X{i}")) for i in range(8)] == list(range(8))
+
+
+def test_pin_function_wins_over_pad_number(analog_rc):
+    # Pad 2 is S1 on the TMUX1208RSV, but not on a part that calls it GND.
+    assert analog_rc.mux_channel(_Pad("2", "GND")) is None
+    assert not analog_rc.is_common(_Pad("6", "VDD"))
+
+
+def test_common_is_the_drain(analog_rc):
+    assert [n for n, name in TMUX1208.items() if analog_rc.is_common(_Pad(n, name))] == ["6"]
+    assert [n for n in TMUX1208 if analog_rc.is_common(_Pad(n, ""))] == ["6"]
+
+
+def test_sensor_channels_use_the_drain_net(analog_rc, monkeypatch):
+    # Every mux pad but the inputs reaches the MCU; only D is the common net.
+    nets = {"1": "GND", "6": "ADC0", "11": "VDD", "12": "GND", "13": "A2", "14": "A1",
+            "15": "A0", "16": "EN", "2": "TMR1_OUT", "10": "TMR2_OUT"}
+    mux = _Footprint([_Pad(n, name, nets.get(n, "")) for n, name in TMUX1208.items()])
+    footprints = {"MUXB1": mux,
+                  "TMR1": _Footprint([_Pad("1", "", "VDD"), _Pad("3", "", "TMR1_OUT")]),
+                  "TMR2": _Footprint([_Pad("1", "", "VDD"), _Pad("3", "", "TMR2_OUT")])}
+    monkeypatch.setattr(analog_rc, "board", types.SimpleNamespace(FindFootprintByReference=footprints.get))
+    assert sorted(analog_rc.sensor_channels()) == [
+        ("TMR1", "MUXB1", 0, "TMR1_OUT", "ADC0"),
+        ("TMR2", "MUXB1", 4, "TMR2_OUT", "ADC0"),
+    ]
@@ -0,0 +1,30 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Stack heights of the kailh assembly; needs build123d, skipped without it
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("build123d")
+
+KAILH_DIR = Path(__file__).resolve().parents[2] / "archive" / "nRF54L15_TMR2615_sm_kailh"
+sys.path.insert(0, str(KAILH_DIR))
+
+import assemble  # noqa: E402
+
+
+def test_unknown_pcb_values_stop_the_build():
+    with pytest.raises(ValueError, match="pcb.thickness, pcb.gap"):
+        assemble.resolve(assemble.STACK)
+
+
+def test_thicknesses_from_boards_and_stacked_offsets():
+    parts = {p["name"]: p for p in assemble.resolve(assemble.STACK, {"pcb.thickness": 1.6, "pcb.gap": 1.0})}
+    assert {name: parts[name]["thickness"] for name in ("botcover", "botcase", "swplate", "topcase")} == \
+        {"botcover": 1.2, "botcase": 3.0, "swplate": 1.2, "topcase": 5.0}
+    assert parts["swplate"]["z"] == pytest.approx(1.2 + 3.0)
+    assert parts["pcb"]["z"] == pytest.approx(1.2 + 1.0)
+    assert parts["swplate-wall"]["thickness"] == pytest.approx(3.0 + 1.2 + 5.0)
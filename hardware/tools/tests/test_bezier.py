@@ -0,0 +1,88 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Fusion 360 import (Bezier.py) against fakeadsk.py
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import fakeadsk  # noqa: E402
+import golden  # noqa: E402
+
+VARIANT = "nRF54LM20_TMR2615"
+VARIANT_DIR = TOOLS_DIR.parent / VARIANT
+SCRIPT = VARIANT_DIR / "Bezier.py"
+
+@pytest.fixture(scope="module")
+def swplate_curves(tmp_path_factory):
+    """border_curves.kcrv as border.py writes it for the swplate."""
+    config = golden.golden_variants([VARIANT])[VARIANT]
+    job = golden.make_job(VARIANT, config, "swplate", golden.load_fixture(VARIANT))
+    output = tmp_path_factory.mktemp("swplate") / "swplate.kicad_pcb"
+    job["output"] = str(output)
+    golden.run_project(job)
+    return output.parent / "border_curves.kcrv"
+
+
+@pytest.fixture
+def bezier(tmp_path):
+    with fakeadsk.installed(tmp_path / "unused.kcrv"):
+        spec = importlib.util.spec_from_file_location("Bezier", SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+
+
+def _import(curves, **constants):
+    app, _, calls = fakeadsk.run_script(SCRIPT, curves, **constants)
+    (sketch,) = app.activeProduct.rootComponent.sketches.items
+    return sketch, calls
+
+
+def test_batch_import_and_chain_merging(swplate_curves):
+    sketch, calls = _import(swplate_curves, BATCH_IMPORT=False, MERGE_C1_CHAINS=False)
+    assert (sketch.recomputes, sketch.open_joins(), sketch.curves) == (472, 69, 71)
+    assert calls["sketchControlPointSplines.add"] == 37
+
+    sketch, calls = _import(swplate_curves, BATCH_IMPORT=True, MERGE_C1_CHAINS=False)
+    assert (sketch.recomputes, sketch.open_joins(), sketch.curves) == (1, 0, 71)
+
+    sketch, calls = _import(swplate_curves, BATCH_IMPORT=True, MERGE_C1_CHAINS=True)
+    assert (sketch.recomputes, sketch.open_joins()) == (1, 0)
+    splines = calls["sketchControlPointSplines.add"] + calls["sketchFixedSplines.addByNurbsCurve"]
+    assert splines == 27
+
+
+# Three C1 Beziers in an S, one meeting the last at a corner, and a closed
+# C1 loop of four quarter circles (nanometers).
+R, K = 1_000_000, 552_285
+BEZIERS = [
+    [0, 0, 3, 5, 7, 5, 10, 0],
+    [10, 0, 13, -5, 17, -5, 20, 0],
+    [20, 0, 23, 5, 27, 5, 30, 0],
+    [30, 0, 30, 10, 40, 10, 40, 0],
+    [R, 0, R, K, K, R, 0, R],
+    [0, R, -K, R, -R, K, -R, 0],
+    [-R, 0, -R, -K, -K, -R, 0, -R],
+    [0, -R, K, -R, R, -K, R, 0],
+]
+
+
+def test_c1_chains_open_and_closed(bezier):
+    assert bezier.c1_chains(BEZIERS) == [[0, 1, 2], [3], [4, 5, 6, 7]]
+
+
+@pytest.mark.parametrize("chain", [[0, 1, 2], [4, 5, 6, 7], [3]])
+def test_chain_nurbs_knots(bezier, chain):
+    # createNonRational in fakeadsk.py rejects knot vectors Fusion would.
+    curve = bezier.chain_nurbs(BEZIERS, chain)
+    spans = len(chain)
+    assert len(curve.controlPoints) == 3 * spans + 1
+    assert len(curve.knots) == 3 * spans + 5
+    assert curve.knots == [0.0] * 4 + [float(k) for k in range(1, spans) for _ in range(3)] + [float(spans)] * 4
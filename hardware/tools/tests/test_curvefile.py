@@ -0,0 +1,65 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# The .kcrv curve file: curvefile.py writes and reads it, Bezier.py reads it
+# with its own copy of the header inside Fusion 360. Both readers must agree.
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import fakeadsk  # noqa: E402
+
+VARIANT_DIR = TOOLS_DIR.parent / "nRF54LM20_TMR2615"
+sys.path.insert(0, str(VARIANT_DIR / "layout_tools"))
+
+import curvefile  # noqa: E402
+
+LINES = [[0, 0, 1_000_000, -2_000_000]]
+ARCS = [[0, 0, 5, 5, 10, 0], [-(2 ** 40), 1, 2, 3, 4, 2 ** 40]]
+BEZIERS = [[0, 0, 3, 5, 7, 5, 10, 0], [10, 0, 13, -5, 17, -5, 20, 0]]
+
+
+@pytest.fixture
+def read_curves(tmp_path):
+    with fakeadsk.installed(tmp_path / "unused.kcrv"):
+        spec = importlib.util.spec_from_file_location("Bezier", VARIANT_DIR / "Bezier.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module.read_curves
+
+
+@pytest.mark.parametrize("tables", [(LINES, ARCS, BEZIERS), ([], [], [])])
+def test_readers_agree(read_curves, tmp_path, tables):
+    path = tmp_path / "border_curves.kcrv"
+    curvefile.write(path, "User.5", "swplate", *tables)
+
+    header, ours = curvefile.read(path)
+    layer, project, *theirs = read_curves(path)
+    assert (layer, project) == (header["layer"], header["project"]) == ("User.5", "swplate")
+    assert header["header_size"] == curvefile.HEADER.size
+    for name, rows, written in zip(("lines", "arcs", "beziers"), theirs, tables):
+        assert [list(map(int, r)) for r in ours[name]] == written
+        assert [list(map(int, r)) for r in rows] == written
+
+
+def test_both_readers_reject_a_truncated_file(read_curves, tmp_path):
+    path = tmp_path / "border_curves.kcrv"
+    curvefile.write(path, "User.5", "swplate", LINES, ARCS, BEZIERS)
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        curvefile.read(path)
+    with pytest.raises(ValueError):
+        read_curves(path)
+
+
+def test_names_too_long_for_the_header(tmp_path):
+    with pytest.raises(ValueError):
+        curvefile.write(tmp_path / "long.kcrv", "User.5", "p" * 33)
+    with pytest.raises(ValueError):
+        curvefile.write(tmp_path / "long.kcrv", "U" * 17, "swplate")
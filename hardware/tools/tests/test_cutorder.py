@@ -0,0 +1,30 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Cut order of the kailh switch plate: every hole before the outline
+
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import cutorder  # noqa: E402
+import edgecuts  # noqa: E402
+import wires  # noqa: E402
+
+SWPLATE = TOOLS_DIR.parent / "archive" / "nRF54L15_TMR2615_sm_kailh" / "swplate" / "swplate.kicad_pcb"
+
+
+def test_swplate_holes_before_outline():
+    loops, _ = wires.chain(edgecuts.export(SWPLATE))
+    ordered, before, after = cutorder.plan(loops)
+    assert len(ordered) == len(loops) == 103
+    depth = {id(s["loop"]): s["depth"] for s in wires.classify(loops)}
+    # rotate() copies loops; match them back by their set of edge starts.
+    key = {frozenset(map(tuple, cutorder.entry_points(loop))): depth[id(loop)] for loop in loops}
+    depths = [key[frozenset(map(tuple, cutorder.entry_points(loop)))] for loop in ordered]
+    assert depths == sorted(depths, reverse=True)  # holes first, outline last
+    cutouts = [loop for loop in ordered[:-1] if loop[0]["type"] != "circle"]
+    assert len(cutouts) == 72 + 2  # switch cutouts and the two board-level holes
+    assert after < before
@@ -0,0 +1,74 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# archive/dumploc.py restore and snapshots, against fakekipy.py
+
+import runpy
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("kipy")
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+import fakekipy  # noqa: E402
+
+ARCHIVE = TOOLS_DIR.parent / "archive"
+BOARD = ARCHIVE / "nRF54L15_TMR2615_sm_kailh" / "swplate" / "swplate.kicad_pcb"
+
+
+@pytest.fixture
+def dumploc(tmp_path, capsys):
+    """Namespace of dumploc.py loaded on the swplate; files go to tmp_path."""
+    board = fakekipy.LoadBoard(BOARD, tmp_path / BOARD.name)
+    with fakekipy.installed():
+        namespace = runpy.run_path(str(ARCHIVE / "dumploc.py"))
+    capsys.readouterr()
+    namespace["fake"] = board
+    return namespace
+
+
+def footprint(board, ref):
+    return next(fp for fp in board.footprints.values() if fp.reference_field.text.value == ref)
+
+
+def test_restore_flips_before_setting_the_angle(dumploc, capsys):
+    from kipy.geometry import Vector2
+    from kipy.util.board_layer import layer_from_canonical_name
+
+    board = dumploc["fake"]
+    x, y, angle, layer = dumploc["pose"](footprint(board, "S1"))
+    other = "B.Cu" if layer == "F.Cu" else "F.Cu"
+    saved = {"S1": (x + 1_000_000, y, angle + 30, other)}
+
+    # On the wrong side: selected for a manual flip, pose left alone.
+    assert dumploc["restore_positions"](positions=saved) == 0
+    assert board.selected_footprints() == ["S1"]
+    assert dumploc["pose"](footprint(board, "S1")) == (x, y, angle, layer)
+    assert "run the restore again" in capsys.readouterr().out
+
+    # After the flip the next restore sets position and angle as saved.
+    fp = footprint(board, "S1")
+    fp.layer = layer_from_canonical_name(other)
+    fp.position = Vector2.from_xy(x + 5, y)
+    board.update_items([fp])
+    assert dumploc["restore_positions"](positions=saved) == 1
+    assert dumploc["pose"](footprint(board, "S1")) == saved["S1"]
+
+
+def test_snapshot_commands_without_enough_saves(dumploc, capsys):
+    assert dumploc["diff_snapshots"]() is None
+    assert "0 saved" in capsys.readouterr().out
+    assert dumploc["restore_snapshot"]("3fa2") == 0
+    assert "No snapshots at" in capsys.readouterr().out
+
+    dumploc["save_snapshot"]("first")
+    assert dumploc["diff_snapshots"]() is None
+    assert "No snapshot -2: 1 saved" in capsys.readouterr().out
+    assert dumploc["restore_snapshot"]("zz") == 0
+    assert "matches 0 snapshots" in capsys.readouterr().out
+
+    dumploc["save_snapshot"]("second")
+    assert not any(dumploc["diff_snapshots"]().values())
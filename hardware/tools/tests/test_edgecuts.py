@@ -0,0 +1,72 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Edge.Cuts export of the kailh boards: footprint cutouts and NPTH drills
+
+import collections
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import boardq  # noqa: E402
+import edgecuts  # noqa: E402
+import pcbfile  # noqa: E402
+import wires  # noqa: E402
+
+KAILH_DIR = TOOLS_DIR.parent / "archive" / "nRF54L15_TMR2615_sm_kailh"
+
+
+def _depths(records):
+    loops, open_chains = wires.chain(records)
+    assert not open_chains
+    return collections.Counter(shape["depth"] for shape in wires.classify(loops))
+
+
+def test_swplate_switch_cutouts_and_drills():
+    board = KAILH_DIR / "swplate" / "swplate.kicad_pcb"
+    records = edgecuts.export(board)
+    kinds = collections.Counter(r["type"] for r in records)
+    placed = collections.Counter(shape[0] for shape in boardq.index(board)["fp_shapes"]
+                                 if shape[1] == "Edge.Cuts")
+    assert placed == {"gr_line": 336, "gr_arc": 312}  # 72 switch cutouts
+    assert kinds["line"] >= 336 and kinds["arc"] >= 312
+    assert kinds["circle"] == 28  # M1.4, M2, M2.5 and dowel holes
+    # One outline, 72 switch cutouts, 28 drills and the 2 board-level holes.
+    assert _depths(records) == {0: 1, 1: 102}
+
+
+def test_botcover_housing_rivet_and_dowel_holes():
+    board = KAILH_DIR / "botcover" / "botcover.kicad_pcb"
+    without = collections.Counter(r["type"] for r in edgecuts.export(board, drills=False))
+    records = edgecuts.export(board)
+    kinds = collections.Counter(r["type"] for r in records)
+    assert without["circle"] == 209 + 3 + 3 + 2  # Kailh housings (left, right) and tact switches
+    assert kinds["circle"] - without["circle"] == 31 + 16 + 2  # M1.4, M2.5, dowels
+    assert _depths(records) == {0: 1, 1: 267}
+
+
+def test_slot_drill_is_closed():
+    slot = pcbfile.Drill("H1", 10.0, 20.0, 1.2, 3.0, 30.0)
+    loops, open_chains = wires.chain(edgecuts.drill_records(slot))
+    assert len(loops) == 1 and not open_chains
+
+
+def test_wristrest_drills_off_the_board_are_skipped():
+    board = KAILH_DIR / "wristrest" / "wristrest.kicad_pcb"
+    assert len(boardq.index(board)["drills"]) == 16
+    records = edgecuts.export(board)
+    assert sum(r["type"] == "circle" for r in records) == 8  # the other 8 miss both wrist rests
+    assert _depths(records) == {0: 2, 1: 8}
+
+
+def test_chained_edges_meet_exactly():
+    # The botcover outline has a 1 nm gap between a line and a curve: within
+    # wires.TOLERANCE, but more than a CAD kernel closes.
+    loops, _ = wires.chain(edgecuts.export(KAILH_DIR / "botcover" / "botcover.kicad_pcb", ["Edge.Cuts"]))
+    for loop in loops:
+        ends = [(r[wires._ENDS[r["type"]][0]], r[wires._ENDS[r["type"]][1]])
+                for r in loop if r["type"] in wires._ENDS]
+        for (_, end), (start, _) in zip(ends, ends[1:] + ends[:1]):
+            assert end == start
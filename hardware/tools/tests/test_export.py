@@ -0,0 +1,68 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Arc direction in the border DXF (Y up, counterclockwise arcs) and SVG
+# (Y down, sweep flag) written by layout_tools/export.py
+
+import math
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("kipy")
+ezdxf = pytest.importorskip("ezdxf")
+
+from kipy.board_types import BoardArc, BoardLayer  # noqa: E402
+from kipy.geometry import Vector2  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "nRF54LM20_TMR2615" / "layout_tools"))
+import export  # noqa: E402
+
+D = 5 / math.sqrt(2)
+# Centre (10, 10), radius 5 mm, both from angle 0 to 90 in KiCad's Y down:
+# clockwise on screen through 45 degrees, or counterclockwise the long way
+# round through -135.
+ARCS = {
+    "cw": ((15, 10), (10 + D, 10 + D), (10, 15)),
+    "ccw": ((15, 10), (10 - D, 10 - D), (10, 15)),
+}
+
+
+def arc(points):
+    shape = BoardArc()
+    shape.layer = BoardLayer.BL_Edge_Cuts
+    shape.attributes.stroke.width = 100_000
+    for key, (x, y) in zip(("start", "mid", "end"), points):
+        setattr(shape, key, Vector2.from_xy(round(x * 1e6), round(y * 1e6)))
+    return shape
+
+
+@pytest.mark.parametrize("name", ARCS)
+def test_dxf_arc_passes_through_mid(tmp_path, name):
+    start, mid, end = ARCS[name]
+    path = tmp_path / "arc.dxf"
+    export.write_dxf(path, [arc(ARCS[name])], "Edge.Cuts")
+
+    (entity,) = ezdxf.readfile(path).modelspace().query("ARC")
+    a1, a2 = entity.dxf.start_angle, entity.dxf.end_angle
+    middle = math.radians(a1 + ((a2 - a1) % 360) / 2)
+    cx, cy, r = entity.dxf.center.x, entity.dxf.center.y, entity.dxf.radius
+    assert (cx, cy, r) == pytest.approx((10, -10, 5), abs=1e-6)
+    # DXF arcs run counterclockwise from start_angle to end_angle, Y up.
+    assert (cx + r * math.cos(middle), cy + r * math.sin(middle)) == pytest.approx((mid[0], -mid[1]), abs=1e-5)
+    ends = {(round(cx + r * math.cos(math.radians(a)), 5), round(cy + r * math.sin(math.radians(a)), 5))
+            for a in (a1, a2)}
+    assert ends == {(start[0], -start[1]), (end[0], -end[1])}
+
+
+@pytest.mark.parametrize("name, flags", [("cw", (0, 1)), ("ccw", (1, 0))])
+def test_svg_arc_flags(tmp_path, name, flags):
+    path = tmp_path / "arc.svg"
+    export.write_svg(path, [arc(ARCS[name])])
+    d = re.search(r' d="([^"]+)"', path.read_text()).group(1)
+    values = d.replace("M", "").replace("A", "").split()
+    # large-arc and sweep flags; sweep 1 is clockwise on screen (Y down)
+    assert (int(values[5]), int(values[6])) == flags
+    assert [float(v) for v in values[7:9]] == pytest.approx(ARCS[name][2])
@@ -0,0 +1,41 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# golden.py fails on a missing golden instead of recording it
+
+import shutil
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import golden  # noqa: E402
+
+VARIANT = "nRF54LM20_TMR2615"
+
+
+def _run(monkeypatch, tmp_path, *args):
+    monkeypatch.setattr(golden, "HISTORY", tmp_path / "history.csv")
+    monkeypatch.setattr(golden, "OUTPUT_DIR", tmp_path / "build")
+    monkeypatch.setattr(sys, "argv", ["golden.py", VARIANT, *args])
+    return golden.main()
+
+
+def test_missing_golden_fails_and_is_not_written(monkeypatch, tmp_path):
+    goldens = tmp_path / "golden"
+    (goldens / VARIANT).mkdir(parents=True)
+    shutil.copy(golden.fixture_path(VARIANT), goldens / VARIANT / "poses.json")
+    for project in ("pcb", "topcase", "botcase", "botcover", "wristrest"):
+        shutil.copy(golden.golden_path(VARIANT, project), goldens / VARIANT / f"{project}.json")
+    monkeypatch.setattr(golden, "GOLDEN_DIR", goldens)
+    assert _run(monkeypatch, tmp_path) == 1
+    assert not (goldens / VARIANT / "swplate.json").exists()
+    assert _run(monkeypatch, tmp_path, "--update") == 0
+    assert _run(monkeypatch, tmp_path) == 0
+
+
+def test_missing_fixture_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(golden, "GOLDEN_DIR", tmp_path / "golden")
+    assert _run(monkeypatch, tmp_path) == 1
+    assert not (tmp_path / "golden").exists()
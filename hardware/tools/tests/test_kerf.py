@@ -0,0 +1,33 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Smoke test of the kailh kerf stage; needs build123d, skipped without it
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("build123d")
+ezdxf = pytest.importorskip("ezdxf")
+
+KAILH_DIR = Path(__file__).resolve().parents[2] / "archive" / "nRF54L15_TMR2615_sm_kailh"
+sys.path.insert(0, str(KAILH_DIR))
+
+import kerf  # noqa: E402
+
+
+def test_botcover_kerf_dxf_has_y_up_and_drills(tmp_path, monkeypatch):
+    monkeypatch.setattr(kerf, "CACHE_DIR", tmp_path)
+    part = next(p for p in kerf.PARTS if p["name"] == "botcover")
+    output = tmp_path / "botcover.dxf"
+    name, message = kerf.kerf_part((part, 0.2, output))
+    assert not message.startswith("ERROR"), message
+
+    records = kerf.outline(part)
+    ys = [r["center"][1] for r in records if r["type"] == "circle"]
+    assert len(ys) >= 49  # M1.4 and M2.5 rivet/screw holes and the dowels
+    entities = list(ezdxf.readfile(output).modelspace())
+    circles = {round(e.dxf.center.y, 3) for e in entities if e.dxftype() == "CIRCLE"}
+    # Y up: the offset holes keep their centres, the board's negated.
+    assert {round(-y, 3) for y in ys} <= circles
@@ -0,0 +1,75 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Via clearance in the congestion of router.py, on a small synthetic problem
+
+import importlib
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parents[2] / "nRF54LM20_TMR2615"
+
+# 0.1 mm grid, 0.2 mm tracks, 0.6 mm vias, 0.2 mm clearance (nanometers).
+PROBLEM = {"pitch": 100_000, "bounds": [0, 0, 5_000_000, 5_000_000], "layers": ["F.Cu", "B.Cu"],
+           "track_width": 200_000, "via_diameter": 600_000, "clearance": 200_000, "obstacles": []}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.syspath_prepend(str(SCRIPT_DIR))
+    return importlib.import_module("router")
+
+
+def track(ix, iy, li, length=10):
+    """A vertical run of grid nodes, as route() reports it."""
+    return {"nodes": [(ix, iy + k, li) for k in range(length)], "vias": [], "stubs": []}
+
+
+def via(ix, iy):
+    return {"nodes": [(ix, iy, 0), (ix, iy, 1)], "vias": [[ix * 100_000, iy * 100_000]], "stubs": []}
+
+
+def test_tracks_apart_by_width_and_clearance(router):
+    # Centre to centre 0.4 mm is exactly width + clearance.
+    assert router.find_conflicts(PROBLEM, {"a": track(10, 10, 0), "b": track(14, 10, 0)})[0] == set()
+    assert router.find_conflicts(PROBLEM, {"a": track(10, 10, 0), "b": track(13, 10, 0)})[0] == {("a", "b")}
+
+
+def test_via_claims_its_radius_on_both_layers(router):
+    # Via to track needs 0.3 + 0.1 + 0.2 = 0.6 mm, on the layer the track is on.
+    for li in (0, 1):
+        assert router.find_conflicts(PROBLEM, {"a": via(20, 15), "b": track(25, 10, li)})[0] == {("a", "b")}
+        assert router.find_conflicts(PROBLEM, {"a": via(20, 15), "b": track(26, 10, li)})[0] == set()
+
+
+def test_via_to_via(router):
+    # 0.3 + 0.3 + 0.2 = 0.8 mm
+    assert router.find_conflicts(PROBLEM, {"a": via(20, 20), "b": via(27, 20)})[0] == {("a", "b")}
+    assert router.find_conflicts(PROBLEM, {"a": via(20, 20), "b": via(28, 20)})[0] == set()
+
+
+def test_via_claims_reach_the_search(router):
+    claimed, via_claimed = router.claim(PROBLEM, {"a": via(20, 20)})
+    assert claimed[(25, 20, 1)] == {"a"} and (26, 20, 1) not in claimed
+    assert via_claimed[(27, 20)] == {"a"} and (28, 20) not in via_claimed
+
+
+def test_pin_stub_checked_against_vias(router):
+    # A stub from an off-grid pin at x = 2.45 mm to the node at x = 2.4 mm
+    # ends 0.6 mm from the via; its pin end is 0.55 mm from it.
+    stub = {"nodes": [(24, 10, 0)], "vias": [],
+            "stubs": [[2_450_000, 1_000_000, 2_400_000, 1_000_000, "F.Cu"]]}
+    assert router.find_conflicts(PROBLEM, {"a": via(30, 10), "b": stub}) == ({("a", "b")}, {(24, 10, 0)})
+    stub["stubs"] = [[2_350_000, 1_000_000, 2_400_000, 1_000_000, "F.Cu"]]
+    assert router.find_conflicts(PROBLEM, {"a": via(30, 10), "b": stub})[0] == set()
+
+
+def test_route_keeps_via_clearance(router):
+    problem = dict(PROBLEM, nets=[
+        {"name": "a", "pins": [[1_000_000, 2_000_000, ["F.Cu"]], [4_000_000, 2_000_000, ["B.Cu"]]]},
+        {"name": "b", "pins": [[2_500_000, 500_000, ["F.Cu"]], [2_500_000, 4_500_000, ["B.Cu"]]]},
+    ])
+    routes, failed = router.route_all(problem, workers=1, log=lambda _: None)
+    assert failed == [] and sorted(routes) == ["a", "b"]
+    assert router.find_conflicts(problem, routes)[0] == set()
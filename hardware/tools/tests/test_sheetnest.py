@@ -0,0 +1,24 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Nesting a batch of kailh switch plates and wrist rests, holes included
+
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import sheetnest  # noqa: E402
+
+KAILH_DIR = TOOLS_DIR.parent / "archive" / "nRF54L15_TMR2615_sm_kailh"
+
+
+def test_four_keyboards_on_two_sheets():
+    parts = (sheetnest.parts_of(str(KAILH_DIR / "wristrest" / "wristrest.kicad_pcb")) +
+             sheetnest.parts_of(str(KAILH_DIR / "swplate" / "swplate.kicad_pcb"))) * 4
+    assert sorted(name for name, _, _ in parts[:3]) == ["swplate", "wristrest1", "wristrest2"]
+    assert [len(holes) for name, _, holes in parts[:3]] == [4, 4, 102]
+    sheets = sheetnest.pack(parts)
+    assert len(sheets) == 2
+    assert sum(len(sheet.placed) for sheet in sheets) == 12
@@ -0,0 +1,100 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Pad shapes and arc sampling of spatial.py, measured through clearance.check
+
+import importlib
+import math
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parents[2] / "nRF54LM20_TMR2615"
+MM = 1_000_000
+
+
+@pytest.fixture
+def spatial(monkeypatch):
+    monkeypatch.syspath_prepend(str(SCRIPT_DIR))
+    return importlib.import_module("spatial")
+
+
+@pytest.fixture
+def clearance(spatial):
+    return importlib.import_module("clearance")
+
+
+def pad(spatial, *args, **kwargs):
+    kind, points, radius = spatial.pad_shape(*args, **kwargs)
+    return spatial.Copper(kind, points, radius, ("F.Cu",), "PAD")
+
+
+def via(spatial, x, y):
+    return spatial.Copper("circle", (x, y), 0.3 * MM, ("F.Cu", "B.Cu"), "VIA")
+
+
+def test_round_pad_is_a_circle(spatial):
+    # 1 mm round pad: a via 0.6 mm diagonally off its corner box clears it.
+    p = pad(spatial, "circle", 0, 0, MM, MM)
+    x = y = (0.5 + 0.3 + 0.2) * MM / math.sqrt(2) + 1_000
+    assert spatial.distance_to_point(p, x, y) - 0.3 * MM == pytest.approx(0.2 * MM, abs=2_000)
+    assert spatial.point_rect_distance(x, y, *spatial.bbox(p)) < 0.3 * MM + 0.2 * MM
+
+
+def test_rotated_rect_pad(spatial):
+    # 2 x 0.5 mm pad turned 45 degrees counterclockwise (Y down): its long
+    # axis runs to the upper right. Across it, 0.8 mm from the centre is
+    # 0.55 mm clear, though well inside the bounding box.
+    p = pad(spatial, "rect", 0, 0, 2 * MM, 0.5 * MM, angle=45)
+    d = MM / math.sqrt(2)
+    assert spatial.distance_to_point(p, 1.5 * d, -1.5 * d) == pytest.approx(0.5 * MM, abs=10)
+    assert spatial.distance_to_point(p, 0.8 * d, 0.8 * d) == pytest.approx(0.55 * MM, abs=10)
+    assert spatial.point_rect_distance(0.8 * d, 0.8 * d, *spatial.bbox(p)) == 0.0
+    assert spatial.distance_to_point(p, 0, 0) == 0.0
+
+
+def test_roundrect_and_oval_pads(spatial):
+    rr = pad(spatial, "roundrect", 0, 0, 2 * MM, MM, corner_radius=0.25 * MM)
+    corner = (1 - 0.25) * MM, (0.5 - 0.25) * MM
+    assert spatial.distance_to_point(rr, corner[0] + 0.5 * MM, corner[1] + 0.5 * MM) == \
+        pytest.approx(0.5 * MM * math.sqrt(2) - 0.25 * MM, abs=10)
+    oval = pad(spatial, "oval", 0, 0, MM, 2 * MM, angle=90)
+    # 1 x 2 mm, turned a quarter: long along X.
+    assert spatial.distance_to_point(oval, 1.5 * MM, 0) == pytest.approx(0.5 * MM, abs=10)
+    assert spatial.distance_to_point(oval, 0, 1.5 * MM) == pytest.approx(MM, abs=10)
+
+
+def test_other_shapes_are_left_to_the_caller(spatial):
+    assert spatial.pad_shape("trapezoid", 0, 0, MM, MM) is None
+
+
+def test_no_false_violation_next_to_round_pad(spatial, clearance):
+    p = pad(spatial, "circle", 0, 0, MM, MM)
+    x = y = (0.5 + 0.3 + 0.25) * MM / math.sqrt(2)
+    assert clearance.check([via(spatial, x, y)], [p], 0.2 * MM) == []
+
+
+def test_arc_bulge_side_violation(spatial, clearance):
+    # Quarter arc of radius 5 mm, 0.2 mm wide. A via 0.55 mm outside its
+    # middle is 0.15 mm clear of it, but 1.46 mm further from the chord.
+    r = 5 * MM
+    start, end = (r, 0), (0, r)
+    mid = (round(r / math.sqrt(2)), round(r / math.sqrt(2)))
+    segments, sagitta = spatial.arc_segments(start, mid, end, 0.25 * MM)
+    assert all(math.hypot(x2 - x1, y2 - y1) <= 0.25 * MM for x1, y1, x2, y2 in segments)
+    assert segments[0][:2] == start and segments[-1][2:] == end
+    arc = [spatial.Copper("segment", seg, 0.1 * MM + sagitta, ("F.Cu",), "ARC") for seg in segments]
+    out = 0.55 * MM / math.sqrt(2)
+    v = via(spatial, mid[0] + out, mid[1] + out)
+    chord = spatial.Copper("segment", (*start, *end), 0.1 * MM, ("F.Cu",), "ARC")
+    assert clearance.check([v], [chord], 0.2 * MM) == []
+    violations = clearance.check([v], arc, 0.2 * MM)
+    assert violations and violations[0].gap == pytest.approx(0.15 * MM, abs=2_000)
+
+
+def test_arc_direction_follows_mid(spatial):
+    # The same end points through the other mid point sweep the long way round.
+    r = MM
+    segments, _ = spatial.arc_segments((r, 0), (-r, 0), (0, r), 0.1 * MM)
+    length = sum(math.hypot(x2 - x1, y2 - y1) for x1, y1, x2, y2 in segments)
+    assert length == pytest.approx(1.5 * math.pi * r, rel=1e-3)
@@ -0,0 +1,52 @@
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Plan cache of variants.py: keyed on imported modules, side files kept
+
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TOOLS_DIR))
+
+import variants  # noqa: E402
+
+BOARD = TOOLS_DIR.parent / "archive" / "nRF54L15_TMR2615_sm_kailh" / "swplate" / "swplate.kicad_pcb"
+
+
+def _job(tmp_path, script):
+    return {"variant": "test", "api": "pcbnew", "scripts": [str(script)], "overrides": {},
+            "board": str(BOARD), "output": str(tmp_path / "out" / "swplate.kicad_pcb")}
+
+
+def test_key_follows_sibling_modules_and_backend(tmp_path):
+    script, helper = tmp_path / "border.py", tmp_path / "helper.py"
+    script.write_text("import json\nfrom helper import WIDTH\n")
+    helper.write_text("WIDTH = 1\n")
+    job = _job(tmp_path, script)
+    modules = {m.name for m in variants.local_modules([script])}
+    assert modules == {"border.py", "helper.py"}  # json is not local
+    key = variants.job_key(job)
+    helper.write_text("WIDTH = 2\n")
+    assert variants.job_key(job) != key
+    assert "fakepcbnew.py" in {m.name for m in variants.local_modules([TOOLS_DIR / "fakepcbnew.py"])}
+
+
+def test_cache_hit_restores_side_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(variants, "CACHE_DIR", tmp_path / "cache")
+    script = tmp_path / "border.py"
+    script.write_text("import os, pcbnew\n"
+                      "out = os.path.dirname(pcbnew.GetBoard().GetFileName())\n"
+                      "os.makedirs(os.path.join(out, 'export'), exist_ok=True)\n"
+                      "open(os.path.join(out, 'export', 'part.dxf'), 'w').write('dxf')\n"
+                      "print('drawn')\n")
+    job = _job(tmp_path, script)
+    first = variants.run_job(job)
+    assert "error" not in first and not first["cached"]
+    out = Path(job["output"]).parent
+    (out / "export" / "part.dxf").unlink()
+    (out / "swplate.log").unlink()
+    second = variants.run_job(job)
+    assert second["cached"]
+    assert (out / "export" / "part.dxf").read_text() == "dxf"
+    assert (out / "swplate.log").read_text() == "drawn\n"
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Regenerate placements and outlines of every keyboard variant offline
+
+"""Run each variant's placement and border scripts against its boards.
+
+Every build in hardware/ is described by one file in variants/:
+
+    {
+      "dir": "archive/nRF54L15_TMR2615_sm_kailh",   # relative to hardware/
+      "api": "pcbnew",                              # or "kipy"
+      "scripts": ["placefp.py", "border.py"],       # run in this order
+      "overrides": {"GAP": "mil(0.6)"},            # every board
+      "boards": {
+        "swplate/swplate.kicad_pcb": {},
+        "plate/plate.kicad_pcb": {"overrides": {"IS_PCB_MOUNT": false}}
+      }
+    }
+
+A job is one (variant, board) pair. The scripts run unmodified as __main__
+inside the job's process, against a stand-in API loaded from the board:
+fakepcbnew.py for the archived pcbnew scripts, fakekipy.py for the IPC
+plugins. An override replaces the value of the script's top-level
+assignment to that name, in the script's own units, so constants derived
+from it (SIDE_WALL from GAP) follow. JSON strings are Python expressions
+evaluated in the script ("mil(0.6)"; quote them again for a string value).
+Overriding a name a script does not assign at top level is an error.
+
+Jobs run in parallel processes. Parsed boards come from boardq.py's sidecar
+cache, and each job's resulting plan is cached under .cache/variants/ by the
+hash of its scripts, every local module they import (export.py,
+curvefile.py, ..., and the fakepcbnew.py/fakekipy.py stand-in), its
+configuration and board, so rerunning unchanged variants only re-applies
+the plans. Plans are applied with pcbwrite.py to
+build/variants/<variant>/<board>, or to the boards themselves with
+--in-place. Side files the scripts write next to the output board
+(border_curves.kcrv, export/*.dxf and *.svg, the .log) are kept with the
+cached plan and put back on a cache hit.
+
+    python3 variants.py                      # all variants
+    python3 variants.py nRF54L15_TMR2615_sm_kailh --jobs 4
+    python3 variants.py --list
+"""
+
+import argparse
+import ast
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import boardq
+import pcbwrite
+import sexpr
+
+TOOLS_DIR = Path(__file__).resolve().parent
+HARDWARE_DIR = sexpr.HARDWARE_DIR
+VARIANTS_DIR = TOOLS_DIR / "variants"
+CACHE_DIR = TOOLS_DIR / ".cache" / "variants"
+BUILD_DIR = TOOLS_DIR / "build" / "variants"
+ENGINE_VERSION = 2
+BACKEND_MODULES = {"pcbnew": "fakepcbnew.py", "kipy": "fakekipy.py"}
+
+
+def load_variants(names=None):
+    variants = {}
+    for path in sorted(VARIANTS_DIR.glob("*.json")):
+        if names and path.stem not in names:
+            continue
+        with open(path) as f:
+            variants[path.stem] = json.load(f)
+    missing = set(names or ()) - set(variants)
+    if missing:
+        raise SystemExit(f"Unknown variants: {', '.join(sorted(missing))}")
+    return variants
+
+
+def make_jobs(variants, in_place=False):
+    jobs = []
+    for name, config in variants.items():
+        variant_dir = HARDWARE_DIR / config["dir"]
+        for board, options in config["boards"].items():
+            source = variant_dir / board
+            jobs.append({
+                "variant": name,
+                "api": config.get("api", "pcbnew"),
+                "scripts": [str(variant_dir / s) for s in options.get("scripts", config["scripts"])],
+                "overrides": {**config.get("overrides", {}), **options.get("overrides", {})},
+                "board": str(source),
+                "output": str(source if in_place else BUILD_DIR / name / board),
+            })
+    return jobs
+
+
+def local_modules(paths):
+    """paths and every module they import, directly or not, that is a .py file
+    next to the importer or in tools/; sorted. Installed packages are left out."""
+    found, todo = set(), [Path(p).resolve() for p in paths]
+    while todo:
+        path = todo.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for node in ast.walk(ast.parse(path.read_bytes(), str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                for directory in (path.parent, TOOLS_DIR):
+                    module = directory / f"{name.split('.')[0]}.py"
+                    if module.exists():
+                        todo.append(module.resolve())
+                        break
+    return sorted(found)
+
+
+def job_key(job):
+    """Hash of everything a job's plan depends on: the engine, the scripts and
+    the local modules they (and the backend stand-in) import, the
+    configuration and the board."""
+    h = hashlib.sha256(f"{ENGINE_VERSION}\n{job['api']}\n".encode())
+    h.update(json.dumps(job["overrides"], sort_keys=True).encode())
+    backend = [TOOLS_DIR / BACKEND_MODULES[job["api"]]] if job["api"] in BACKEND_MODULES else []
+    for module in local_modules(job["scripts"] + backend):
+        h.update(f"{module.name}\n".encode())
+        h.update(module.read_bytes())
+    h.update(boardq.index(Path(job["board"]))["sha256"].encode())
+    return h.hexdigest()
+
+
+def _snapshot(directory, output):
+    """Files under directory the scripts may write, with their mtime and size."""
+    if not directory.exists():
+        return {}
+    skip = {output.name, f"{output.stem}.plan.json"}
+    return {path.relative_to(directory).as_posix(): (st.st_mtime_ns, st.st_size)
+            for path in directory.rglob("*")
+            if path.is_file() and path.name not in skip and not path.name.startswith(".")
+            for st in [path.stat()]}
+
+
+def _store_side_files(key, directory, names):
+    """Copy the side files a run wrote into the cache, next to its plan."""
+    store = CACHE_DIR / key
+    for name in names:
+        (store / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(directory / name, store / name)
+
+
+def _restore_side_files(key, directory, names):
+    store = CACHE_DIR / key
+    for name in names:
+        (directory / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(store / name, directory / name)
+
+
+class _Override(ast.NodeTransformer):
+    """Replace the value of top-level NAME = ... assignments."""
+
+    def __init__(self, overrides):
+        self.overrides = overrides
+        self.applied = set()
+
+    def visit_Module(self, node):
+        for stmt in node.body:
+            if isinstance(stmt, (ast.Assign, ast.AnnAssign)) and stmt.value is not None:
+                targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+                names = [t.id for t in targets if isinstance(t, ast.Name)]
+                for name in names:
+                    if name in self.overrides:
+                        value = self.overrides[name]
+                        source = value if isinstance(value, str) else repr(value)
+                        expr = ast.copy_location(ast.parse(source, mode="eval").body, stmt.value)
+                        stmt.value = ast.fix_missing_locations(expr)
+                        self.applied.add(name)
+        return node
+
+
+def run_script(path, overrides):
+    """Execute a script as __main__ with module-level constants overridden."""
+    tree = Path(path).read_text()
+    if overrides:
+        transformer = _Override(overrides)
+        tree = transformer.visit(ast.parse(tree, str(path)))
+        unknown = set(overrides) - transformer.applied
+        if unknown:
+            raise KeyError(f"{Path(path).name}: no module-level {', '.join(sorted(unknown))} to override")
+    # Like `python3 script.py`, let the script import its sibling modules.
+    script_dir = str(Path(path).resolve().parent)
+    sys.path.insert(0, script_dir)
+    try:
+        exec(compile(tree, str(path), "exec"), {"__name__": "__main__", "__file__": str(path)})
+    finally:
+        sys.path.remove(script_dir)
+
+
+def _pcbnew_backend(job):
+    """Run the archived pcbnew scripts and return (plan, notes)."""
+    import fakepcbnew
+    sys.modules["pcbnew"] = fakepcbnew
+    board = fakepcbnew.LoadBoard(job["board"], file_name=job["output"], data=job.get("fixture"))
+    for script in job["scripts"]:
+        run_script(script, job["overrides"])
+    notes = []
+    if board.flipped():
+        notes.append(f"flip in KiCad: {', '.join(board.flipped())}")
+    return board.plan(), notes
+
+
+def _kipy_backend(job):
+    """Run the kipy plugins against fakekipy.py and return (plan, notes)."""
+    import fakekipy
+    board = fakekipy.LoadBoard(job["board"], file_name=job["output"], data=job.get("fixture"))
+    with fakekipy.installed():
+        for script in job["scripts"]:
+            run_script(script, job["overrides"])
+    notes = []
+    if board.selected_footprints():
+        notes.append(f"flip in KiCad: {', '.join(board.selected_footprints())}")
+    return board.plan(), notes
+
+
+BACKENDS = {"pcbnew": _pcbnew_backend, "kipy": _kipy_backend}
+
+
+def run_job(job):
+    started = time.perf_counter()
+    result = {"variant": job["variant"], "board": job["board"], "output": job["output"],
+              "cached": False, "notes": []}
+    backend = BACKENDS.get(job["api"])
+    if backend is None:
+        result["error"] = f"no offline backend for api {job['api']!r}"
+        return result
+
+    output = Path(job["output"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    key = job_key(job)
+    cached = CACHE_DIR / f"{key}.json"
+    try:
+        if cached.exists():
+            with open(cached) as f:
+                entry = json.load(f)
+            _restore_side_files(key, output.parent, entry["side_files"])
+            result["cached"] = True
+        else:
+            before = _snapshot(output.parent, output)
+            log = io.StringIO()
+            with contextlib.redirect_stdout(log):
+                plan, notes = backend(job)
+            (output.parent / f"{output.stem}.log").write_text(log.getvalue())
+            after = _snapshot(output.parent, output)
+            side_files = sorted(name for name, stat in after.items() if before.get(name) != stat)
+            entry = {"plan": plan, "notes": notes, "side_files": side_files}
+            _store_side_files(key, output.parent, side_files)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp, cached)
+
+        plan = entry["plan"]
+        with open(output.parent / f"{output.stem}.plan.json", "w") as f:
+            json.dump(plan, f, indent=1)
+        result["edits"] = pcbwrite.apply(job["board"], plan, output)
+        result["moved"] = len(plan["footprints"])
+        result["shapes"] = len(plan["shapes"])
+        result["notes"] = entry["notes"]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("variants", nargs="*", help="variant names (default: all)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel processes")
+    parser.add_argument("--in-place", action="store_true", help="rewrite the source boards")
+    parser.add_argument("--list", action="store_true", help="list variants and boards")
+    args = parser.parse_args()
+
+    variants = load_variants(args.variants)
+    jobs = make_jobs(variants, args.in_place)
+    if args.list:
+        for job in jobs:
+            print(f"{job['variant']:<36} {job['api']:<7} {Path(job['board']).relative_to(HARDWARE_DIR)}")
+        return 0
+
+    started = time.perf_counter()
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(args.jobs) as pool:
+            results = list(pool.map(run_job, jobs))
+    else:
+        results = [run_job(job) for job in jobs]
+
+    failed = 0
+    for r in results:
+        board = Path(r["board"]).relative_to(HARDWARE_DIR / variants[r["variant"]]["dir"])
+        if "error" in r:
+            failed += 1
+            print(f"{r['variant']:<36} {str(board):<32} ERROR {r['error']}")
+            continue
+        print(f"{r['variant']:<36} {str(board):<32} {r['moved']:>4} moved {r['shapes']:>5} shapes "
+              f"{r['seconds']:>6.2f}s{' cached' if r['cached'] else ''}")
+        for note in r["notes"]:
+            print(f"{'':<36} {note}")
+    print(f"{len(results) - failed}/{len(results)} boards in {time.perf_counter() - started:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
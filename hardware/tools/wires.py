@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 Girish Palya <girishji@gmail.com>
+# License: https://opensource.org/licenses/MIT
+#
+# Chain loose outline edges into closed, nested loops
+
+"""Order edgecuts.py records into closed loops and nest them.
+
+Outlines in a board are loose gr_line/gr_arc/gr_curve nodes in no particular
+order or direction. chain() joins them end to end: every endpoint goes into
+a hash keyed by its position snapped to TOLERANCE (neighbouring cells are
+checked too), so finding the next edge is a dictionary lookup and the whole
+pass is linear in the number of edges. Edges are reversed where needed, so
+each loop runs head to tail, and each edge starts exactly where the one
+before it ends: the ends are joined within TOLERANCE, but a CAD kernel
+(build123d) only closes a wire whose gaps are below its own 1e-7 mm. Circles, rectangles and polygons are closed on
+their own and become one-edge loops.
+
+nest() puts every loop under the smallest loop that contains it. Loops at
+even depth are outlines, those at odd depth are their holes (cutouts, the
+botcover's hexagons); an outline inside a hole starts a new face.
+
+    python3 wires.py botcover_edge_cuts.json     # loops, gaps and timing
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+TOLERANCE = 0.001  # mm; endpoints closer than this are joined
+SAMPLES = 8  # points per arc or curve when testing containment
+
+_ENDS = {"line": ("start", "end"), "arc": ("start", "end"), "bezier": ("p0", "p3")}
+
+
+def reverse(record):
+    """The same edge running the other way."""
+    kind = record["type"]
+    if kind == "bezier":
+        return dict(record, p0=record["p3"], p1=record["p2"], p2=record["p1"], p3=record["p0"])
+    return dict(record, start=record["end"], end=record["start"])
+
+
+def _cell(point, tolerance):
+    return (round(point[0] / tolerance), round(point[1] / tolerance))
+
+
+class _Endpoints:
+    """Unused edge ends, hashed by snapped position."""
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.cells = {}
+
+    def add(self, point, index, end):
+        self.cells.setdefault(_cell(point, self.tolerance), []).append((point, index, end))
+
+    def take(self, point, used):
+        """Pop an unused (index, end) within tolerance of point, or None."""
+        cx, cy = _cell(point, self.tolerance)
+        for dx in (0, -1, 1):
+            for dy in (0, -1, 1):
+                entries = self.cells.get((cx + dx, cy + dy))
+                if not entries:
+                    continue
+                for i, (p, index, end) in enumerate(entries):
+                    if index in used:
+                        continue
+                    if abs(p[0] - point[0]) <= self.tolerance and abs(p[1] - point[1]) <= self.tolerance:
+                        del entries[i]
+                        return index, end
+        return None
+
+
+def chain(records, tolerance=TOLERANCE):
+    """Return (loops, open_chains), each a list of head-to-tail records."""
+    loops, open_chains = [], []
+    edges = []
+    for record in records:
+        if record["type"] in _ENDS:
+            edges.append(record)
+        else:
+            loops.append([record])
+
+    ends = _Endpoints(tolerance)
+    for index, record in enumerate(edges):
+        first, last = _ENDS[record["type"]]
+        ends.add(record[first], index, 0)
+        ends.add(record[last], index, 1)
+
+    used = set()
+    for index, record in enumerate(edges):
+        if index in used:
+            continue
+        used.add(index)
+        path = [record]
+        start = record[_ENDS[record["type"]][0]]
+        closed = False
+        while True:
+            tail = path[-1][_ENDS[path[-1]["type"]][1]]
+            if len(path) > 1 and _close(tail, start, tolerance):
+                closed = True
+                break
+            found = ends.take(tail, used)
+            if found is None:
+                closed = len(path) == 1 and _close(tail, start, tolerance)
+                break
+            nxt, end = found
+            used.add(nxt)
+            path.append(edges[nxt] if end == 0 else reverse(edges[nxt]))
+        if not closed:
+            # Walk backwards from the first edge to collect the whole open chain.
+            while True:
+                head = path[0][_ENDS[path[0]["type"]][0]]
+                found = ends.take(head, used)
+                if found is None:
+                    break
+                prev, end = found
+                used.add(prev)
+                path.insert(0, edges[prev] if end == 1 else reverse(edges[prev]))
+        (loops if closed else open_chains).append(_weld(path, closed))
+    return loops, open_chains
+
+
+def _weld(path, closed):
+    """path with every edge's start moved onto the previous edge's end."""
+    welded = [dict(record) for record in path]
+    for i in range(0 if closed else 1, len(welded)):
+        prev, record = welded[i - 1], welded[i]
+        record[_ENDS[record["type"]][0]] = prev[_ENDS[prev["type"]][1]]
+    return welded
+
+
+def _close(a, b, tolerance):
+    return abs(a[0] - b[0]) <= tolerance and abs(a[1] - b[1]) <= tolerance
+
+
+def _arc_points(start, mid, end):
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if abs(d) < 1e-12:
+        return [start, end]
+    ux = ((x1 * x1 + y1 * y1) * (y2 - y3) + (x2 * x2 + y2 * y2) * (y3 - y1) + (x3 * x3 + y3 * y3) * (y1 - y2)) / d
+    uy = ((x1 * x1 + y1 * y1) * (x3 - x2) + (x2 * x2 + y2 * y2) * (x1 - x3) + (x3 * x3 + y3 * y3) * (x2 - x1)) / d
+    r = math.hypot(x1 - ux, y1 - uy)
+    a1 = math.atan2(y1 - uy, x1 - ux)
+    a2 = math.atan2(y2 - uy, x2 - ux)
+    a3 = math.atan2(y3 - uy, x3 - ux)
+    sweep = (a3 - a1) % (2 * math.pi)
+    if (a2 - a1) % (2 * math.pi) > sweep:
+        sweep -= 2 * math.pi
+    return [(ux + r * math.cos(a1 + sweep * i / SAMPLES), uy + r * math.sin(a1 + sweep * i / SAMPLES))
+            for i in range(SAMPLES + 1)]
+
+
+def _bezier_points(p0, p1, p2, p3):
+    points = []
+    for i in range(SAMPLES + 1):
+        t = i / SAMPLES
+        s = 1 - t
+        points.append(tuple(s * s * s * a + 3 * s * s * t * b + 3 * s * t * t * c + t * t * t * d
+                            for a, b, c, d in zip(p0, p1, p2, p3)))
+    return points
+
+
+def polyline(loop):
+    """Points approximating a closed loop, for containment and area."""
+    points = []
+    for record in loop:
+        kind = record["type"]
+        if kind == "line":
+            points.append(tuple(record["start"]))
+        elif kind == "arc":
+            points += _arc_points(record["start"], record["mid"], record["end"])[:-1]
+        elif kind == "bezier":
+            points += _bezier_points(record["p0"], record["p1"], record["p2"], record["p3"])[:-1]
+        elif kind == "circle":
+            (cx, cy), r = record["center"], record["radius"]
+            points += [(cx + r * math.cos(2 * math.pi * i / SAMPLES), cy + r * math.sin(2 * math.pi * i / SAMPLES))
+                       for i in range(SAMPLES)]
+        elif kind == "rectangle":
+            (x1, y1), (x2, y2) = record["start"], record["end"]
+            points += [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        elif kind == "polygon":
+            points += [tuple(p) for p in record["outlines"][0]]
+    return points
+
+
+def area(points):
+    return 0.5 * sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]))
+
+
+def contains(points, point):
+    """Even-odd test of point against the closed polyline points."""
+    x, y = point
+    inside = False
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def classify(loops):
+    """Return one dict per loop, largest first, with its polyline and depth.
+
+    Keys: loop, points, area, box, depth (0 for outermost), parent (the
+    smallest enclosing dict or None). Loops are visited from the largest
+    down, so a loop's parent is always placed before it; bounding boxes
+    rule out most candidates before the point-in-polygon test.
+    """
+    shapes = []
+    for loop in loops:
+        points = polyline(loop)
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        shapes.append({"loop": loop, "points": points, "area": abs(area(points)),
+                       "box": (min(xs), min(ys), max(xs), max(ys)), "depth": 0, "parent": None})
+    shapes.sort(key=lambda s: -s["area"])
+
+    placed = []
+    for shape in shapes:
+        x0, y0, x1, y1 = shape["box"]
+        probe = shape["points"][0]
+        for other in reversed(placed):  # smallest first
+            ox0, oy0, ox1, oy1 = other["box"]
+            if ox0 <= x0 and oy0 <= y0 and x1 <= ox1 and y1 <= oy1 and contains(other["points"], probe):
+                shape["parent"] = other
+                shape["depth"] = other["depth"] + 1
+                break
+        placed.append(shape)
+    return placed
+
+
+def nest(loops):
+    """Return [(outline, [hole, ...]), ...] from closed loops."""
+    shapes = classify(loops)
+    holes = {id(s): [] for s in shapes}
+    for s in shapes:
+        if s["depth"] % 2:
+            holes[id(s["parent"])].append(s["loop"])
+    return [(s["loop"], holes[id(s)]) for s in shapes if s["depth"] % 2 == 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("json", help="edgecuts.py output")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="mm")
+    args = parser.parse_args()
+
+    with open(args.json) as f:
+        records = json.load(f)
+    started = time.perf_counter()
+    loops, open_chains = chain(records, args.tolerance)
+    faces = nest(loops)
+    seconds = time.perf_counter() - started
+    print(f"{len(records)} edges -> {len(loops)} loops, {len(faces)} faces, "
+          f"{sum(len(holes) for _, holes in faces)} holes in {seconds * 1000:.1f} ms")
+    for path in open_chains:
+        first, last = path[0], path[-1]
+        head = first[_ENDS[first["type"]][0]]
+        tail = last[_ENDS[last["type"]][1]]
+        print(f"open chain of {len(path)} edges from ({head[0]:g} {head[1]:g}) to ({tail[0]:g} {tail[1]:g})")
+    return 1 if open_chains else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())